@@ -1,4 +1,6 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, encode_bytes, is_method
+from contracts.execution_router import EXECUTE_ACTION
 
 """
 Agreement Registry Application
@@ -6,32 +8,120 @@ Agreement Registry Application
 Purpose: Store document hashes, maintain signer lists, track signature status,
 and execute agreements once all signatures are verified.
 
+Every agreement lives in its own boxes, so one registry can hold any number of
+agreements; global state only keeps the admin, counters, router and verifiers.
+
+Signers are packed 32-byte addresses kept in ascending order, so the signer
+box is searched by bisection and duplicates are rejected by comparing with the
+neighbouring entry. mark_signed_batch marks many (agreement, signer) pairs in
+one call and logs one SIGNED event per pair. add_signer inserts a signer into
+an existing agreement at its sorted place. create_agreements creates several
+agreements with consecutive IDs and logs the ID range once. Signature status
+is also packed into a bitmap: bit i is set when the i-th signer is marked
+signed, and the bits past the last signer are preset, so the agreement can
+execute once every bit is set. An agreement with the auto-execute flag is
+executed, Execution Router call included, by the mark that completes it.
+archive_agreement logs an executed agreement's record as a summary and deletes
+its boxes, so live box storage only grows with open agreements. The record
+counts the agreement's metadata boxes, and an agreement is only archived once
+delete_metadata and archive_agreement have deleted every one of them.
+
+Box layout:
+    agreement_ + Itob(id)            fixed AGREEMENT_RECORD_SIZE record: document_hash (32)
+                                     | provider (16, zero-padded) | created_at (8) | executed_at (8)
+                                     | flags (8) | signer_count (8) | creator (32) | executed_by (32)
+                                     | meta_count (8, number of meta_ boxes)
+    signer_ + Itob(id)               one SIGNER_ENTRY_SIZE entry per signer, ascending by address:
+                                     signer (32) | signed flag "0"/"1" | signed_at (8)
+    mask_ + Itob(id)                 signed bitmap, one bit per signer (big-endian bit order)
+    meta_ + Itob(id) + "_" + key     metadata value (e.g. action_type)
+
 Enhanced with production-ready execution verification.
 """
 
+SIGNER_SIZE = 32
+SIGNER_ENTRY_SIZE = SIGNER_SIZE + 1 + 8
+
+# add_initial_signers and add_signer rewrite the signer box on the stack, whose values are capped at 4096 bytes
+MAX_SIGNERS = 4096 // SIGNER_ENTRY_SIZE
+
+# Offsets into the fixed-width agreement record
+PROVIDER_OFFSET = 32
+PROVIDER_SIZE = 16
+CREATED_AT_OFFSET = 48
+EXECUTED_AT_OFFSET = 56
+FLAGS_OFFSET = 64
+SIGNER_COUNT_OFFSET = 72
+CREATOR_OFFSET = 80
+EXECUTED_BY_OFFSET = 112
+META_COUNT_OFFSET = 144
+AGREEMENT_RECORD_SIZE = 152
+
+# Agreement flags
+FLAG_EXECUTED = 1
+FLAG_AUTO_EXECUTE = 2  # Execute on the final mark_signed instead of a separate execute_agreement call
+
+# mark_signed_batch pairs: agreement_id (8) | signer (32); each logs SIGNED: + pair. A call's logs
+# are capped at 1024 bytes, leaving room for the logs of one auto-execution
+SIGNATURE_PAIR_SIZE = 8 + SIGNER_SIZE
+EXECUTION_LOG_SIZE = len("EXECUTED:") + 8 + len("TIMESTAMP:") + 8 + len("SIGNER_COUNT:") + 8 + len("EXECUTION_ROUTER_CALLED")
+MAX_BATCH_SIGNATURES = (1024 - EXECUTION_LOG_SIZE) // (len("SIGNED:") + SIGNATURE_PAIR_SIZE)
+
+# create_agreements tuples: document_hash (32) | provider (16) | offset of the address[] signers (2)
+AGREEMENT_TUPLE_SIGNERS_OFFSET = 32 + PROVIDER_SIZE
+
+TEAL_VERSION = 8  # Box storage requires TEAL v8
+
+# ARC-4 methods
+CREATE_AGREEMENT = "create_agreement(byte[32],byte[16],address[])void"
+CREATE_AGREEMENTS = "create_agreements((byte[32],byte[16],address[])[])void"
+ADD_INITIAL_SIGNERS = "add_initial_signers(uint64,address[])void"
+ADD_SIGNER = "add_signer(uint64,address)void"
+ADD_METADATA = "add_metadata(uint64,string,string)void"
+DELETE_METADATA = "delete_metadata(uint64,string[])void"
+MARK_SIGNED = "mark_signed(uint64,address)void"
+MARK_SIGNED_BATCH = "mark_signed_batch((uint64,address)[])void"
+EXECUTE_AGREEMENT = "execute_agreement(uint64)void"
+SET_AUTO_EXECUTE = "set_auto_execute(uint64,bool)void"
+ARCHIVE_AGREEMENT = "archive_agreement(uint64,string[])void"
+ADD_VERIFIER = "add_verifier(address)void"
+REMOVE_VERIFIER = "remove_verifier(address)void"
+SET_EXECUTION_ROUTER = "set_execution_router(uint64)void"
+
+METHODS = [
+    CREATE_AGREEMENT, CREATE_AGREEMENTS, ADD_INITIAL_SIGNERS, ADD_SIGNER, ADD_METADATA, DELETE_METADATA,
+    MARK_SIGNED, MARK_SIGNED_BATCH, EXECUTE_AGREEMENT, SET_AUTO_EXECUTE, ARCHIVE_AGREEMENT, ADD_VERIFIER,
+    REMOVE_VERIFIER, SET_EXECUTION_ROUTER
+]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
     agreement_counter = Bytes("agreement_counter")  # Tracks total agreements
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    CREATE_AGREEMENT = Bytes("create_agreement")
-    MARK_SIGNED = Bytes("mark_signed")
-    EXECUTE_AGREEMENT = Bytes("execute_agreement")
-    ADD_VERIFIER = Bytes("add_verifier")
-    REMOVE_VERIFIER = Bytes("remove_verifier")
-    ADD_SIGNER = Bytes("add_signer")         # New action to support dynamic signers
-    ADD_METADATA = Bytes("add_metadata")     # New action to add metadata to agreements
-    SET_EXECUTION_ROUTER = Bytes("set_execution_router")  # New action to set execution router
-    
     # Box prefixes
     AGREEMENT_PREFIX = Bytes("agreement_")    # For agreement details
     SIGNER_PREFIX = Bytes("signer_")          # For tracking signers and status
+    MASK_PREFIX = Bytes("mask_")              # For the signed bitmap
     META_PREFIX = Bytes("meta_")              # For additional metadata
     
+    # Scratch space for the agreement being handled
+    agreement_id = ScratchVar(TealType.bytes)  # Itob-encoded agreement ID
+    signer_count = ScratchVar(TealType.uint64)
+    index = ScratchVar(TealType.uint64)
+    low = ScratchVar(TealType.uint64)
+    high = ScratchVar(TealType.uint64)
+    entry = ScratchVar(TealType.bytes)
+    last_signer = ScratchVar(TealType.bytes)
+    new_entries = ScratchVar(TealType.bytes)
+    mask = ScratchVar(TealType.bytes)
+    pair_index = ScratchVar(TealType.uint64)
+    pair = ScratchVar(TealType.bytes)
+    item_index = ScratchVar(TealType.uint64)
+    item_offset = ScratchVar(TealType.uint64)
+    signers_arg = ScratchVar(TealType.bytes)
+    meta_count = ScratchVar(TealType.uint64)
+    
     # Handle initialization
     on_creation = Seq([
         App.globalPut(admin, Txn.sender()),
@@ -54,476 +144,532 @@ def approval_program():
     # Get the next agreement ID
     get_next_agreement_id = App.globalGet(agreement_counter)
     
-    # ===== Action Logic =====
+    def agreement_box():
+        return Concat(AGREEMENT_PREFIX, agreement_id.load())
     
-    # Create a new agreement with indexed signer storage
-    # Args: document_hash (bytes32), provider (string), signers[] (addresses, passed as application arguments)
-    on_create_agreement = Seq([
-        Assert(Txn.application_args.length() >= Int(4)),  # Action + doc_hash + provider + at least one signer
-        
-        # Get new agreement ID
-        App.globalPut(Bytes("temp_id"), get_next_agreement_id),
-        # Increment the counter
-        App.globalPut(agreement_counter, get_next_agreement_id + Int(1)),
-        
-        # Store ID in local state for this tx
-        App.localPut(Int(0), Bytes("temp_id"), get_next_agreement_id),
-        
-        # Create agreement with document hash and provider
-        # Format: {doc_hash, provider, timestamp, executed_flag}
-        App.globalPut(
-            Concat(AGREEMENT_PREFIX, Itob(get_next_agreement_id)),
-            Concat(
-                Txn.application_args[1],  # document_hash
-                Txn.application_args[2],  # provider
-                Itob(Global.latest_timestamp()),  # Creation timestamp
-                Bytes("0")  # executed flag (0 = not executed)
+    def signer_box():
+        return Concat(SIGNER_PREFIX, agreement_id.load())
+    
+    def mask_box():
+        return Concat(MASK_PREFIX, agreement_id.load())
+    
+    def meta_box(key):
+        return Concat(META_PREFIX, agreement_id.load(), Bytes("_"), key)
+    
+    def signer_entry(signer):
+        return Concat(signer, Bytes("0"), Itob(Int(0)))  # 0 = not signed
+    
+    def signer_offset():
+        return index.load() * Int(SIGNER_ENTRY_SIZE)
+    
+    # Read a uint64 field of the agreement record (fails if the agreement does not exist)
+    def record_uint(offset):
+        return ExtractUint64(App.box_extract(agreement_box(), Int(offset), Int(8)), Int(0))
+    
+    # Load the signer count of the current agreement
+    def load_signer_count():
+        return signer_count.store(record_uint(SIGNER_COUNT_OFFSET))
+    
+    # Point `index` at `signer` by bisecting the sorted signer box, or at `signer_count` if it is not registered
+    def find_signer(signer):
+        middle = (low.load() + high.load()) / Int(2)
+        return Seq([
+            load_signer_count(),
+            index.store(signer_count.load()),
+            low.store(Int(0)),
+            high.store(signer_count.load()),
+            While(low.load() < high.load()).Do(
+                Seq([
+                    entry.store(App.box_extract(signer_box(), middle * Int(SIGNER_ENTRY_SIZE), Int(SIGNER_SIZE))),
+                    If(entry.load() == signer)
+                    .Then(Seq([index.store(middle), Break()]))
+                    .ElseIf(BytesLt(entry.load(), signer))
+                    .Then(low.store(middle + Int(1)))
+                    .Else(high.store(middle))
+                ])
             )
-        ),
-        
-        # NEW: Store signers by index for easier verification
-        # First signer (required)
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_1"))),
-            Txn.application_args[3]  # First signer address
-        ),
-        
-        # Also store in the original signer map for backward compatibility
-        App.globalPut(
-            Concat(SIGNER_PREFIX, Concat(Itob(get_next_agreement_id), Txn.application_args[3])),
-            Bytes("0") # 0 = not signed
-        ),
-        Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Itob(get_next_agreement_id), Txn.application_args[3]))),
-        
-        # For second signer (if exists)
-        If(Txn.application_args.length() >= Int(5),
-           Seq([
-               # Store by index
-               App.globalPut(
-                   Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_2"))),
-                   Txn.application_args[4]  # Second signer address
-               ),
-               
-               # Original storage
-               App.globalPut(
-                   Concat(SIGNER_PREFIX, Concat(Itob(get_next_agreement_id), Txn.application_args[4])),
-                   Bytes("0") # 0 = not signed
-               ),
-               Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Itob(get_next_agreement_id), Txn.application_args[4])))
-           ])
-        ),
-        
-        # For third signer (if exists)
-        If(Txn.application_args.length() >= Int(6),
-           Seq([
-               # Store by index
-               App.globalPut(
-                   Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_3"))),
-                   Txn.application_args[5]  # Third signer address
-               ),
-               
-               # Original storage
-               App.globalPut(
-                   Concat(SIGNER_PREFIX, Concat(Itob(get_next_agreement_id), Txn.application_args[5])),
-                   Bytes("0") # 0 = not signed
-               ),
-               Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Itob(get_next_agreement_id), Txn.application_args[5])))
-           ])
-        ),
-        
-        # For fourth signer (if exists)
-        If(Txn.application_args.length() >= Int(7),
-           Seq([
-               # Store by index
-               App.globalPut(
-                   Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_4"))),
-                   Txn.application_args[6]  # Fourth signer address
-               ),
-               
-               # Original storage
-               App.globalPut(
-                   Concat(SIGNER_PREFIX, Concat(Itob(get_next_agreement_id), Txn.application_args[6])),
-                   Bytes("0") # 0 = not signed
-               ),
-               Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Itob(get_next_agreement_id), Txn.application_args[6])))
-           ])
-        ),
-        
-        # For fifth signer (if exists)
-        If(Txn.application_args.length() >= Int(8),
-           Seq([
-               # Store by index
-               App.globalPut(
-                   Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_5"))),
-                   Txn.application_args[7]  # Fifth signer address
-               ),
-               
-               # Original storage
-               App.globalPut(
-                   Concat(SIGNER_PREFIX, Concat(Itob(get_next_agreement_id), Txn.application_args[7])),
-                   Bytes("0") # 0 = not signed
-               ),
-               Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Itob(get_next_agreement_id), Txn.application_args[7])))
-           ])
-        ),
-        
-        # Add to signer count
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_signer_count"))), 
-            If(
-                Txn.application_args.length() - Int(3) > Int(5),
-                Int(5),  # Maximum of 5 signers in this implementation
-                Txn.application_args.length() - Int(3)  # Actual number of signers
+        ])
+    
+    # Mark `signer` of the current agreement as signed in its signer entry and the bitmap
+    def mark_signer(signer):
+        return Seq([
+            # Check that agreement exists and the signer is registered for it
+            find_signer(signer),
+            Assert(index.load() < signer_count.load()),
+            
+            # Mark as signed and store signature timestamp
+            App.box_replace(
+                signer_box(),
+                signer_offset() + Int(SIGNER_SIZE),
+                Concat(Bytes("1"), Itob(Global.latest_timestamp()))  # 1 = signed
+            ),
+            
+            # Set the signer's bit in the signed bitmap
+            App.box_replace(
+                mask_box(),
+                index.load() / Int(8),
+                SetBit(App.box_extract(mask_box(), index.load() / Int(8), Int(1)), index.load() % Int(8), Int(1))
             )
-        ),
-        
-        # Store creation metadata
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Itob(get_next_agreement_id), Bytes("_creator"))),
-            Txn.sender()  # Store who created the agreement
-        ),
+        ])
+    
+    # Bitmap for `count` unsigned signers: padding bits past the last signer are preset
+    def empty_mask(count):
+        return Seq([
+            mask.store(BytesZero((count + Int(7)) / Int(8))),
+            For(index.store(count), index.load() < Len(mask.load()) * Int(8), index.store(index.load() + Int(1))).Do(
+                mask.store(SetBit(mask.load(), index.load(), Int(1)))
+            )
+        ])
+    
+    # 2^n as a byte string, for byte math on the bitmap
+    def pow2(n):
+        return SetBit(BytesZero(n / Int(8) + Int(1)), (n / Int(8) + Int(1)) * Int(8) - Int(1) - n, Int(1))
+    
+    # Number of addresses in an address[] argument
+    def signer_arg_count(signers_arg):
+        return ExtractUint16(signers_arg, Int(0))
+    
+    # Append the signers of an address[] argument after `last_signer`, requiring ascending order
+    def append_signers(signers, log_signers=True):
+        steps = [
+            entry.store(Extract(signers, Int(2) + index.load() * Int(SIGNER_SIZE), Int(SIGNER_SIZE))),
+            Assert(BytesGt(entry.load(), last_signer.load())),
+            last_signer.store(entry.load()),
+            new_entries.store(Concat(new_entries.load(), signer_entry(entry.load())))
+        ]
+        if log_signers:
+            steps.append(Log(Concat(Bytes("SIGNER_ADDED:"), agreement_id.load(), entry.load())))
+        return Seq([
+            Assert(Len(signers) == Int(2) + signer_arg_count(signers) * Int(SIGNER_SIZE)),
+            For(index.store(Int(0)), index.load() < signer_arg_count(signers), index.store(index.load() + Int(1))).Do(
+                Seq(steps)
+            )
+        ])
+    
+    # Create the boxes of a new agreement under the next ID; signers is an address[] in ascending order
+    def create_agreement(document_hash, provider, signers, log_signers=True):
+        return Seq([
+            Assert(Len(document_hash) == Int(32)),
+            Assert(Len(provider) == Int(PROVIDER_SIZE)),
+            Assert(signer_arg_count(signers) > Int(0)),
+            
+            # Get new agreement ID and increment the counter
+            agreement_id.store(Itob(get_next_agreement_id)),
+            App.globalPut(agreement_counter, get_next_agreement_id + Int(1)),
+            
+            # Create agreement with document hash, provider and creation metadata
+            Assert(App.box_create(agreement_box(), Int(AGREEMENT_RECORD_SIZE))),
+            App.box_replace(
+                agreement_box(),
+                Int(0),
+                Concat(
+                    document_hash,
+                    provider,
+                    Itob(Global.latest_timestamp()),  # Creation timestamp
+                    Itob(Int(0)),  # Execution timestamp (0 = not executed)
+                    Itob(Int(0)),  # Flags
+                    Itob(signer_arg_count(signers)),  # Signer count
+                    Txn.sender()  # Store who created the agreement; the executor stays zero until execution
+                )
+            ),
+            
+            # Store signers in ascending order, one entry each
+            last_signer.store(Bytes("")),
+            new_entries.store(Bytes("")),
+            append_signers(signers, log_signers),
+            App.box_put(signer_box(), new_entries.load()),
+            
+            # Nobody has signed yet
+            empty_mask(signer_arg_count(signers)),
+            App.box_put(mask_box(), mask.load())
+        ])
+    
+    # Delete the meta_ boxes named by a string[] argument, counting them off the record; keys without a box
+    # are skipped. Leaves the remaining count in `meta_count`
+    def delete_metadata(keys_arg):
+        key_offset = Int(2) + ExtractUint16(keys_arg, Int(2) + index.load() * Int(2))
+        return Seq([
+            meta_count.store(record_uint(META_COUNT_OFFSET)),
+            For(index.store(Int(0)), index.load() < ExtractUint16(keys_arg, Int(0)), index.store(index.load() + Int(1))).Do(
+                If(
+                    App.box_delete(meta_box(Extract(keys_arg, key_offset + Int(2), ExtractUint16(keys_arg, key_offset)))),
+                    meta_count.store(meta_count.load() - Int(1))
+                )
+            ),
+            App.box_replace(agreement_box(), Int(META_COUNT_OFFSET), Itob(meta_count.load()))
+        ])
+    
+    # Creator stored in the agreement box (fails if the agreement does not exist)
+    agreement_creator = App.box_extract(agreement_box(), Int(CREATOR_OFFSET), Int(32))
+    
+    # Whether the agreement has been executed
+    is_executed = record_uint(FLAGS_OFFSET) & Int(FLAG_EXECUTED)
+    
+    # Whether every registered signer has signed: every bit of the bitmap is set
+    signed_mask = App.box_get(mask_box())
+    all_signed = Seq([
+        signed_mask,
+        Assert(signed_mask.hasValue()),
+        BytesNot(signed_mask.value()) == BytesZero(Len(signed_mask.value()))
+    ])
+    
+    # Execute the current agreement and call the Execution Router; shared by execute_agreement
+    # and the marks that complete an auto-execute agreement, so it is compiled once as a subroutine
+    action_type = App.box_get(meta_box(Bytes("action_type")))
+    
+    @Subroutine(TealType.none)
+    def execute_current_agreement():
+        return Seq([
+            load_signer_count(),
+            
+            # Store execution timestamp, executed flag and executor
+            App.box_replace(
+                agreement_box(),
+                Int(EXECUTED_AT_OFFSET),
+                Concat(Itob(Global.latest_timestamp()), Itob(record_uint(FLAGS_OFFSET) | Int(FLAG_EXECUTED)))
+            ),
+            App.box_replace(agreement_box(), Int(EXECUTED_BY_OFFSET), Txn.sender()),
+            
+            # Execution Router Integration
+            If(
+                App.globalGet(Bytes("execution_router_id")) != Int(0),
+                Seq([
+                    action_type,
+                    
+                    # Call the Execution Router
+                    InnerTxnBuilder.Begin(),
+                    InnerTxnBuilder.SetFields({
+                        TxnField.type_enum: TxnType.ApplicationCall,
+                        TxnField.application_id: App.globalGet(Bytes("execution_router_id")),
+                        TxnField.application_args: [
+                            MethodSignature(EXECUTE_ACTION),
+                            agreement_id.load(),  # Agreement ID
+                            # Action type from metadata (if exists)
+                            encode_bytes(If(
+                                action_type.hasValue(),
+                                action_type.value(),
+                                Bytes("default")  # Default action type
+                            )),
+                            Bytes("base16", "0000")  # No handler parameters
+                        ],
+                        TxnField.note: Bytes("Agreement executed - calling router"),
+                        TxnField.fee: Int(0),  # Fee covered by outer txn
+                    }),
+                    InnerTxnBuilder.Submit(),
+                    
+                    # Log router call
+                    Log(Bytes("EXECUTION_ROUTER_CALLED"))
+                ])
+            ),
+            
+            # Emit detailed log for executed agreement
+            Log(Concat(Bytes("EXECUTED:"), agreement_id.load())),
+            Log(Concat(Bytes("TIMESTAMP:"), Itob(Global.latest_timestamp()))),
+            Log(Concat(Bytes("SIGNER_COUNT:"), Itob(signer_count.load())))
+        ])
+    
+    # Execute the current agreement if it has the auto-execute flag and the last mark completed it
+    auto_execute = If(
+        record_uint(FLAGS_OFFSET) & Int(FLAG_AUTO_EXECUTE | FLAG_EXECUTED) == Int(FLAG_AUTO_EXECUTE),
+        If(all_signed, execute_current_agreement())
+    )
+    
+    # ===== Action Logic =====
+    
+    # Create a new agreement with its signers in per-agreement boxes
+    # Args: document_hash (byte[32]), provider (byte[16], zero-padded), signers (address[] in ascending order)
+    on_create_agreement = Seq([
+        Assert(Txn.application_args.length() == Int(4)),
+        create_agreement(Txn.application_args[1], Txn.application_args[2], Txn.application_args[3]),
         
         # Log the agreement creation
-        Log(Concat(Bytes("AGREEMENT_CREATED:"), Itob(get_next_agreement_id))),
+        Log(Concat(Bytes("AGREEMENT_CREATED:"), agreement_id.load())),
         Log(Concat(Bytes("PROVIDER:"), Txn.application_args[2])),
         
         Return(Int(1))
     ])
     
-    # Add a signer to an existing agreement with indexed references
-    # Args: agreement_id (uint), signer_wallet (address)
-    on_add_signer = Seq([
-        Assert(Txn.application_args.length() == Int(3)),
+    # Create several agreements with consecutive IDs, logging AGREEMENTS_CREATED: + first ID + count
+    # Args: agreements ((byte[32],byte[16],address[])[]: document_hash, provider, signers in ascending order)
+    agreements_arg = Txn.application_args[1]
+    agreement_count = ExtractUint16(agreements_arg, Int(0))
+    signers_start = item_offset.load() + ExtractUint16(agreements_arg, item_offset.load() + Int(AGREEMENT_TUPLE_SIGNERS_OFFSET))
+    on_create_agreements = Seq([
+        Assert(Txn.application_args.length() == Int(2)),
+        Assert(agreement_count > Int(0)),
         
-        # Check that the caller is admin or agreement creator
-        Assert(
-            Or(
-                is_admin,
-                Txn.sender() == App.globalGet(
-                    Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_creator")))
+        For(item_index.store(Int(0)), item_index.load() < agreement_count, item_index.store(item_index.load() + Int(1))).Do(
+            Seq([
+                # Tuple offsets are relative to the element heads that follow the count
+                item_offset.store(Int(2) + ExtractUint16(agreements_arg, Int(2) + item_index.load() * Int(2))),
+                signers_arg.store(Extract(
+                    agreements_arg, signers_start, Int(2) + ExtractUint16(agreements_arg, signers_start) * Int(SIGNER_SIZE)
+                )),
+                create_agreement(
+                    Extract(agreements_arg, item_offset.load(), Int(32)),
+                    Extract(agreements_arg, item_offset.load() + Int(32), Int(PROVIDER_SIZE)),
+                    signers_arg.load(),
+                    log_signers=False
                 )
-            )
-        ),
-        
-        # Check that agreement exists and is not executed
-        Assert(App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1])) != Bytes("")),
-        Assert(
-            Substring(
-                App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1])), 
-                Int(64), # Position of executed flag (after hash and provider)
-                Int(65)
-            ) == Bytes("0")
-        ),
-        
-        # Check if signer already exists
-        Assert(
-            App.globalGet(
-                Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], Txn.application_args[2]))
-            ) == Bytes("")
+            ])
         ),
         
-        # Get current signer count
-        App.localPut(Int(0), Bytes("current_count"),
-                    App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_count"))))),
-        
-        # Check max signer limit
-        Assert(App.localGet(Int(0), Bytes("current_count")) < Int(5)),  # Max 5 signers in this implementation
+        Log(Concat(Bytes("AGREEMENTS_CREATED:"), Itob(get_next_agreement_id - agreement_count), Itob(agreement_count))),
         
-        # Calculate new signer index
-        App.localPut(Int(0), Bytes("new_index"), App.localGet(Int(0), Bytes("current_count")) + Int(1)),
-        
-        # Store signer in indexed reference
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], 
-                                      Concat(Bytes("_signer_"), Itob(App.localGet(Int(0), Bytes("new_index")))))),
-            Txn.application_args[2]  # New signer address
-        ),
+        Return(Int(1))
+    ])
+    
+    # Add the signers that did not fit create_agreement, in the same group as the creation.
+    # New signers are appended, so they must sort after every current signer: the call is
+    # limited to the creation group, where the creator sorts the whole list up front.
+    # add_signer inserts signers into existing agreements
+    # Args: agreement_id (uint64), signers (address[], ascending and after every current signer)
+    signers = App.box_get(signer_box())
+    current_mask = App.box_get(mask_box())
+    on_add_initial_signers = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        agreement_id.store(Txn.application_args[1]),
         
-        # Original signer storage
-        App.globalPut(
-            Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], Txn.application_args[2])),
-            Bytes("0") # 0 = not signed
-        ),
+        # Only in the group whose first call created this agreement, the latest one
+        Assert(Txn.group_index() > Int(0)),
+        Assert(Gtxn[0].application_id() == Global.current_application_id()),
+        Assert(Gtxn[0].application_args[0] == MethodSignature(CREATE_AGREEMENT)),
+        Assert(Gtxn[0].sender() == Txn.sender()),
+        Assert(Btoi(agreement_id.load()) == get_next_agreement_id - Int(1)),
         
-        # Update signer count
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_count"))),
-            App.localGet(Int(0), Bytes("new_index"))
+        # Check that the caller is admin or agreement creator
+        Assert(Or(is_admin, Txn.sender() == agreement_creator)),
+        
+        # Check that agreement is not executed
+        Assert(Not(is_executed)),
+        
+        # Check the max signer limit
+        load_signer_count(),
+        Assert(signer_count.load() + signer_arg_count(Txn.application_args[2]) <= Int(MAX_SIGNERS)),
+        
+        # New signers must sort after the current last signer, which also rules out duplicates
+        signers,
+        Assert(signers.hasValue()),
+        last_signer.store(Extract(signers.value(), Len(signers.value()) - Int(SIGNER_ENTRY_SIZE), Int(SIGNER_SIZE))),
+        new_entries.store(signers.value()),
+        append_signers(Txn.application_args[2]),
+        
+        # Boxes cannot grow in place: rewrite the signer box with the new entries appended
+        Pop(App.box_delete(signer_box())),
+        App.box_put(signer_box(), new_entries.load()),
+        App.box_replace(agreement_box(), Int(SIGNER_COUNT_OFFSET), Itob(Len(new_entries.load()) / Int(SIGNER_ENTRY_SIZE))),
+        
+        # Extend the bitmap with an unset bit per new signer
+        current_mask,
+        Assert(current_mask.hasValue()),
+        mask.store(current_mask.value()),
+        For(index.store(signer_count.load()), index.load() < Len(new_entries.load()) / Int(SIGNER_ENTRY_SIZE),
+            index.store(index.load() + Int(1))).Do(
+            If(index.load() % Int(8) == Int(0))
+            .Then(mask.store(Concat(mask.load(), Bytes("base16", "7f"))))
+            .Else(mask.store(SetBit(mask.load(), index.load(), Int(0))))
         ),
+        Pop(App.box_delete(mask_box())),
+        App.box_put(mask_box(), mask.load()),
         
-        # Log signer addition
-        Log(Concat(Bytes("SIGNER_ADDED:"), Concat(Txn.application_args[1], Txn.application_args[2]))),
+        Return(Int(1))
+    ])
+    
+    # Add a signer to an existing agreement at its sorted place (admin or creator only)
+    # Args: agreement_id (uint64), signer (address)
+    on_add_signer = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        agreement_id.store(Txn.application_args[1]),
+        
+        # Check that the caller is admin or agreement creator, and the agreement is not executed
+        Assert(Or(is_admin, Txn.sender() == agreement_creator)),
+        Assert(Not(is_executed)),
+        
+        # Bisection rejects a registered signer and leaves `low` at the new signer's index
+        Assert(Len(Txn.application_args[2]) == Int(SIGNER_SIZE)),
+        find_signer(Txn.application_args[2]),
+        Assert(index.load() == signer_count.load()),
+        Assert(signer_count.load() < Int(MAX_SIGNERS)),
+        
+        # Boxes cannot grow in place: rewrite the signer box with the entry spliced in
+        signers,
+        Assert(signers.hasValue()),
+        new_entries.store(Concat(
+            Extract(signers.value(), Int(0), low.load() * Int(SIGNER_ENTRY_SIZE)),
+            signer_entry(Txn.application_args[2]),
+            Suffix(signers.value(), low.load() * Int(SIGNER_ENTRY_SIZE))
+        )),
+        Pop(App.box_delete(signer_box())),
+        App.box_put(signer_box(), new_entries.load()),
+        App.box_replace(agreement_box(), Int(SIGNER_COUNT_OFFSET), Itob(signer_count.load() + Int(1))),
+        
+        # Insert an unset bit at the same index with byte math: the bits from it on move one place
+        # along, dropping a preset padding bit, or spilling into a new padding byte if the bitmap is full
+        current_mask,
+        Assert(current_mask.hasValue()),
+        mask.store(current_mask.value()),
+        index.store(Len(mask.load()) * Int(8) - low.load()),  # Bits from the new signer's index on
+        mask.store(BytesAdd(
+            BytesMul(BytesDiv(mask.load(), pow2(index.load())), pow2(index.load() + Int(1))),
+            BytesMod(mask.load(), pow2(index.load()))
+        )),
+        If(signer_count.load() % Int(8) == Int(0))
+        .Then(mask.store(BytesAdd(BytesMul(mask.load(), Bytes("base16", "80")), Bytes("base16", "7f"))))
+        .Else(mask.store(BytesDiv(mask.load(), Bytes("base16", "02")))),
+        mask.store(Concat(BytesZero((signer_count.load() + Int(8)) / Int(8) - Len(mask.load())), mask.load())),
+        Pop(App.box_delete(mask_box())),
+        App.box_put(mask_box(), mask.load()),
+        
+        Log(Concat(Bytes("SIGNER_ADDED:"), agreement_id.load(), Txn.application_args[2])),
         
         Return(Int(1))
     ])
     
     # Add metadata to an agreement (admin or creator only)
-    # Args: agreement_id (uint), metadata_key (string), metadata_value (string)
+    # Args: agreement_id (uint64), metadata_key (string), metadata_value (string)
     on_add_metadata = Seq([
         Assert(Txn.application_args.length() == Int(4)),
+        agreement_id.store(Txn.application_args[1]),
         
-        # Check that the caller is admin or agreement creator
-        Assert(
-            Or(
-                is_admin,
-                Txn.sender() == App.globalGet(
-                    Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_creator")))
-                )
-            )
-        ),
-        
-        # Check that agreement exists
-        Assert(App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1])) != Bytes("")),
+        # Check that the caller is admin or agreement creator (the agreement must exist)
+        Assert(Or(is_admin, Txn.sender() == agreement_creator)),
         
-        # Add metadata
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], Concat(Bytes("_"), Txn.application_args[2]))),
-            Txn.application_args[3]
+        # Add metadata, replacing any previous value of a different size; new keys are counted
+        If(
+            Not(App.box_delete(meta_box(bytes_arg(2)))),
+            App.box_replace(agreement_box(), Int(META_COUNT_OFFSET), Itob(record_uint(META_COUNT_OFFSET) + Int(1)))
         ),
+        App.box_put(meta_box(bytes_arg(2)), bytes_arg(3)),
         
         # Log metadata addition
-        Log(Concat(Bytes("METADATA_ADDED:"), Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[2])))),
+        Log(Concat(Bytes("METADATA_ADDED:"), Concat(Txn.application_args[1], Concat(Bytes(":"), bytes_arg(2))))),
         
         Return(Int(1))
     ])
     
     # Mark an agreement as signed by a specific wallet
-    # Args: agreement_id (uint), signer_wallet (address)
+    # Args: agreement_id (uint64), signer_wallet (address)
     on_mark_signed = Seq([
         Assert(Txn.application_args.length() == Int(3)),
         Assert(is_verifier),  # Only verifiers can mark as signed
+        agreement_id.store(Txn.application_args[1]),
+        mark_signer(Txn.application_args[2]),
         
-        # Check that agreement exists
-        Assert(App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1])) != Bytes("")),
+        # Log signature event
+        Log(Concat(Bytes("SIGNATURE:"), Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[2])))),
+        Log(Concat(Bytes("TIMESTAMP:"), Itob(Global.latest_timestamp()))),
         
-        # Check that signer is registered for agreement
-        Assert(App.globalGet(Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], Txn.application_args[2]))) != Bytes("")),
+        # Executes the agreement if this was its final signature
+        auto_execute,
         
-        # Mark as signed
-        App.globalPut(
-            Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], Txn.application_args[2])),
-            Bytes("1")  # 1 = signed
-        ),
+        Return(Int(1))
+    ])
+    
+    # Mark many (agreement, signer) pairs as signed, logging SIGNED: + agreement_id + signer for each
+    # Args: signatures ((uint64,address)[], at most MAX_BATCH_SIGNATURES pairs)
+    pair_count = ExtractUint16(Txn.application_args[1], Int(0))
+    on_mark_signed_batch = Seq([
+        Assert(Txn.application_args.length() == Int(2)),
+        Assert(is_verifier),  # Only verifiers can mark as signed
+        Assert(Len(Txn.application_args[1]) == Int(2) + pair_count * Int(SIGNATURE_PAIR_SIZE)),
+        Assert(pair_count <= Int(MAX_BATCH_SIGNATURES)),
         
-        # Store signature timestamp
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], Concat(Bytes("_signed_at_"), Txn.application_args[2]))),
-            Itob(Global.latest_timestamp())
+        For(pair_index.store(Int(0)), pair_index.load() < pair_count, pair_index.store(pair_index.load() + Int(1))).Do(
+            Seq([
+                pair.store(Extract(
+                    Txn.application_args[1], Int(2) + pair_index.load() * Int(SIGNATURE_PAIR_SIZE), Int(SIGNATURE_PAIR_SIZE)
+                )),
+                agreement_id.store(Extract(pair.load(), Int(0), Int(8))),
+                mark_signer(Suffix(pair.load(), Int(8))),
+                Log(Concat(Bytes("SIGNED:"), pair.load())),
+                auto_execute
+            ])
         ),
         
-        # Log signature event
-        Log(Concat(Bytes("SIGNATURE:"), Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[2])))),
-        Log(Concat(Bytes("TIMESTAMP:"), Itob(Global.latest_timestamp()))),
-        
         Return(Int(1))
     ])
     
     # Production-ready implementation of agreement execution verification
-    # Args: agreement_id (uint)
+    # Args: agreement_id (uint64)
     on_execute_agreement = Seq([
         Assert(Txn.application_args.length() == Int(2)),  # Action + agreement_id
+        agreement_id.store(Txn.application_args[1]),
         
-        # Store agreement ID
-        App.localPut(Int(0), Bytes("agreement_id"), Txn.application_args[1]),
+        # Check if agreement is already executed (fails if it does not exist)
+        Assert(Not(is_executed)),
         
-        # Get agreement information
-        Assert(App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1])) != Bytes("")),
+        # Verify every registered signer has signed
+        Assert(all_signed),
         
-        # Store agreement data for this tx
-        App.localPut(Int(0), Bytes("agreement_data"), 
-                     App.globalGet(Concat(AGREEMENT_PREFIX, Txn.application_args[1]))),
+        execute_current_agreement(),
         
-        # Check if agreement is already executed
-        Assert(
-            Substring(
-                App.localGet(Int(0), Bytes("agreement_data")), 
-                Int(64), # Position after doc_hash and provider
-                Int(65)
-            ) == Bytes("0")
-        ),
-        
-        # Get total signer count
-        App.localPut(Int(0), Bytes("total_signers"),
-                     App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_count"))))),
-        
-        # Initialize signed counter and verification flag
-        App.localPut(Int(0), Bytes("signed_count"), Int(0)),
-        App.localPut(Int(0), Bytes("all_signed"), Int(1)),  # Assume all signed until proven otherwise
-        
-        # Retrieve each potential signer and check if they signed
-        # Check signer 1 (always required)
-        If(
-            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_1")))) != Bytes(""),
-            Seq([
-                # Store signer address
-                App.localPut(Int(0), Bytes("current_signer"), 
-                             App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_1"))))),
-                
-                # Check if this signer has signed
-                If(
-                    App.globalGet(
-                        Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], 
-                                              App.localGet(Int(0), Bytes("current_signer"))))
-                    ) == Bytes("1"),  # If signed
-                    # Increment signed count
-                    App.localPut(Int(0), Bytes("signed_count"), App.localGet(Int(0), Bytes("signed_count")) + Int(1)),
-                    # Else, mark not all signed
-                    App.localPut(Int(0), Bytes("all_signed"), Int(0))
-                )
-            ])
-        ),
-        
-        # Check signer 2 (if exists)
-        If(
-            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_2")))) != Bytes(""),
-            Seq([
-                # Store signer address
-                App.localPut(Int(0), Bytes("current_signer"), 
-                             App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_2"))))),
-                
-                # Check if this signer has signed
-                If(
-                    App.globalGet(
-                        Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], 
-                                              App.localGet(Int(0), Bytes("current_signer"))))
-                    ) == Bytes("1"),  # If signed
-                    # Increment signed count
-                    App.localPut(Int(0), Bytes("signed_count"), App.localGet(Int(0), Bytes("signed_count")) + Int(1)),
-                    # Else, mark not all signed
-                    App.localPut(Int(0), Bytes("all_signed"), Int(0))
-                )
-            ])
+        Return(Int(1))
+    ])
+    
+    # Turn execution on the final signature on or off (admin or creator, before execution)
+    # Args: agreement_id (uint64), enabled (bool)
+    on_set_auto_execute = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        agreement_id.store(Txn.application_args[1]),
+        
+        # Check that the caller is admin or agreement creator (the agreement must exist)
+        Assert(Or(is_admin, Txn.sender() == agreement_creator)),
+        Assert(Not(is_executed)),
+        
+        App.box_replace(
+            agreement_box(),
+            Int(FLAGS_OFFSET),
+            Itob(If(
+                GetBit(Txn.application_args[2], Int(0)),
+                record_uint(FLAGS_OFFSET) | Int(FLAG_AUTO_EXECUTE),
+                record_uint(FLAGS_OFFSET) & ~Int(FLAG_AUTO_EXECUTE)
+            ))
         ),
         
-        # Check signer 3 (if exists)
-        If(
-            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_3")))) != Bytes(""),
-            Seq([
-                # Store signer address
-                App.localPut(Int(0), Bytes("current_signer"), 
-                             App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_3"))))),
-                
-                # Check if this signer has signed
-                If(
-                    App.globalGet(
-                        Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], 
-                                              App.localGet(Int(0), Bytes("current_signer"))))
-                    ) == Bytes("1"),  # If signed
-                    # Increment signed count
-                    App.localPut(Int(0), Bytes("signed_count"), App.localGet(Int(0), Bytes("signed_count")) + Int(1)),
-                    # Else, mark not all signed
-                    App.localPut(Int(0), Bytes("all_signed"), Int(0))
-                )
-            ])
-        ),
+        # Log flag change
+        Log(Concat(Bytes("AUTO_EXECUTE_SET:"), Txn.application_args[1], Txn.application_args[2])),
         
-        # Check signer 4 (if exists)
-        If(
-            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_4")))) != Bytes(""),
-            Seq([
-                # Store signer address
-                App.localPut(Int(0), Bytes("current_signer"), 
-                             App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_4"))))),
-                
-                # Check if this signer has signed
-                If(
-                    App.globalGet(
-                        Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], 
-                                              App.localGet(Int(0), Bytes("current_signer"))))
-                    ) == Bytes("1"),  # If signed
-                    # Increment signed count
-                    App.localPut(Int(0), Bytes("signed_count"), App.localGet(Int(0), Bytes("signed_count")) + Int(1)),
-                    # Else, mark not all signed
-                    App.localPut(Int(0), Bytes("all_signed"), Int(0))
-                )
-            ])
-        ),
+        Return(Int(1))
+    ])
+    
+    # Delete metadata (admin or creator, or a verifier once the agreement is executed)
+    # Args: agreement_id (uint64), metadata_keys (string[]: keys of the meta_ boxes to delete)
+    on_delete_metadata = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        agreement_id.store(Txn.application_args[1]),
         
-        # Check signer 5 (if exists)
-        If(
-            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_5")))) != Bytes(""),
-            Seq([
-                # Store signer address
-                App.localPut(Int(0), Bytes("current_signer"), 
-                             App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_signer_5"))))),
-                
-                # Check if this signer has signed
-                If(
-                    App.globalGet(
-                        Concat(SIGNER_PREFIX, Concat(Txn.application_args[1], 
-                                              App.localGet(Int(0), Bytes("current_signer"))))
-                    ) == Bytes("1"),  # If signed
-                    # Increment signed count
-                    App.localPut(Int(0), Bytes("signed_count"), App.localGet(Int(0), Bytes("signed_count")) + Int(1)),
-                    # Else, mark not all signed
-                    App.localPut(Int(0), Bytes("all_signed"), Int(0))
-                )
-            ])
-        ),
+        # Check that the caller may delete metadata (the agreement must exist)
+        Assert(Or(is_admin, Txn.sender() == agreement_creator, And(is_verifier, is_executed))),
         
-        # Verify all have signed using both methods
-        # Method 1: Check via all_signed flag 
-        Assert(App.localGet(Int(0), Bytes("all_signed")) == Int(1)),
+        delete_metadata(Txn.application_args[2]),
         
-        # Method 2: Check via signed count match
-        Assert(App.localGet(Int(0), Bytes("signed_count")) == App.localGet(Int(0), Bytes("total_signers"))),
+        # Log metadata deletion
+        Log(Concat(Bytes("METADATA_DELETED:"), Txn.application_args[1])),
         
-        # Store the number of signers for logging
-        App.localPut(Int(0), Bytes("signer_count"), App.localGet(Int(0), Bytes("total_signers"))),
+        Return(Int(1))
+    ])
+    
+    # Delete an executed agreement's boxes after logging ARCHIVED: + its record (admin, verifier or creator).
+    # Metadata not listed here must have been deleted first, e.g. by delete_metadata calls earlier in the group
+    # Args: agreement_id (uint64), metadata_keys (string[]: keys of the meta_ boxes to delete)
+    on_archive_agreement = Seq([
+        Assert(Txn.application_args.length() == Int(3)),
+        agreement_id.store(Txn.application_args[1]),
         
-        # Update executed flag
-        App.globalPut(
-            Concat(AGREEMENT_PREFIX, Txn.application_args[1]),
-            Concat(
-                Substring(App.localGet(Int(0), Bytes("agreement_data")), Int(0), Int(64)),
-                Bytes("1"),  # Set executed flag to 1
-                Itob(Global.latest_timestamp())  # Execution timestamp
-            )
-        ),
+        # Check that the caller may archive and the agreement is executed (fails if it does not exist)
+        Assert(Or(is_admin, is_verifier, Txn.sender() == agreement_creator)),
+        Assert(is_executed),
         
-        # Store execution metadata
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_executed_at"))),
-            Itob(Global.latest_timestamp())
-        ),
-        App.globalPut(
-            Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_executed_by"))),
-            Txn.sender()
-        ),
+        # The record is the agreement's summary: hash, provider, timestamps, signer count, creator, executor
+        Log(Concat(Bytes("ARCHIVED:"), App.box_extract(agreement_box(), Int(0), Int(AGREEMENT_RECORD_SIZE)))),
         
-        # Execution Router Integration
-        If(
-            App.globalGet(Bytes("execution_router_id")) != Int(0),
-            Seq([
-                # Call the Execution Router
-                InnerTxnBuilder.Begin(),
-                InnerTxnBuilder.SetFields({
-                    TxnField.type_enum: TxnType.ApplicationCall,
-                    TxnField.application_id: App.globalGet(Bytes("execution_router_id")),
-                    TxnField.application_args: [
-                        Bytes("execute_action"),
-                        Txn.application_args[1],  # Agreement ID
-                        # Action type from metadata (if exists)
-                        If(
-                            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_action_type")))) != Bytes(""),
-                            App.globalGet(Concat(META_PREFIX, Concat(Txn.application_args[1], Bytes("_action_type")))),
-                            Bytes("default")  # Default action type
-                        )
-                    ],
-                    TxnField.note: Bytes("Agreement executed - calling router"),
-                    TxnField.fee: Int(0),  # Fee covered by outer txn
-                }),
-                InnerTxnBuilder.Submit(),
-                
-                # Log router call
-                Log(Bytes("EXECUTION_ROUTER_CALLED"))
-            ])
-        ),
+        # Delete the listed metadata; no metadata box may outlive the record
+        delete_metadata(Txn.application_args[2]),
+        Assert(meta_count.load() == Int(0)),
         
-        # Emit detailed log for executed agreement
-        Log(Concat(Bytes("EXECUTED:"), Txn.application_args[1])),
-        Log(Concat(Bytes("TIMESTAMP:"), Itob(Global.latest_timestamp()))),
-        Log(Concat(Bytes("SIGNER_COUNT:"), Itob(App.localGet(Int(0), Bytes("signer_count"))))),
+        Assert(App.box_delete(agreement_box())),
+        Assert(App.box_delete(signer_box())),
+        Assert(App.box_delete(mask_box())),
         
         Return(Int(1))
     ])
@@ -574,14 +720,20 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == CREATE_AGREEMENT, on_create_agreement],
-        [ACTION == ADD_SIGNER, on_add_signer],
-        [ACTION == ADD_METADATA, on_add_metadata],
-        [ACTION == MARK_SIGNED, on_mark_signed],
-        [ACTION == EXECUTE_AGREEMENT, on_execute_agreement],
-        [ACTION == ADD_VERIFIER, on_add_verifier],
-        [ACTION == REMOVE_VERIFIER, on_remove_verifier],
-        [ACTION == SET_EXECUTION_ROUTER, on_set_execution_router]
+        [is_method(CREATE_AGREEMENT), on_create_agreement],
+        [is_method(CREATE_AGREEMENTS), on_create_agreements],
+        [is_method(ADD_INITIAL_SIGNERS), on_add_initial_signers],
+        [is_method(ADD_SIGNER), on_add_signer],
+        [is_method(ADD_METADATA), on_add_metadata],
+        [is_method(DELETE_METADATA), on_delete_metadata],
+        [is_method(MARK_SIGNED), on_mark_signed],
+        [is_method(MARK_SIGNED_BATCH), on_mark_signed_batch],
+        [is_method(EXECUTE_AGREEMENT), on_execute_agreement],
+        [is_method(SET_AUTO_EXECUTE), on_set_auto_execute],
+        [is_method(ARCHIVE_AGREEMENT), on_archive_agreement],
+        [is_method(ADD_VERIFIER), on_add_verifier],
+        [is_method(REMOVE_VERIFIER), on_remove_verifier],
+        [is_method(SET_EXECUTION_ROUTER), on_set_execution_router]
     )
     
     return program
@@ -589,11 +741,14 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("AgreementRegistry", METHODS, "Document hashes, signer lists and execution state of agreements")
+
 if __name__ == "__main__":
     with open("agreement_registry_approval.teal", "w") as f:
-        compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
+        compiled = compileTeal(approval_program(), mode=Mode.Application, version=TEAL_VERSION)
         f.write(compiled)
-        
+    
     with open("agreement_registry_clear_state.teal", "w") as f:
-        compiled = compileTeal(clear_state_program(), mode=Mode.Application, version=6)
-        f.write(compiled)
\ No newline at end of file
+        compiled = compileTeal(clear_state_program(), mode=Mode.Application, version=TEAL_VERSION)
+        f.write(compiled)
@@ -0,0 +1,39 @@
+from algosdk import abi as sdk_abi
+from pyteal import *
+
+"""
+ARC-4 Interface Helpers
+
+Purpose: Shared pieces of the contracts' ARC-4 interface. Every application
+call passes a 4-byte method selector as app_args[0], followed by one
+ABI-encoded argument per method parameter: uint64 as 8 bytes, address and
+byte[N] as their raw bytes, string and byte[] with a 2-byte length prefix.
+"""
+
+
+def is_method(signature):
+    """
+    Whether the current call selects the method with this signature.
+    """
+    return Txn.application_args[0] == MethodSignature(signature)
+
+
+def bytes_arg(index):
+    """
+    Contents of a string or byte[] argument, without its length prefix.
+    """
+    return Suffix(Txn.application_args[index], Int(2))
+
+
+def encode_bytes(value):
+    """
+    ABI encoding of a string or byte[] value, e.g. for inner application calls.
+    """
+    return Concat(Extract(Itob(Len(value)), Int(6), Int(2)), value)
+
+
+def contract_spec(name, signatures, desc=None):
+    """
+    ARC-4 contract description listing the methods a contract dispatches on.
+    """
+    return sdk_abi.Contract(name, [sdk_abi.Method.from_signature(signature) for signature in signatures], desc)
@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
 Action Handler: Asset Transfer Implementation
@@ -7,25 +8,30 @@ Purpose: Handle the transfer of ASA (Algorand Standard Assets) after an agreemen
 This is another example action handler that can be registered with the Execution Router.
 """
 
+# ARC-4 methods
+PROCESS_AGREEMENT = "process_agreement(uint64,byte[])void"
+SET_ROUTER = "set_router(uint64)void"
+REGISTER_ASSET_CONFIG = "register_asset_config(uint64,uint64,uint64,address,address)void"
+
+METHODS = [PROCESS_AGREEMENT, SET_ROUTER, REGISTER_ASSET_CONFIG]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
     router_id = Bytes("router_id")  # ID of the Execution Router app
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    PROCESS_AGREEMENT = Bytes("process_agreement")
-    SET_ROUTER = Bytes("set_router")
-    REGISTER_ASSET_CONFIG = Bytes("register_asset_config")
-    
     # Storage prefixes
     ASSET_ID_PREFIX = Bytes("asset_id_")      # For storing asset ID by agreement ID
     ASSET_AMOUNT_PREFIX = Bytes("amount_")    # For storing asset amount by agreement ID
     ASSET_SENDER_PREFIX = Bytes("sender_")    # For storing asset sender by agreement ID
     ASSET_RECEIVER_PREFIX = Bytes("receiver_")  # For storing asset receiver by agreement ID
     
+    # Scratch space for the agreement being processed
+    asset_id = ScratchVar(TealType.uint64)
+    amount = ScratchVar(TealType.uint64)
+    sender = ScratchVar(TealType.bytes)
+    receiver = ScratchVar(TealType.bytes)
+    
     # Handle initialization
     on_creation = Seq([
         App.globalPut(admin, Txn.sender()),
@@ -42,13 +48,13 @@ def approval_program():
     # Check if caller is admin
     is_admin = Txn.sender() == App.globalGet(admin)
     
-    # Check if caller is the execution router
-    is_router = Txn.sender() == App.globalGet(router_id)
+    # Check if caller is the execution router (through an inner application call)
+    is_router = Global.caller_app_id() == App.globalGet(router_id)
     
     # ===== Action Logic =====
     
     # Set the Execution Router ID (admin only)
-    # Args: app_id (uint)
+    # Args: app_id (uint64)
     on_set_router = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
@@ -62,7 +68,7 @@ def approval_program():
     ])
     
     # Register asset transfer configuration for an agreement (admin only)
-    # Args: agreement_id (uint), asset_id (uint), amount (uint), sender (address), receiver (address)
+    # Args: agreement_id (uint64), asset_id (uint64), amount (uint64), sender (address), receiver (address)
     on_register_asset_config = Seq([
         Assert(Txn.application_args.length() == Int(6)),
         Assert(is_admin),
@@ -96,9 +102,9 @@ def approval_program():
     ])
     
     # Process an executed agreement by transferring assets
-    # Args: agreement_id (uint), [optional: receiver_override (address)]
+    # Args: agreement_id (uint64), params (byte[]: empty, or a 32-byte receiver override)
     on_process_agreement = Seq([
-        Assert(Txn.application_args.length() >= Int(2)),  # At least process_agreement + agreement_id
+        Assert(Txn.application_args.length() == Int(3)),
         
         # Only the Execution Router or admin can call this
         Assert(Or(
@@ -106,30 +112,20 @@ def approval_program():
             is_admin
         )),
         
-        # Get the agreement ID
-        App.localPut(Int(0), Bytes("agreement_id"), Txn.application_args[1]),
-        
         # Check if asset configuration is registered for this agreement
         Assert(App.globalGet(Concat(ASSET_ID_PREFIX, Txn.application_args[1])) != Bytes("")),
         
         # Store asset configuration
-        App.localPut(Int(0), Bytes("asset_id"), 
-                    Btoi(App.globalGet(Concat(ASSET_ID_PREFIX, Txn.application_args[1])))),
-        
-        App.localPut(Int(0), Bytes("amount"), 
-                    Btoi(App.globalGet(Concat(ASSET_AMOUNT_PREFIX, Txn.application_args[1])))),
-        
-        App.localPut(Int(0), Bytes("sender"), 
-                    App.globalGet(Concat(ASSET_SENDER_PREFIX, Txn.application_args[1]))),
+        asset_id.store(Btoi(App.globalGet(Concat(ASSET_ID_PREFIX, Txn.application_args[1])))),
+        amount.store(Btoi(App.globalGet(Concat(ASSET_AMOUNT_PREFIX, Txn.application_args[1])))),
+        sender.store(App.globalGet(Concat(ASSET_SENDER_PREFIX, Txn.application_args[1]))),
         
         # Check if a receiver override is provided
-        App.localPut(
-            Int(0), 
-            Bytes("receiver"),
+        receiver.store(
             If(
-                Txn.application_args.length() > Int(2),
+                Len(bytes_arg(2)) == Int(32),
                 # Use the provided receiver override
-                Txn.application_args[2],
+                bytes_arg(2),
                 # Use the configured receiver
                 App.globalGet(Concat(ASSET_RECEIVER_PREFIX, Txn.application_args[1]))
             )
@@ -141,10 +137,10 @@ def approval_program():
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields({
             TxnField.type_enum: TxnType.AssetTransfer,
-            TxnField.sender: App.localGet(Int(0), Bytes("sender")),
-            TxnField.xfer_asset: App.localGet(Int(0), Bytes("asset_id")),
-            TxnField.asset_receiver: App.localGet(Int(0), Bytes("receiver")),
-            TxnField.asset_amount: App.localGet(Int(0), Bytes("amount")),
+            TxnField.sender: sender.load(),
+            TxnField.xfer_asset: asset_id.load(),
+            TxnField.asset_receiver: receiver.load(),
+            TxnField.asset_amount: amount.load(),
             TxnField.note: Concat(Bytes("Asset transfer for agreement:"), Txn.application_args[1]),
             TxnField.fee: Int(0),  # Fee covered by outer txn
         }),
@@ -152,9 +148,9 @@ def approval_program():
         
         # Log asset transfer
         Log(Concat(Bytes("ASSET_TRANSFERRED:"), Txn.application_args[1])),
-        Log(Concat(Bytes("ASSET_ID:"), Itob(App.localGet(Int(0), Bytes("asset_id"))))),
-        Log(Concat(Bytes("AMOUNT:"), Itob(App.localGet(Int(0), Bytes("amount"))))),
-        Log(Concat(Bytes("RECIPIENT:"), App.localGet(Int(0), Bytes("receiver")))),
+        Log(Concat(Bytes("ASSET_ID:"), Itob(asset_id.load()))),
+        Log(Concat(Bytes("AMOUNT:"), Itob(amount.load()))),
+        Log(Concat(Bytes("RECIPIENT:"), receiver.load())),
         
         Return(Int(1))
     ])
@@ -162,9 +158,9 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == SET_ROUTER, on_set_router],
-        [ACTION == REGISTER_ASSET_CONFIG, on_register_asset_config],
-        [ACTION == PROCESS_AGREEMENT, on_process_agreement]
+        [is_method(SET_ROUTER), on_set_router],
+        [is_method(REGISTER_ASSET_CONFIG), on_register_asset_config],
+        [is_method(PROCESS_AGREEMENT), on_process_agreement]
     )
     
     return program
@@ -172,6 +168,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("AssetTransferHandler", METHODS, "Transfers assets for executed agreements")
+
 if __name__ == "__main__":
     with open("asset_transfer_handler.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
 Closing Agreement Smart Contract with Milestones
@@ -6,6 +7,16 @@ Closing Agreement Smart Contract with Milestones
 Purpose: Handle a closing agreement with defined milestones and signature verification.
 """
 
+# ARC-4 methods
+INITIALIZE = "initialize(address,address,uint64,byte[32])void"
+ADD_MILESTONE = "add_milestone(string,string)void"
+COMPLETE_MILESTONE = "complete_milestone(uint64)void"
+VERIFY_SIGNATURE = "verify_signature(address)void"
+EXECUTE_AGREEMENT = "execute_agreement()void"
+CANCEL_AGREEMENT = "cancel_agreement()void"
+
+METHODS = [INITIALIZE, ADD_MILESTONE, COMPLETE_MILESTONE, VERIFY_SIGNATURE, EXECUTE_AGREEMENT, CANCEL_AGREEMENT]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
@@ -26,23 +37,16 @@ def approval_program():
     milestone_count = Bytes("milestone_count")
     current_milestone = Bytes("current_milestone")
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    INITIALIZE = Bytes("initialize")
-    ADD_MILESTONE = Bytes("add_milestone")
-    COMPLETE_MILESTONE = Bytes("complete_milestone")
-    VERIFY_SIGNATURE = Bytes("verify_signature")
-    EXECUTE_AGREEMENT = Bytes("execute_agreement")
-    CANCEL_AGREEMENT = Bytes("cancel_agreement")
-    
     # Status values
     STATUS_DRAFT = Bytes("DRAFT")
     STATUS_PENDING = Bytes("PENDING")
     STATUS_EXECUTED = Bytes("EXECUTED")
     STATUS_CANCELLED = Bytes("CANCELLED")
     
+    # Scratch space for the milestone being handled
+    milestone_index = ScratchVar(TealType.uint64)
+    milestone_data = ScratchVar(TealType.bytes)
+    
     # Handle initialization
     on_creation = Seq([
         App.globalPut(admin, Txn.sender()),
@@ -124,15 +128,15 @@ def approval_program():
         Assert(is_draft.Or(is_pending)),  # Only add milestones in DRAFT or PENDING
         
         # Get the next milestone index
-        App.localPut(Int(0), Bytes("next_index"), App.globalGet(milestone_count)),
+        milestone_index.store(App.globalGet(milestone_count)),
         
         # Store milestone data
         App.globalPut(
-            Concat(Bytes("milestone_"), Itob(App.localGet(Int(0), Bytes("next_index")))),
+            Concat(Bytes("milestone_"), Itob(milestone_index.load())),
             Concat(
-                Txn.application_args[1],  # Title
+                bytes_arg(1),  # Title
                 Bytes("|"),
-                Txn.application_args[2],  # Description
+                bytes_arg(2),  # Description
                 Bytes("|"),
                 Bytes("0")  # 0 = not completed
             )
@@ -143,8 +147,8 @@ def approval_program():
         
         # Log milestone addition
         Log(Bytes("MILESTONE_ADDED")),
-        Log(Concat(Bytes("INDEX:"), Itob(App.localGet(Int(0), Bytes("next_index"))))),
-        Log(Concat(Bytes("TITLE:"), Txn.application_args[1])),
+        Log(Concat(Bytes("INDEX:"), Itob(milestone_index.load()))),
+        Log(Concat(Bytes("TITLE:"), bytes_arg(1))),
         
         Return(Int(1))
     ])
@@ -157,27 +161,23 @@ def approval_program():
         Assert(is_pending),  # Only complete milestones when PENDING
         
         # Get milestone index
-        App.localPut(Int(0), Bytes("index"), Btoi(Txn.application_args[1])),
+        milestone_index.store(Btoi(Txn.application_args[1])),
         
         # Check if milestone exists
-        Assert(App.localGet(Int(0), Bytes("index")) < App.globalGet(milestone_count)),
+        Assert(milestone_index.load() < App.globalGet(milestone_count)),
         
         # Check if milestone is next in sequence
-        Assert(App.localGet(Int(0), Bytes("index")) == App.globalGet(current_milestone)),
+        Assert(milestone_index.load() == App.globalGet(current_milestone)),
         
         # Get milestone data
-        App.localPut(
-            Int(0), 
-            Bytes("milestone_data"), 
-            App.globalGet(Concat(Bytes("milestone_"), Txn.application_args[1]))
-        ),
+        milestone_data.store(App.globalGet(Concat(Bytes("milestone_"), Txn.application_args[1]))),
         
         # Check last character to ensure milestone is not already completed
         Assert(
             Substring(
-                App.localGet(Int(0), Bytes("milestone_data")),
-                Len(App.localGet(Int(0), Bytes("milestone_data"))) - Int(1),
-                Len(App.localGet(Int(0), Bytes("milestone_data")))
+                milestone_data.load(),
+                Len(milestone_data.load()) - Int(1),
+                Len(milestone_data.load())
             ) == Bytes("0")
         ),
         
@@ -186,9 +186,9 @@ def approval_program():
             Concat(Bytes("milestone_"), Txn.application_args[1]),
             Concat(
                 Substring(
-                    App.localGet(Int(0), Bytes("milestone_data")),
+                    milestone_data.load(),
                     Int(0),
-                    Len(App.localGet(Int(0), Bytes("milestone_data"))) - Int(1)
+                    Len(milestone_data.load()) - Int(1)
                 ),
                 Bytes("1")  # 1 = completed
             )
@@ -302,12 +302,12 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == INITIALIZE, on_initialize],
-        [ACTION == ADD_MILESTONE, on_add_milestone],
-        [ACTION == COMPLETE_MILESTONE, on_complete_milestone],
-        [ACTION == VERIFY_SIGNATURE, on_verify_signature],
-        [ACTION == EXECUTE_AGREEMENT, on_execute_agreement],
-        [ACTION == CANCEL_AGREEMENT, on_cancel_agreement]
+        [is_method(INITIALIZE), on_initialize],
+        [is_method(ADD_MILESTONE), on_add_milestone],
+        [is_method(COMPLETE_MILESTONE), on_complete_milestone],
+        [is_method(VERIFY_SIGNATURE), on_verify_signature],
+        [is_method(EXECUTE_AGREEMENT), on_execute_agreement],
+        [is_method(CANCEL_AGREEMENT), on_cancel_agreement]
     )
     
     return program
@@ -315,6 +315,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("ClosingAgreement", METHODS, "Two-party closing agreement with milestones")
+
 if __name__ == "__main__":
     with open("closing_agreement_approval.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
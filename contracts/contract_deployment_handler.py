@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
 Action Handler: Contract Deployment Implementation
@@ -7,19 +8,18 @@ Purpose: Deploy a new smart contract after an agreement is executed.
 This is a more advanced action handler that can be registered with the Execution Router.
 """
 
+# ARC-4 methods
+PROCESS_AGREEMENT = "process_agreement(uint64,byte[])void"
+SET_ROUTER = "set_router(uint64)void"
+REGISTER_CONTRACT = "register_contract(uint64,byte[],byte[],uint8,uint8,uint8,uint8)void"
+
+METHODS = [PROCESS_AGREEMENT, SET_ROUTER, REGISTER_CONTRACT]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
     router_id = Bytes("router_id")  # ID of the Execution Router app
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    PROCESS_AGREEMENT = Bytes("process_agreement")
-    SET_ROUTER = Bytes("set_router")
-    REGISTER_CONTRACT = Bytes("register_contract")
-    
     # Storage prefixes
     CONTRACT_APPROVAL_PREFIX = Bytes("approval_")  # For storing approval program by agreement ID
     CONTRACT_CLEAR_PREFIX = Bytes("clear_")        # For storing clear program by agreement ID
@@ -42,13 +42,13 @@ def approval_program():
     # Check if caller is admin
     is_admin = Txn.sender() == App.globalGet(admin)
     
-    # Check if caller is the execution router
-    is_router = Txn.sender() == App.globalGet(router_id)
+    # Check if caller is the execution router (through an inner application call)
+    is_router = Global.caller_app_id() == App.globalGet(router_id)
     
     # ===== Action Logic =====
     
     # Set the Execution Router ID (admin only)
-    # Args: app_id (uint)
+    # Args: app_id (uint64)
     on_set_router = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
@@ -62,7 +62,7 @@ def approval_program():
     ])
     
     # Register contract deployment configuration for an agreement (admin only)
-    # Args: agreement_id (uint), approval_program (bytes), clear_program (bytes), 
+    # Args: agreement_id (uint64), approval_program (byte[]), clear_program (byte[]),
     #       global_ints (uint8), global_bytes (uint8), local_ints (uint8), local_bytes (uint8)
     on_register_contract = Seq([
         Assert(Txn.application_args.length() == Int(8)),
@@ -71,12 +71,12 @@ def approval_program():
         # Store the contract configuration for this agreement
         App.globalPut(
             Concat(CONTRACT_APPROVAL_PREFIX, Txn.application_args[1]),  # agreement_id
-            Txn.application_args[2]  # approval_program
+            bytes_arg(2)  # approval_program
         ),
         
         App.globalPut(
             Concat(CONTRACT_CLEAR_PREFIX, Txn.application_args[1]),  # agreement_id
-            Txn.application_args[3]  # clear_program
+            bytes_arg(3)  # clear_program
         ),
         
         # Store schema info as separate values to avoid string parsing
@@ -107,9 +107,9 @@ def approval_program():
     ])
     
     # Process an executed agreement by deploying a smart contract
-    # Args: agreement_id (uint)
+    # Args: agreement_id (uint64), params (byte[], unused)
     on_process_agreement = Seq([
-        Assert(Txn.application_args.length() >= Int(2)),  # At least process_agreement + agreement_id
+        Assert(Txn.application_args.length() == Int(3)),
         
         # Only the Execution Router or admin can call this
         Assert(Or(
@@ -117,43 +117,19 @@ def approval_program():
             is_admin
         )),
         
-        # Get the agreement ID
-        App.localPut(Int(0), Bytes("agreement_id"), Txn.application_args[1]),
-        
         # Check if contract configuration is registered for this agreement
         Assert(App.globalGet(Concat(CONTRACT_APPROVAL_PREFIX, Txn.application_args[1])) != Bytes("")),
         
-        # Store contract configuration
-        App.localPut(Int(0), Bytes("approval_program"), 
-                    App.globalGet(Concat(CONTRACT_APPROVAL_PREFIX, Txn.application_args[1]))),
-        
-        App.localPut(Int(0), Bytes("clear_program"), 
-                    App.globalGet(Concat(CONTRACT_CLEAR_PREFIX, Txn.application_args[1]))),
-        
-        # Get global schema components directly
-        App.localPut(Int(0), Bytes("global_ints"), 
-                    Btoi(App.globalGet(Concat(GLOBAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_ints"))))),
-        
-        App.localPut(Int(0), Bytes("global_bytes"), 
-                    Btoi(App.globalGet(Concat(GLOBAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_bytes"))))),
-        
-        # Get local schema components directly
-        App.localPut(Int(0), Bytes("local_ints"), 
-                    Btoi(App.globalGet(Concat(LOCAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_ints"))))),
-        
-        App.localPut(Int(0), Bytes("local_bytes"), 
-                    Btoi(App.globalGet(Concat(LOCAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_bytes"))))),
-        
-        # Deploy the smart contract
+        # Deploy the smart contract, reading each configuration value once
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields({
             TxnField.type_enum: TxnType.ApplicationCall,
-            TxnField.approval_program: App.localGet(Int(0), Bytes("approval_program")),
-            TxnField.clear_state_program: App.localGet(Int(0), Bytes("clear_program")),
-            TxnField.global_num_uints: App.localGet(Int(0), Bytes("global_ints")),
-            TxnField.global_num_byte_slices: App.localGet(Int(0), Bytes("global_bytes")),
-            TxnField.local_num_uints: App.localGet(Int(0), Bytes("local_ints")),
-            TxnField.local_num_byte_slices: App.localGet(Int(0), Bytes("local_bytes")),
+            TxnField.approval_program: App.globalGet(Concat(CONTRACT_APPROVAL_PREFIX, Txn.application_args[1])),
+            TxnField.clear_state_program: App.globalGet(Concat(CONTRACT_CLEAR_PREFIX, Txn.application_args[1])),
+            TxnField.global_num_uints: Btoi(App.globalGet(Concat(GLOBAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_ints")))),
+            TxnField.global_num_byte_slices: Btoi(App.globalGet(Concat(GLOBAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_bytes")))),
+            TxnField.local_num_uints: Btoi(App.globalGet(Concat(LOCAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_ints")))),
+            TxnField.local_num_byte_slices: Btoi(App.globalGet(Concat(LOCAL_SCHEMA_PREFIX, Txn.application_args[1], Bytes("_bytes")))),
             TxnField.note: Concat(Bytes("Contract deployment for agreement:"), Txn.application_args[1]),
             TxnField.fee: Int(0),  # Fee covered by outer txn
         }),
@@ -169,9 +145,9 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == SET_ROUTER, on_set_router],
-        [ACTION == REGISTER_CONTRACT, on_register_contract],
-        [ACTION == PROCESS_AGREEMENT, on_process_agreement]
+        [is_method(SET_ROUTER), on_set_router],
+        [is_method(REGISTER_CONTRACT), on_register_contract],
+        [is_method(PROCESS_AGREEMENT), on_process_agreement]
     )
     
     return program
@@ -179,6 +155,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("ContractDeploymentHandler", METHODS, "Deploys a registered contract for executed agreements")
+
 if __name__ == "__main__":
     with open("contract_deployment_handler.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
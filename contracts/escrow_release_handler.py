@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
 Action Handler: Escrow Release Implementation
@@ -7,22 +8,25 @@ Purpose: Handle the release of escrowed funds after an agreement is executed.
 This is an example action handler that can be registered with the Execution Router.
 """
 
+# ARC-4 methods
+PROCESS_AGREEMENT = "process_agreement(uint64,byte[])void"
+SET_ROUTER = "set_router(uint64)void"
+REGISTER_ESCROW = "register_escrow(uint64,address)void"
+
+METHODS = [PROCESS_AGREEMENT, SET_ROUTER, REGISTER_ESCROW]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
     router_id = Bytes("router_id")  # ID of the Execution Router app
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    PROCESS_AGREEMENT = Bytes("process_agreement")
-    SET_ROUTER = Bytes("set_router")
-    REGISTER_ESCROW = Bytes("register_escrow")
-    
     # Storage prefixes
     ESCROW_PREFIX = Bytes("escrow_")  # For storing escrow accounts by agreement ID
     
+    # Scratch space for the agreement being processed
+    escrow_address = ScratchVar(TealType.bytes)
+    recipient = ScratchVar(TealType.bytes)
+    
     # Handle initialization
     on_creation = Seq([
         App.globalPut(admin, Txn.sender()),
@@ -39,13 +43,13 @@ def approval_program():
     # Check if caller is admin
     is_admin = Txn.sender() == App.globalGet(admin)
     
-    # Check if caller is the execution router
-    is_router = Txn.sender() == App.globalGet(router_id)
+    # Check if caller is the execution router (through an inner application call)
+    is_router = Global.caller_app_id() == App.globalGet(router_id)
     
     # ===== Action Logic =====
     
     # Set the Execution Router ID (admin only)
-    # Args: app_id (uint)
+    # Args: app_id (uint64)
     on_set_router = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
@@ -59,7 +63,7 @@ def approval_program():
     ])
     
     # Register an escrow account for an agreement (admin only)
-    # Args: agreement_id (uint), escrow_address (address)
+    # Args: agreement_id (uint64), escrow_address (address)
     on_register_escrow = Seq([
         Assert(Txn.application_args.length() == Int(3)),
         Assert(is_admin),
@@ -78,9 +82,9 @@ def approval_program():
     ])
     
     # Process an executed agreement by releasing escrowed funds
-    # Args: agreement_id (uint), [optional: recipient_override (address)]
+    # Args: agreement_id (uint64), params (byte[]: empty, or a 32-byte recipient override)
     on_process_agreement = Seq([
-        Assert(Txn.application_args.length() >= Int(2)),  # At least process_agreement + agreement_id
+        Assert(Txn.application_args.length() == Int(3)),
         
         # Only the Execution Router or admin can call this
         Assert(Or(
@@ -88,23 +92,16 @@ def approval_program():
             is_admin
         )),
         
-        # Get the agreement ID
-        App.localPut(Int(0), Bytes("agreement_id"), Txn.application_args[1]),
-        
         # Check if escrow account is registered for this agreement
-        Assert(App.globalGet(Concat(ESCROW_PREFIX, Txn.application_args[1])) != Bytes("")),
-        
-        # Store escrow address
-        App.localPut(Int(0), Bytes("escrow_address"), App.globalGet(Concat(ESCROW_PREFIX, Txn.application_args[1]))),
+        escrow_address.store(App.globalGet(Concat(ESCROW_PREFIX, Txn.application_args[1]))),
+        Assert(escrow_address.load() != Bytes("")),
         
         # Check if a recipient override is provided
-        App.localPut(
-            Int(0), 
-            Bytes("recipient"),
+        recipient.store(
             If(
-                Txn.application_args.length() > Int(2),
+                Len(bytes_arg(2)) == Int(32),
                 # Use the provided recipient
-                Txn.application_args[2],
+                bytes_arg(2),
                 # Default to transaction sender
                 Txn.sender()
             )
@@ -116,8 +113,8 @@ def approval_program():
         InnerTxnBuilder.Begin(),
         InnerTxnBuilder.SetFields({
             TxnField.type_enum: TxnType.Payment,
-            TxnField.sender: App.localGet(Int(0), Bytes("escrow_address")),
-            TxnField.receiver: App.localGet(Int(0), Bytes("recipient")),
+            TxnField.sender: escrow_address.load(),
+            TxnField.receiver: recipient.load(),
             TxnField.amount: Int(1000000),  # Amount in microAlgos (1 Algo in this example)
             TxnField.note: Concat(Bytes("Escrow release for agreement:"), Txn.application_args[1]),
             TxnField.fee: Int(0),  # Fee covered by outer txn
@@ -127,7 +124,7 @@ def approval_program():
         # Log escrow release
         Log(Concat(Bytes("ESCROW_RELEASED:"), Txn.application_args[1])),
         Log(Concat(Bytes("AMOUNT:"), Itob(Int(1000000)))),
-        Log(Concat(Bytes("RECIPIENT:"), App.localGet(Int(0), Bytes("recipient")))),
+        Log(Concat(Bytes("RECIPIENT:"), recipient.load())),
         
         Return(Int(1))
     ])
@@ -135,9 +132,9 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == SET_ROUTER, on_set_router],
-        [ACTION == REGISTER_ESCROW, on_register_escrow],
-        [ACTION == PROCESS_AGREEMENT, on_process_agreement]
+        [is_method(SET_ROUTER), on_set_router],
+        [is_method(REGISTER_ESCROW), on_register_escrow],
+        [is_method(PROCESS_AGREEMENT), on_process_agreement]
     )
     
     return program
@@ -145,6 +142,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("EscrowReleaseHandler", METHODS, "Releases escrowed funds for executed agreements")
+
 if __name__ == "__main__":
     with open("escrow_release_handler.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
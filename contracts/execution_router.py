@@ -1,32 +1,39 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
-Execution Router Application - Updated with Key Length Fix
+Execution Router Application
 
 Purpose: Handle downstream actions after agreement execution (escrow release, state updates, etc.)
 """
 
+# ARC-4 methods
+EXECUTE_ACTION = "execute_action(uint64,string,byte[])void"
+SET_AGREEMENT_REGISTRY = "set_agreement_registry(uint64)void"
+ADD_EXECUTOR = "add_executor(address)void"
+REMOVE_EXECUTOR = "remove_executor(address)void"
+REGISTER_ACTION_TYPE = "register_action_type(string,uint64)void"
+CHECK_AGREEMENT_EXECUTED = "check_agreement_executed(uint64)void"  # Added to support verification
+
+METHODS = [
+    EXECUTE_ACTION, SET_AGREEMENT_REGISTRY, ADD_EXECUTOR, REMOVE_EXECUTOR,
+    REGISTER_ACTION_TYPE, CHECK_AGREEMENT_EXECUTED
+]
+
+# Handler method the router calls for every executed action
+PROCESS_AGREEMENT = "process_agreement(uint64,byte[])void"
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin who can manage the application
     agreement_registry_id = Bytes("agreement_registry_id")  # ID of the Agreement Registry app
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    EXECUTE_ACTION = Bytes("execute_action")
-    SET_AGREEMENT_REGISTRY = Bytes("set_agreement_registry")
-    ADD_EXECUTOR = Bytes("add_executor")
-    ADD_EXECUTOR_SHORT = Bytes("add_executor_short")  # New action for shorter keys
-    REMOVE_EXECUTOR = Bytes("remove_executor")
-    REGISTER_ACTION_TYPE = Bytes("register_action_type")
-    CHECK_AGREEMENT_EXECUTED = Bytes("check_agreement_executed")  # Added to support verification
-    
     # Action type prefixes
     ACTION_TYPE_PREFIX = Bytes("action_type_")  # For storing action type handlers
     EXECUTOR_PREFIX = Bytes("executor_")  # For tracking authorized executors
-    EX_PREFIX = Bytes("ex_")  # Shorter prefix for executors to stay under 64 bytes
+    
+    # Scratch space for the action being executed
+    action_handler = ScratchVar(TealType.uint64)  # App ID of the registered handler
     
     # Handle initialization
     on_creation = Seq([
@@ -40,22 +47,19 @@ def approval_program():
     
     # ===== Helper Functions =====
     
-    # Check if caller is an authorized executor - check both key formats
-    is_executor = Or(
-        App.globalGet(Concat(EXECUTOR_PREFIX, Substring(Txn.sender(), Int(0), Int(55)))) == Int(1),  # Truncated key
-        App.globalGet(Concat(EX_PREFIX, Txn.sender())) == Int(1)  # Shorter prefix
-    )
+    # Check if caller is an authorized executor (32-byte addresses keep the key well under 64 bytes)
+    is_executor = App.globalGet(Concat(EXECUTOR_PREFIX, Txn.sender())) == Int(1)
     
     # Check if caller is admin
     is_admin = Txn.sender() == App.globalGet(admin)
     
-    # Check if caller is the agreement registry
-    is_agreement_registry = Txn.sender() == App.globalGet(agreement_registry_id)
+    # Check if caller is the agreement registry (through an inner application call)
+    is_agreement_registry = Global.caller_app_id() == App.globalGet(agreement_registry_id)
     
     # ===== Action Logic =====
     
     # Set the Agreement Registry ID (admin only)
-    # Args: app_id (uint)
+    # Args: app_id (uint64)
     on_set_agreement_registry = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
@@ -68,17 +72,13 @@ def approval_program():
         Return(Int(1))
     ])
     
-    # Add an executor (admin only) - modified to handle key length issue
+    # Add an executor (admin only)
     # Args: executor_address (address)
     on_add_executor = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
         
-        # Store using truncated address to fit within 64 byte limit
-        App.globalPut(
-            Concat(EXECUTOR_PREFIX, Substring(Txn.application_args[1], Int(0), Int(55))), 
-            Int(1)
-        ),
+        App.globalPut(Concat(EXECUTOR_PREFIX, Txn.application_args[1]), Int(1)),
         
         # Log executor addition
         Log(Concat(Bytes("EXECUTOR_ADDED:"), Txn.application_args[1])),
@@ -86,39 +86,13 @@ def approval_program():
         Return(Int(1))
     ])
     
-    # Add an executor with short prefix (admin only) - new method
-    # Args: executor_address (address)
-    on_add_executor_short = Seq([
-        Assert(Txn.application_args.length() == Int(2)),
-        Assert(is_admin),
-        
-        # Store using shorter prefix
-        App.globalPut(
-            Concat(EX_PREFIX, Txn.application_args[1]), 
-            Int(1)
-        ),
-        
-        # Log executor addition
-        Log(Concat(Bytes("EXECUTOR_ADDED_SHORT:"), Txn.application_args[1])),
-        
-        Return(Int(1))
-    ])
-    
     # Remove an executor (admin only)
     # Args: executor_address (address)
     on_remove_executor = Seq([
         Assert(Txn.application_args.length() == Int(2)),
         Assert(is_admin),
         
-        # Remove both formats for complete cleanup
-        App.globalPut(
-            Concat(EXECUTOR_PREFIX, Substring(Txn.application_args[1], Int(0), Int(55))), 
-            Int(0)
-        ),
-        App.globalPut(
-            Concat(EX_PREFIX, Txn.application_args[1]), 
-            Int(0)
-        ),
+        App.globalPut(Concat(EXECUTOR_PREFIX, Txn.application_args[1]), Int(0)),
         
         # Log executor removal
         Log(Concat(Bytes("EXECUTOR_REMOVED:"), Txn.application_args[1])),
@@ -127,26 +101,23 @@ def approval_program():
     ])
     
     # Register an action type (admin only)
-    # Args: action_type (string), action_handler (address or app_id)
+    # Args: action_type (string), action_handler (uint64 app ID)
     on_register_action_type = Seq([
         Assert(Txn.application_args.length() == Int(3)),
         Assert(is_admin),
         
-        # Store the action handler for this type
-        App.globalPut(
-            Concat(ACTION_TYPE_PREFIX, Txn.application_args[1]), 
-            Txn.application_args[2]  # Address or app ID of handler contract
-        ),
+        # Store the handler app ID for this type
+        App.globalPut(Concat(ACTION_TYPE_PREFIX, bytes_arg(1)), Btoi(Txn.application_args[2])),
         
         # Log action type registration
-        Log(Concat(Bytes("ACTION_TYPE_REGISTERED:"), Txn.application_args[1])),
+        Log(Concat(Bytes("ACTION_TYPE_REGISTERED:"), bytes_arg(1))),
         Log(Concat(Bytes("HANDLER:"), Txn.application_args[2])),
         
         Return(Int(1))
     ])
     
     # Check if an agreement is executed (used for verification)
-    # Args: agreement_id (uint)
+    # Args: agreement_id (uint64)
     on_check_agreement_executed = Seq([
         Assert(Txn.application_args.length() == Int(2)),  # Action + agreement_id
         
@@ -178,9 +149,9 @@ def approval_program():
     ])
     
     # Execute an action based on agreement execution
-    # Args: agreement_id (uint), action_type (string), [optional additional parameters]
+    # Args: agreement_id (uint64), action_type (string), params (byte[], passed on to the handler)
     on_execute_action = Seq([
-        Assert(Txn.application_args.length() >= Int(3)),  # Action + agreement_id + action_type
+        Assert(Txn.application_args.length() == Int(4)),
         
         # Check caller authorization: must be Agreement Registry, admin, or authorized executor
         Assert(Or(
@@ -189,21 +160,9 @@ def approval_program():
             is_executor
         )),
         
-        # Get agreement ID and action type
-        App.localPut(Int(0), Bytes("agreement_id"), Btoi(Txn.application_args[1])),
-        App.localPut(Int(0), Bytes("action_type"), Txn.application_args[2]),
-        
-        # Check if action type is registered
-        Assert(
-            App.globalGet(Concat(ACTION_TYPE_PREFIX, Txn.application_args[2])) != Bytes("")
-        ),
-        
-        # Get action handler address
-        App.localPut(
-            Int(0), 
-            Bytes("action_handler"), 
-            App.globalGet(Concat(ACTION_TYPE_PREFIX, Txn.application_args[2]))
-        ),
+        # Get the action handler app ID, which must be registered
+        action_handler.store(App.globalGet(Concat(ACTION_TYPE_PREFIX, bytes_arg(2)))),
+        Assert(action_handler.load() != Int(0)),
         
         # Only verify agreement execution if not called by the Agreement Registry itself
         # (since the Agreement Registry only calls this after verifying execution)
@@ -216,7 +175,7 @@ def approval_program():
                     TxnField.type_enum: TxnType.ApplicationCall,
                     TxnField.application_id: App.globalGet(agreement_registry_id),
                     TxnField.application_args: [
-                        Bytes("check_agreement_executed"),
+                        MethodSignature(CHECK_AGREEMENT_EXECUTED),
                         Txn.application_args[1],  # Agreement ID
                     ],
                     TxnField.note: Bytes("Verify agreement execution"),
@@ -228,87 +187,23 @@ def approval_program():
         
         # If we get here, the agreement is verified as executed
         
-        # Handle different parameter counts for the action handler call
-        If(
-            Txn.application_args.length() == Int(3),
-            # Just action + agreement_id + action_type, no additional params
-            Seq([
-                InnerTxnBuilder.Begin(),
-                InnerTxnBuilder.SetFields({
-                    TxnField.type_enum: TxnType.ApplicationCall,
-                    TxnField.application_id: Btoi(App.localGet(Int(0), Bytes("action_handler"))),
-                    TxnField.application_args: [
-                        Bytes("process_agreement"),
-                        Txn.application_args[1],  # Agreement ID
-                    ],
-                    TxnField.note: Concat(Bytes("Execute action for agreement:"), Txn.application_args[1]),
-                    TxnField.fee: Int(0),  # Fee covered by outer txn
-                }),
-                InnerTxnBuilder.Submit()
-            ]),
-            # With additional parameters
-            If(
-                Txn.application_args.length() == Int(4),
-                # With one additional parameter
-                Seq([
-                    InnerTxnBuilder.Begin(),
-                    InnerTxnBuilder.SetFields({
-                        TxnField.type_enum: TxnType.ApplicationCall,
-                        TxnField.application_id: Btoi(App.localGet(Int(0), Bytes("action_handler"))),
-                        TxnField.application_args: [
-                            Bytes("process_agreement"),
-                            Txn.application_args[1],  # Agreement ID
-                            Txn.application_args[3],  # Additional param 1
-                        ],
-                        TxnField.note: Concat(Bytes("Execute action for agreement:"), Txn.application_args[1]),
-                        TxnField.fee: Int(0),  # Fee covered by outer txn
-                    }),
-                    InnerTxnBuilder.Submit()
-                ]),
-                # With two or more additional parameters
-                If(
-                    Txn.application_args.length() == Int(5),
-                    # With two additional parameters
-                    Seq([
-                        InnerTxnBuilder.Begin(),
-                        InnerTxnBuilder.SetFields({
-                            TxnField.type_enum: TxnType.ApplicationCall,
-                            TxnField.application_id: Btoi(App.localGet(Int(0), Bytes("action_handler"))),
-                            TxnField.application_args: [
-                                Bytes("process_agreement"),
-                                Txn.application_args[1],  # Agreement ID
-                                Txn.application_args[3],  # Additional param 1
-                                Txn.application_args[4],  # Additional param 2
-                            ],
-                            TxnField.note: Concat(Bytes("Execute action for agreement:"), Txn.application_args[1]),
-                            TxnField.fee: Int(0),  # Fee covered by outer txn
-                        }),
-                        InnerTxnBuilder.Submit()
-                    ]),
-                    # With three additional parameters (add more conditionals for more params if needed)
-                    Seq([
-                        InnerTxnBuilder.Begin(),
-                        InnerTxnBuilder.SetFields({
-                            TxnField.type_enum: TxnType.ApplicationCall,
-                            TxnField.application_id: Btoi(App.localGet(Int(0), Bytes("action_handler"))),
-                            TxnField.application_args: [
-                                Bytes("process_agreement"),
-                                Txn.application_args[1],  # Agreement ID
-                                Txn.application_args[3],  # Additional param 1
-                                Txn.application_args[4],  # Additional param 2
-                                Txn.application_args[5],  # Additional param 3
-                            ],
-                            TxnField.note: Concat(Bytes("Execute action for agreement:"), Txn.application_args[1]),
-                            TxnField.fee: Int(0),  # Fee covered by outer txn
-                        }),
-                        InnerTxnBuilder.Submit()
-                    ])
-                )
-            )
-        ),
+        # Call the action handler, passing the parameters through unchanged
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields({
+            TxnField.type_enum: TxnType.ApplicationCall,
+            TxnField.application_id: action_handler.load(),
+            TxnField.application_args: [
+                MethodSignature(PROCESS_AGREEMENT),
+                Txn.application_args[1],  # Agreement ID
+                Txn.application_args[3],  # Handler parameters
+            ],
+            TxnField.note: Concat(Bytes("Execute action for agreement:"), Txn.application_args[1]),
+            TxnField.fee: Int(0),  # Fee covered by outer txn
+        }),
+        InnerTxnBuilder.Submit(),
         
         # Log action execution
-        Log(Concat(Bytes("ACTION_EXECUTED:"), Txn.application_args[2])),  # Log action type
+        Log(Concat(Bytes("ACTION_EXECUTED:"), bytes_arg(2))),  # Log action type
         Log(Concat(Bytes("AGREEMENT:"), Txn.application_args[1])),  # Log agreement ID
         
         Return(Int(1))
@@ -317,13 +212,12 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == SET_AGREEMENT_REGISTRY, on_set_agreement_registry],
-        [ACTION == ADD_EXECUTOR, on_add_executor],
-        [ACTION == ADD_EXECUTOR_SHORT, on_add_executor_short],  # New short key method
-        [ACTION == REMOVE_EXECUTOR, on_remove_executor],
-        [ACTION == REGISTER_ACTION_TYPE, on_register_action_type],
-        [ACTION == CHECK_AGREEMENT_EXECUTED, on_check_agreement_executed],
-        [ACTION == EXECUTE_ACTION, on_execute_action]
+        [is_method(SET_AGREEMENT_REGISTRY), on_set_agreement_registry],
+        [is_method(ADD_EXECUTOR), on_add_executor],
+        [is_method(REMOVE_EXECUTOR), on_remove_executor],
+        [is_method(REGISTER_ACTION_TYPE), on_register_action_type],
+        [is_method(CHECK_AGREEMENT_EXECUTED), on_check_agreement_executed],
+        [is_method(EXECUTE_ACTION), on_execute_action]
     )
     
     return program
@@ -331,6 +225,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("ExecutionRouter", METHODS, "Dispatches executed agreements to their action handlers")
+
 if __name__ == "__main__":
     with open("execution_router_approval.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
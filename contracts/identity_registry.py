@@ -1,4 +1,5 @@
 from pyteal import *
+from contracts.arc4 import bytes_arg, contract_spec, is_method
 
 """
 Identity Registry Application
@@ -7,21 +8,20 @@ Purpose: Associate real-world identities (email, DID, orgID) with blockchain wal
 and enable verification by trusted oracles/validators.
 """
 
+# ARC-4 methods
+REGISTER_IDENTITY = "register_identity(string,string)void"
+VERIFY_IDENTITY = "verify_identity(address,string)void"
+ADD_VERIFIER = "add_verifier(address)void"
+REMOVE_VERIFIER = "remove_verifier(address)void"
+REVOKE_IDENTITY = "revoke_identity(address,string,string)void"
+UPDATE_CLAIM = "update_claim(string,string,string)void"
+
+METHODS = [REGISTER_IDENTITY, VERIFY_IDENTITY, ADD_VERIFIER, REMOVE_VERIFIER, REVOKE_IDENTITY, UPDATE_CLAIM]
+
 def approval_program():
     # Global state variables
     admin = Bytes("admin")  # Admin account that can add verifiers
     
-    # Define application arguments indices
-    ACTION = Txn.application_args[0]
-    
-    # Actions
-    REGISTER_IDENTITY = Bytes("register_identity")
-    VERIFY_IDENTITY = Bytes("verify_identity")
-    ADD_VERIFIER = Bytes("add_verifier")
-    REMOVE_VERIFIER = Bytes("remove_verifier")
-    REVOKE_IDENTITY = Bytes("revoke_identity")       # New action to revoke identity claims
-    UPDATE_CLAIM = Bytes("update_claim")             # New action to update identity claims
-    
     # Prefixes for storage
     IDENTITY_PREFIX = Bytes("id_")  # For reverse lookups (claim_type:value → wallet)
     VERIFIER_PREFIX = Bytes("verifier_")  # For verifier management
@@ -58,35 +58,35 @@ def approval_program():
         # Store claim type and value in local state
         App.localPut(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_"), Txn.application_args[2]), 
+            Concat(bytes_arg(1), Bytes("_"), bytes_arg(2)), 
             Int(1)
         ),
         
         # Set verification status to unverified
         App.localPut(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_verified")),
+            Concat(bytes_arg(1), Bytes("_verified")),
             Int(0)
         ),
         
         # Store registration timestamp
         App.localPut(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_registered_at")),
+            Concat(bytes_arg(1), Bytes("_registered_at")),
             Global.latest_timestamp()
         ),
         
         # Store reverse lookup in global state (claim_type:value → wallet)
         # This allows looking up wallets by identity
         App.globalPut(
-            Concat(IDENTITY_PREFIX, Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[2]))),
+            Concat(IDENTITY_PREFIX, Concat(bytes_arg(1), Concat(Bytes(":"), bytes_arg(2)))),
             Txn.sender()
         ),
         
         # Log identity registration
         Log(Concat(Bytes("IDENTITY_REGISTERED:"), Txn.sender())),
-        Log(Concat(Bytes("CLAIM_TYPE:"), Txn.application_args[1])),
-        Log(Concat(Bytes("CLAIM_VALUE:"), Txn.application_args[2])),
+        Log(Concat(Bytes("CLAIM_TYPE:"), bytes_arg(1))),
+        Log(Concat(Bytes("CLAIM_VALUE:"), bytes_arg(2))),
         
         Return(Int(1))
     ])
@@ -100,27 +100,27 @@ def approval_program():
         # Set verification status to verified
         App.localPut(
             Txn.application_args[1],  # Account to verify
-            Concat(Txn.application_args[2], Bytes("_verified")),
+            Concat(bytes_arg(2), Bytes("_verified")),
             Int(1)
         ),
         
         # Store verification timestamp
         App.localPut(
             Txn.application_args[1],  # Account to verify
-            Concat(Txn.application_args[2], Bytes("_verified_at")),
+            Concat(bytes_arg(2), Bytes("_verified_at")),
             Global.latest_timestamp()
         ),
         
         # Store verifier information
         App.localPut(
             Txn.application_args[1],  # Account to verify
-            Concat(Txn.application_args[2], Bytes("_verified_by")),
+            Concat(bytes_arg(2), Bytes("_verified_by")),
             Txn.sender()
         ),
         
         # Log verification
         Log(Concat(Bytes("IDENTITY_VERIFIED:"), Txn.application_args[1])),
-        Log(Concat(Bytes("CLAIM_TYPE:"), Txn.application_args[2])),
+        Log(Concat(Bytes("CLAIM_TYPE:"), bytes_arg(2))),
         Log(Concat(Bytes("VERIFIER:"), Txn.sender())),
         
         Return(Int(1))
@@ -135,46 +135,46 @@ def approval_program():
         Assert(
             App.localGet(
                 Int(0),  # Current account
-                Concat(Txn.application_args[1], Bytes("_"), Txn.application_args[2])
+                Concat(bytes_arg(1), Bytes("_"), bytes_arg(2))
             ) == Int(1)
         ),
         
         # Remove the old claim
         App.localDel(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_"), Txn.application_args[2])
+            Concat(bytes_arg(1), Bytes("_"), bytes_arg(2))
         ),
         
         # Remove the old reverse lookup
         App.globalDel(
-            Concat(IDENTITY_PREFIX, Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[2])))
+            Concat(IDENTITY_PREFIX, Concat(bytes_arg(1), Concat(Bytes(":"), bytes_arg(2))))
         ),
         
         # Add the new claim
         App.localPut(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_"), Txn.application_args[3]), 
+            Concat(bytes_arg(1), Bytes("_"), bytes_arg(3)), 
             Int(1)
         ),
         
         # Reset verification status
         App.localPut(
             Int(0),  # Current account
-            Concat(Txn.application_args[1], Bytes("_verified")),
+            Concat(bytes_arg(1), Bytes("_verified")),
             Int(0)
         ),
         
         # Add the new reverse lookup
         App.globalPut(
-            Concat(IDENTITY_PREFIX, Concat(Txn.application_args[1], Concat(Bytes(":"), Txn.application_args[3]))),
+            Concat(IDENTITY_PREFIX, Concat(bytes_arg(1), Concat(Bytes(":"), bytes_arg(3)))),
             Txn.sender()
         ),
         
         # Log the update
         Log(Concat(Bytes("IDENTITY_UPDATED:"), Txn.sender())),
-        Log(Concat(Bytes("CLAIM_TYPE:"), Txn.application_args[1])),
-        Log(Concat(Bytes("OLD_VALUE:"), Txn.application_args[2])),
-        Log(Concat(Bytes("NEW_VALUE:"), Txn.application_args[3])),
+        Log(Concat(Bytes("CLAIM_TYPE:"), bytes_arg(1))),
+        Log(Concat(Bytes("OLD_VALUE:"), bytes_arg(2))),
+        Log(Concat(Bytes("NEW_VALUE:"), bytes_arg(3))),
         
         Return(Int(1))
     ])
@@ -196,23 +196,23 @@ def approval_program():
         # Remove the claim
         App.localDel(
             Txn.application_args[1],  # Target account
-            Concat(Txn.application_args[2], Bytes("_"), Txn.application_args[3])
+            Concat(bytes_arg(2), Bytes("_"), bytes_arg(3))
         ),
         
         # Remove verification status
         App.localDel(
             Txn.application_args[1],  # Target account
-            Concat(Txn.application_args[2], Bytes("_verified"))
+            Concat(bytes_arg(2), Bytes("_verified"))
         ),
         
         # Remove the reverse lookup
         App.globalDel(
-            Concat(IDENTITY_PREFIX, Concat(Txn.application_args[2], Concat(Bytes(":"), Txn.application_args[3])))
+            Concat(IDENTITY_PREFIX, Concat(bytes_arg(2), Concat(Bytes(":"), bytes_arg(3))))
         ),
         
         # Log revocation
         Log(Concat(Bytes("IDENTITY_REVOKED:"), Txn.application_args[1])),
-        Log(Concat(Bytes("CLAIM_TYPE:"), Txn.application_args[2])),
+        Log(Concat(Bytes("CLAIM_TYPE:"), bytes_arg(2))),
         Log(Concat(Bytes("REVOKED_BY:"), Txn.sender())),
         
         Return(Int(1))
@@ -251,12 +251,12 @@ def approval_program():
     # Main router logic
     program = Cond(
         [Txn.application_id() == Int(0), on_creation],
-        [ACTION == REGISTER_IDENTITY, on_register_identity],
-        [ACTION == VERIFY_IDENTITY, on_verify_identity],
-        [ACTION == UPDATE_CLAIM, on_update_claim],
-        [ACTION == REVOKE_IDENTITY, on_revoke_identity],
-        [ACTION == ADD_VERIFIER, on_add_verifier],
-        [ACTION == REMOVE_VERIFIER, on_remove_verifier]
+        [is_method(REGISTER_IDENTITY), on_register_identity],
+        [is_method(VERIFY_IDENTITY), on_verify_identity],
+        [is_method(UPDATE_CLAIM), on_update_claim],
+        [is_method(REVOKE_IDENTITY), on_revoke_identity],
+        [is_method(ADD_VERIFIER), on_add_verifier],
+        [is_method(REMOVE_VERIFIER), on_remove_verifier]
     )
     
     return program
@@ -264,6 +264,9 @@ def approval_program():
 def clear_state_program():
     return Return(Int(1))
 
+def app_spec():
+    return contract_spec("IdentityRegistry", METHODS, "Identity claims of wallets and their verification")
+
 if __name__ == "__main__":
     with open("identity_registry_approval.teal", "w") as f:
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=6)
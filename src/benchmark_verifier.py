@@ -0,0 +1,146 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import time
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from docusign_simulator import DocuSignSimulator, abandoning, parallel_signing, sequential_signing
+from docusign_verifier import DocuSignVerifier
+
+"""
+Verifier Load Benchmark
+
+Purpose: Drive DocuSignVerifier through the local DocuSign simulator with a
+large number of envelopes and report polling and chain-submission throughput.
+Chain writes go to an in-process Algorand node stand-in that confirms every
+transaction in the next round, so the numbers measure the verifier itself.
+"""
+
+
+class BenchmarkAlgodClient:
+    """
+    Minimal algod stand-in: accepts every group and confirms it in the next round.
+    """
+    
+    def __init__(self, round_time=0.0):
+        self.round = 1
+        self.round_time = round_time
+        self.transactions = 0
+    
+    def suggested_params(self):
+        return transaction.SuggestedParams(
+            1000, self.round, self.round + 1000,
+            "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True
+        )
+    
+    def send_transactions(self, signed_group):
+        self.transactions += len(signed_group)
+        return signed_group[0].get_txid()
+    
+    def status(self):
+        return {'last-round': self.round}
+    
+    def status_after_block(self, block):
+        time.sleep(self.round_time)
+        self.round = block + 1
+        return self.status()
+    
+    def pending_transaction_info(self, txid):
+        return {'confirmed-round': self.round}
+    
+    def application_info(self, app_id):
+        return {'params': {'global-state': []}}
+    
+    def application_box_by_name(self, app_id, box_name):
+        raise AlgodHTTPError("box not found", 404)  # Nothing is recorded on-chain
+
+
+def run_benchmark(envelopes=1000, signers=2, signing_model=None, latency=0.05, error_rate=0.0,
+                  throttle_rate=0.0, poll_interval=1.0, timeout=600.0, round_time=0.0):
+    """
+    Track `envelopes` simulated envelopes and run the verifier until all are executed.
+    
+    Returns:
+        dict: Benchmark results
+    """
+    simulator = DocuSignSimulator(signing_model=signing_model or sequential_signing(5.0), latency=latency,
+                                  error_rate=error_rate, throttle_rate=throttle_rate, seed=1)
+    base_url = simulator.start()
+    
+    os.environ.setdefault("VERIFIER_PRIVATE_KEY", account.generate_account()[0])
+    os.environ["DOCUSIGN_BASE_URL"] = base_url
+    os.environ.setdefault("DOCUSIGN_AUTH_TOKEN", "simulated")
+    os.environ.setdefault("VERIFIER_RETRY_STORE", ":memory:")  # Nothing to resume between runs
+    
+    algod_client = BenchmarkAlgodClient(round_time)
+    verifier = DocuSignVerifier(algod_client, 1, 2)
+    verifier.scheduler.min_interval = poll_interval
+    
+    # Envelopes are created directly in the simulator; the benchmark measures monitoring
+    for agreement_id in range(envelopes):
+        emails = [f"signer{i}-{agreement_id}@example.com" for i in range(signers)]
+        wallets = [account.generate_account()[1] for _ in emails]
+        envelope_id = simulator.create_envelope({'recipients': {'signers': [{'email': e} for e in emails]}})
+        verifier.track_agreement(agreement_id, "DocuSign", envelope_id, wallets, emails, b"\x00" * 32)
+        verifier.scheduler.add(agreement_id, delay=0)
+    
+    tick_times = []
+    start = time.time()
+    try:
+        while verifier.tracked_agreements and time.time() - start < timeout:
+            tick_start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                wait = verifier.run_monitor_tick()
+            tick_times.append(time.perf_counter() - tick_start)
+            if verifier.tracked_agreements:
+                time.sleep(min(wait, poll_interval))
+    finally:
+        simulator.stop()
+    
+    elapsed = time.time() - start
+    executed = envelopes - len(verifier.tracked_agreements)
+    tick_times.sort()
+    return {
+        'envelopes': envelopes,
+        'executed': executed,
+        'elapsed_seconds': elapsed,
+        'executions_per_second': executed / elapsed if elapsed else 0.0,
+        'provider_requests': sum(simulator.request_counts.values()),
+        'chain_transactions': algod_client.transactions,
+        'ticks': len(tick_times),
+        'tick_p50_seconds': statistics.median(tick_times) if tick_times else 0.0,
+        'tick_p95_seconds': tick_times[int(len(tick_times) * 0.95)] if tick_times else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the verifier against the DocuSign simulator")
+    parser.add_argument("--envelopes", type=int, default=1000)
+    parser.add_argument("--signers", type=int, default=2)
+    parser.add_argument("--model", choices=["sequential", "parallel"], default="sequential")
+    parser.add_argument("--mean-delay", type=float, default=5.0, help="Mean seconds per signature")
+    parser.add_argument("--abandon-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated API latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    
+    model = (sequential_signing if args.model == "sequential" else parallel_signing)(args.mean_delay)
+    if args.abandon_rate:
+        model = abandoning(model, args.abandon_rate)
+    
+    results = run_benchmark(
+        envelopes=args.envelopes, signers=args.signers, signing_model=model, latency=args.latency,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        poll_interval=args.poll_interval, timeout=args.timeout
+    )
+    for name, value in results.items():
+        print(f"{name:>24}: {value:.3f}" if isinstance(value, float) else f"{name:>24}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import base64
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from document_client_sdk import CREATE_AGREEMENTS, TRACKING_NOTE_PREFIX, decode_signer
+
+"""
+Chain Log Bootstrap
+
+Purpose: Rebuild the set of open agreements and their per-signer status from
+the Agreement Registry's logs (AGREEMENT_CREATED, AGREEMENTS_CREATED,
+SIGNER_ADDED, SIGNATURE, SIGNED, EXECUTED) via the Algorand Indexer, so a
+restarted verifier can resume tracking without any local state. Round ranges
+are fetched in parallel and folded in order; the result is checkpointed so the
+next start only scans the rounds confirmed since.
+"""
+
+
+def _b64(value):
+    return base64.b64decode(value or "")
+
+
+class AgreementLogScanner:
+    """
+    Scans Agreement Registry transactions and folds their logs into open-agreement state.
+    """
+    
+    def __init__(self, indexer_client, agreement_app_id, checkpoint_path=None, start_round=0,
+                 workers=4, range_size=50000, page_size=1000):
+        """
+        Initialize the scanner.
+        
+        Args:
+            indexer_client: An initialized algosdk IndexerClient
+            agreement_app_id: The application ID for the Agreement Registry
+            checkpoint_path: JSON file holding the last scanned round and open agreements
+            start_round: First round to scan without a checkpoint (e.g. the app's creation round)
+            workers: Round ranges fetched in parallel
+            range_size: Rounds per range
+            page_size: Transactions per indexer page
+        """
+        self.indexer_client = indexer_client
+        self.agreement_app_id = agreement_app_id
+        self.checkpoint_path = checkpoint_path
+        self.start_round = start_round
+        self.workers = workers
+        self.range_size = range_size
+        self.page_size = page_size
+    
+    def scan(self, to_round=None):
+        """
+        Bring the open-agreement state up to `to_round` (the indexer's latest round by default).
+        
+        Returns:
+            dict: {'round': last scanned round,
+                   'agreements': agreement_id -> {'provider', 'document_hash', 'signers'
+                   (wallet -> signed), 'envelope_id', 'signer_emails' (wallet -> email), 'created_round'}}
+        """
+        state = self.load_checkpoint()
+        if to_round is None:
+            to_round = self.indexer_client.health()['round']
+        
+        first = state['round'] + 1
+        ranges = [
+            (low, min(low + self.range_size - 1, to_round))
+            for low in range(first, to_round + 1, self.range_size)
+        ]
+        
+        # Fetch ranges concurrently but apply them in round order
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for transactions in executor.map(lambda bounds: self._fetch_range(*bounds), ranges):
+                for txn in transactions:
+                    apply_transaction(state['agreements'], txn)
+        
+        state['round'] = max(state['round'], to_round)
+        self.save_checkpoint(state)
+        return state
+    
+    def _fetch_range(self, min_round, max_round):
+        """
+        Every Agreement Registry transaction confirmed in [min_round, max_round], in order.
+        """
+        transactions = []
+        next_page = None
+        while True:
+            response = self.indexer_client.search_transactions(
+                application_id=self.agreement_app_id, min_round=min_round, max_round=max_round,
+                limit=self.page_size, next_page=next_page
+            )
+            page = response.get('transactions', [])
+            transactions.extend(page)
+            next_page = response.get('next-token')
+            if not page or not next_page:
+                break
+        
+        transactions.sort(key=lambda txn: (txn.get('confirmed-round', 0), txn.get('intra-round-offset', 0)))
+        return transactions
+    
+    # ===== Checkpoint =====
+    
+    def load_checkpoint(self):
+        """
+        Load the checkpointed state, or an empty state ending before `start_round`.
+        """
+        state = {'round': self.start_round - 1, 'agreements': {}}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return state
+        
+        with open(self.checkpoint_path) as f:
+            saved = json.load(f)
+        state['round'] = saved['round']
+        for agreement_id, record in saved['agreements'].items():
+            record['document_hash'] = bytes.fromhex(record['document_hash'])
+            state['agreements'][int(agreement_id)] = record
+        return state
+    
+    def save_checkpoint(self, state):
+        if not self.checkpoint_path:
+            return
+        
+        agreements = {
+            str(agreement_id): dict(record, document_hash=record['document_hash'].hex())
+            for agreement_id, record in state['agreements'].items()
+        }
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({'round': state['round'], 'agreements': agreements}, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def apply_transaction(agreements, txn):
+    """
+    Fold the Agreement Registry logs of one indexer transaction into `agreements`.
+    
+    Executed agreements are removed; the returned state only holds open ones.
+    """
+    def record(agreement_id):
+        return agreements.setdefault(agreement_id, {
+            'provider': None, 'document_hash': b"", 'signers': {},
+            'envelope_id': None, 'signer_emails': {}, 'created_round': txn.get('confirmed-round')
+        })
+    
+    args = [_b64(arg) for arg in txn.get('application-transaction', {}).get('application-args', [])]
+    
+    for log in (_b64(entry) for entry in txn.get('logs', [])):
+        if log.startswith(b"SIGNER_ADDED:"):
+            body = log[len(b"SIGNER_ADDED:"):]
+            record(int.from_bytes(body[:8], 'big'))['signers'].setdefault(decode_signer(body[8:]), False)
+        
+        elif log.startswith(b"SIGNATURE:"):
+            body = log[len(b"SIGNATURE:"):]
+            agreement_id = int.from_bytes(body[:8], 'big')
+            if agreement_id in agreements:
+                agreements[agreement_id]['signers'][decode_signer(body[9:])] = True
+        
+        elif log.startswith(b"SIGNED:"):
+            # mark_signed_batch: agreement_id (8) | signer (32)
+            body = log[len(b"SIGNED:"):]
+            agreement_id = int.from_bytes(body[:8], 'big')
+            if agreement_id in agreements:
+                agreements[agreement_id]['signers'][decode_signer(body[8:])] = True
+        
+        elif log.startswith(b"AGREEMENT_CREATED:"):
+            created = record(int.from_bytes(log[len(b"AGREEMENT_CREATED:"):], 'big'))
+            if len(args) >= 3:
+                created['document_hash'] = args[1]
+                created['provider'] = args[2].rstrip(b"\0").decode('utf-8', 'replace')
+            
+            # Verifiers note the provider envelope and each signer wallet's email at creation
+            note = _b64(txn.get('note'))
+            if note.startswith(TRACKING_NOTE_PREFIX):
+                try:
+                    tracking = json.loads(note[len(TRACKING_NOTE_PREFIX):])
+                    created['envelope_id'] = tracking.get('envelope_id')
+                    created['signer_emails'] = tracking.get('signers', {})
+                except ValueError:
+                    pass
+        
+        elif log.startswith(b"AGREEMENTS_CREATED:"):
+            # create_agreements: the agreements come from the call's argument, without tracking data
+            first_id, count = struct.unpack(">QQ", log[len(b"AGREEMENTS_CREATED:"):])
+            entries = CREATE_AGREEMENTS.args[0].type.decode(args[1])
+            for agreement_id, (document_hash, provider, signers) in zip(range(first_id, first_id + count), entries):
+                created = record(agreement_id)
+                created['document_hash'] = bytes(document_hash)
+                created['provider'] = bytes(provider).rstrip(b"\0").decode('utf-8', 'replace')
+                for signer in signers:
+                    created['signers'].setdefault(signer, False)
+        
+        elif log.startswith(b"EXECUTED:"):
+            agreements.pop(int.from_bytes(log[len(b"EXECUTED:"):], 'big'), None)
+    
+    return agreements
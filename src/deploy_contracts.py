@@ -1,7 +1,8 @@
 import base64
 import os
 import sys
-from algosdk import account, mnemonic, transaction
+from algosdk import abi, account, mnemonic, transaction
+from algosdk.logic import get_application_address
 from algosdk.v2client import algod
 from pyteal import compileTeal, Mode
 
@@ -15,6 +16,7 @@ from contracts.identity_registry import approval_program as identity_approval
 from contracts.identity_registry import clear_state_program as identity_clear_state
 from contracts.agreement_registry import approval_program as agreement_approval
 from contracts.agreement_registry import clear_state_program as agreement_clear_state
+from contracts.agreement_registry import TEAL_VERSION as AGREEMENT_TEAL_VERSION
 from contracts.execution_router import approval_program as router_approval
 from contracts.execution_router import clear_state_program as router_clear_state
 from contracts.escrow_release_handler import approval_program as escrow_approval
@@ -23,6 +25,10 @@ from contracts.asset_transfer_handler import approval_program as asset_approval
 from contracts.asset_transfer_handler import clear_state_program as asset_clear_state
 from contracts.contract_deployment_handler import approval_program as deploy_approval
 from contracts.contract_deployment_handler import clear_state_program as deploy_clear_state
+from contracts.agreement_registry import SET_EXECUTION_ROUTER
+from contracts.execution_router import ADD_EXECUTOR, REGISTER_ACTION_TYPE, SET_AGREEMENT_REGISTRY
+from contracts.escrow_release_handler import SET_ROUTER
+from document_client_sdk import method_args
 
 def deploy_contracts(creator_private_key):
     """
@@ -59,7 +65,8 @@ def deploy_contracts(creator_private_key):
         local_schema=transaction.StateSchema(num_uints=8, num_byte_slices=8)
     )
     
-    # 2. Deploy Agreement Registry - With reduced global schema to fit within Algorand limits
+    # 2. Deploy Agreement Registry - Agreements live in boxes; global state only
+    # holds the admin, agreement counter, router ID and verifier flags
     print("\n--- Deploying Agreement Registry ---")
     app_ids["agreement"] = _deploy_app(
         client, 
@@ -67,11 +74,16 @@ def deploy_contracts(creator_private_key):
         agreement_approval(), 
         agreement_clear_state(),
         "Agreement Registry",
-        global_schema=transaction.StateSchema(num_uints=16, num_byte_slices=48),  # Reduced from 32/64 to 16/48
-        local_schema=transaction.StateSchema(num_uints=8, num_byte_slices=8),
-        extra_pages=1  # Keep extra page for the large contract
+        global_schema=transaction.StateSchema(num_uints=32, num_byte_slices=1),
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0),
+        version=AGREEMENT_TEAL_VERSION
     )
     
+    # Fund the registry account: every agreement's boxes raise its minimum balance
+    funding = int(os.environ.get("AGREEMENT_REGISTRY_FUNDING", 1000000))
+    print(f"Funding Agreement Registry box storage with {funding} microAlgos...")
+    _fund_app(client, creator_private_key, app_ids["agreement"], funding)
+    
     # 3. Deploy Execution Router
     print("\n--- Deploying Execution Router ---")
     app_ids["router"] = _deploy_app(
@@ -81,7 +93,7 @@ def deploy_contracts(creator_private_key):
         router_clear_state(),
         "Execution Router",
         global_schema=transaction.StateSchema(num_uints=16, num_byte_slices=32),
-        local_schema=transaction.StateSchema(num_uints=8, num_byte_slices=8)
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     # 4. Deploy Escrow Release Handler
@@ -93,7 +105,7 @@ def deploy_contracts(creator_private_key):
         escrow_clear_state(),
         "Escrow Release Handler",
         global_schema=transaction.StateSchema(num_uints=8, num_byte_slices=16),
-        local_schema=transaction.StateSchema(num_uints=4, num_byte_slices=4)
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     # 5. Deploy Asset Transfer Handler
@@ -105,7 +117,7 @@ def deploy_contracts(creator_private_key):
         asset_clear_state(),
         "Asset Transfer Handler",
         global_schema=transaction.StateSchema(num_uints=16, num_byte_slices=32),
-        local_schema=transaction.StateSchema(num_uints=8, num_byte_slices=8)
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     # 6. Deploy Contract Deployment Handler
@@ -117,7 +129,7 @@ def deploy_contracts(creator_private_key):
         deploy_clear_state(),
         "Contract Deployment Handler",
         global_schema=transaction.StateSchema(num_uints=16, num_byte_slices=32),
-        local_schema=transaction.StateSchema(num_uints=8, num_byte_slices=8)
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     # Configure the contracts
@@ -129,7 +141,7 @@ def deploy_contracts(creator_private_key):
         client,
         creator_private_key,
         app_ids["agreement"],
-        [b"set_execution_router", app_ids["router"].to_bytes(8, "big")]
+        _method_args(SET_EXECUTION_ROUTER, app_ids["router"])
     )
     
     # 8. Connect Execution Router to Agreement Registry
@@ -138,7 +150,7 @@ def deploy_contracts(creator_private_key):
         client,
         creator_private_key,
         app_ids["router"],
-        [b"set_agreement_registry", app_ids["agreement"].to_bytes(8, "big")]
+        _method_args(SET_AGREEMENT_REGISTRY, app_ids["agreement"])
     )
     
     # 9. Add creator as executor to Execution Router
@@ -147,7 +159,7 @@ def deploy_contracts(creator_private_key):
         client,
         creator_private_key,
         app_ids["router"],
-        [b"add_executor", account.address_from_private_key(creator_private_key).encode()]
+        _method_args(ADD_EXECUTOR, account.address_from_private_key(creator_private_key))
     )
     
     # 10. Set up handlers to know about the router
@@ -157,21 +169,21 @@ def deploy_contracts(creator_private_key):
         client,
         creator_private_key,
         app_ids["escrow"],
-        [b"set_router", app_ids["router"].to_bytes(8, "big")]
+        _method_args(SET_ROUTER, app_ids["router"])
     )
     
     _call_app(
         client,
         creator_private_key,
         app_ids["asset"],
-        [b"set_router", app_ids["router"].to_bytes(8, "big")]
+        _method_args(SET_ROUTER, app_ids["router"])
     )
     
     _call_app(
         client,
         creator_private_key,
         app_ids["deploy"],
-        [b"set_router", app_ids["router"].to_bytes(8, "big")]
+        _method_args(SET_ROUTER, app_ids["router"])
     )
     
     # 11. Register action types with Execution Router
@@ -181,21 +193,21 @@ def deploy_contracts(creator_private_key):
         client,
         creator_private_key,
         app_ids["router"],
-        [b"register_action_type", b"escrow_release", app_ids["escrow"].to_bytes(8, "big")]
+        _method_args(REGISTER_ACTION_TYPE, "escrow_release", app_ids["escrow"])
     )
     
     _call_app(
         client,
         creator_private_key,
         app_ids["router"],
-        [b"register_action_type", b"asset_transfer", app_ids["asset"].to_bytes(8, "big")]
+        _method_args(REGISTER_ACTION_TYPE, "asset_transfer", app_ids["asset"])
     )
     
     _call_app(
         client,
         creator_private_key,
         app_ids["router"],
-        [b"register_action_type", b"deploy_contract", app_ids["deploy"].to_bytes(8, "big")]
+        _method_args(REGISTER_ACTION_TYPE, "deploy_contract", app_ids["deploy"])
     )
     
     print("\nAll contracts deployed and configured successfully!")
@@ -203,13 +215,13 @@ def deploy_contracts(creator_private_key):
     return app_ids
 
 def _deploy_app(client, creator_private_key, approval_program_func, clear_program_func, 
-               app_name, global_schema, local_schema, extra_pages=0):
+               app_name, global_schema, local_schema, extra_pages=0, version=6):
     """
     Deploy a single application with automatic extra page detection.
     """
     # Compile TEAL programs
-    approval_teal = compileTeal(approval_program_func, mode=Mode.Application, version=6)
-    clear_state_teal = compileTeal(clear_program_func, mode=Mode.Application, version=6)
+    approval_teal = compileTeal(approval_program_func, mode=Mode.Application, version=version)
+    clear_state_teal = compileTeal(clear_program_func, mode=Mode.Application, version=version)
     
     # Compile TEAL to bytecode
     approval_bytecode = _compile_program(client, approval_teal)
@@ -281,6 +293,12 @@ def _create_app(client, creator_private_key, approval_program, clear_program,
     # Return the app ID
     return transaction_response['application-index']
 
+def _method_args(signature, *args):
+    """
+    App args calling the ARC-4 method with this signature.
+    """
+    return method_args(abi.Method.from_signature(signature), *args)
+
 def _call_app(client, private_key, app_id, app_args, accounts=None, foreign_apps=None, foreign_assets=None):
     """Call an application."""
     # Get suggested parameters
@@ -308,6 +326,18 @@ def _call_app(client, private_key, app_id, app_args, accounts=None, foreign_apps
     
     return result
 
+def _fund_app(client, private_key, app_id, amount):
+    """Pay `amount` microAlgos to an application's account."""
+    txn = transaction.PaymentTxn(
+        sender=account.address_from_private_key(private_key),
+        sp=client.suggested_params(),
+        receiver=get_application_address(app_id),
+        amt=amount
+    )
+    
+    tx_id = client.send_transaction(txn.sign(private_key))
+    return _wait_for_confirmation(client, tx_id)
+
 def _wait_for_confirmation(client, tx_id):
     """Wait for a transaction to be confirmed."""
     last_round = client.status().get('last-round')
@@ -1,9 +1,198 @@
-from algosdk import account, mnemonic
+from algosdk import abi, account, constants, mnemonic
 from algosdk.v2client import algod
 from algosdk.future import transaction
 from algosdk.encoding import encode_address, decode_address
+from algosdk.error import AlgodHTTPError
+from collections import namedtuple
 import base64
+import copy
 import hashlib
+import struct
+import threading
+
+# Maximum number of transactions Algorand accepts in one atomic group
+MAX_GROUP_SIZE = 16
+
+# Maximum number of accounts, apps, assets and boxes one application call references
+MAX_CALL_REFS = 8
+
+# Prefix of create_agreement notes that carry off-chain tracking data
+TRACKING_NOTE_PREFIX = b"docexec:"
+
+# Agreement Registry signer box entries: signer (32) | signed flag | signed_at
+SIGNER_SIZE = 32
+SIGNER_ENTRY_SIZE = SIGNER_SIZE + 1 + 8
+
+# Signers per agreement: the opcode budget of a call covers inserting 13 signers in create_agreement
+# and 14 more in each add_initial_signers call
+MAX_SIGNERS = 4096 // SIGNER_ENTRY_SIZE
+CREATE_SIGNERS = 13
+ADD_SIGNERS = 14
+
+# Box references per call: 1KB of box I/O each, enough for a full signer box
+BOX_IO_REFS = 5
+
+# Agreements per create_agreements call: each new agreement has three boxes to reference,
+# and the signer cap keeps a call within its opcode budget
+CREATE_BATCH_AGREEMENTS = MAX_CALL_REFS // 3
+CREATE_BATCH_SIGNERS = 16
+
+# Signatures per mark_signed_batch call, as capped by the registry's log budget
+MARK_BATCH_SIGNATURES = 20
+
+# Opcode budget of one application call, and what mark_signed_batch spends of it: dispatch and
+# argument checks once per call, writes and logs per pair, one bisection step of the signer box
+# per bit of the signer count, and the all-signed check and execution of auto-execute agreements
+APP_CALL_BUDGET = 700
+MARK_CALL_OPS = 60
+MARK_PAIR_OPS = 100
+MARK_BISECT_OPS = 36
+AUTO_EXECUTE_CHECK_OPS = 20
+AUTO_EXECUTE_OPS = 110
+
+# Inner transactions of an execution, all paid by the outer call's fee: the registry's Execution
+# Router call, the router's call to the action handler and the handler's own transaction
+EXECUTION_INNER_TXNS = 3
+
+# Metadata boxes one archive_agreement call can delete, next to the record, signer and bitmap boxes,
+# and one delete_metadata call next to the record
+ARCHIVE_META_KEYS = MAX_CALL_REFS - 3
+DELETE_META_KEYS = MAX_CALL_REFS - 1
+
+# Metadata keys the archival sweeper looks for by default; the record's meta_count tells it
+# whether an agreement has others
+KNOWN_META_KEYS = ("action_type",)
+
+# Fixed-width agreement record: document_hash | provider (zero-padded) | created_at | executed_at
+# | flags | signer_count | creator | executed_by | meta_count
+AGREEMENT_RECORD = struct.Struct(">32s16sQQQQ32s32sQ")
+PROVIDER_SIZE = 16
+AGREEMENT_FLAG_EXECUTED = 1
+AGREEMENT_FLAG_AUTO_EXECUTE = 2
+
+AgreementRecord = namedtuple('AgreementRecord', [
+    'document_hash', 'provider', 'created_at', 'executed_at', 'flags', 'signer_count', 'creator', 'executed_by',
+    'meta_count'
+])
+
+# Minimum balance boxes lock up
+BOX_FLAT_MIN_BALANCE = 2500
+BOX_BYTE_MIN_BALANCE = 400
+
+# ARC-4 methods of the Identity Registry and Agreement Registry
+REGISTER_IDENTITY = abi.Method.from_signature("register_identity(string,string)void")
+VERIFY_IDENTITY = abi.Method.from_signature("verify_identity(address,string)void")
+ADD_VERIFIER = abi.Method.from_signature("add_verifier(address)void")
+CREATE_AGREEMENT = abi.Method.from_signature("create_agreement(byte[32],byte[16],address[])void")
+CREATE_AGREEMENTS = abi.Method.from_signature("create_agreements((byte[32],byte[16],address[])[])void")
+ADD_INITIAL_SIGNERS = abi.Method.from_signature("add_initial_signers(uint64,address[])void")
+ADD_SIGNER = abi.Method.from_signature("add_signer(uint64,address)void")
+MARK_SIGNED = abi.Method.from_signature("mark_signed(uint64,address)void")
+MARK_SIGNED_BATCH = abi.Method.from_signature("mark_signed_batch((uint64,address)[])void")
+EXECUTE_AGREEMENT = abi.Method.from_signature("execute_agreement(uint64)void")
+SET_AUTO_EXECUTE = abi.Method.from_signature("set_auto_execute(uint64,bool)void")
+ARCHIVE_AGREEMENT = abi.Method.from_signature("archive_agreement(uint64,string[])void")
+DELETE_METADATA = abi.Method.from_signature("delete_metadata(uint64,string[])void")
+
+
+def decode_signer(raw):
+    """
+    The address of a packed 32-byte signer key, as the Agreement Registry stores
+    it in signer entries and writes it to its logs.
+    """
+    return encode_address(bytes(raw))
+
+
+def encode_signer(wallet):
+    """
+    The packed 32-byte form of a signer address, as the Agreement Registry stores it.
+    """
+    return decode_address(wallet) if isinstance(wallet, str) else wallet
+
+
+def method_args(method, *args):
+    """
+    Application args calling an ARC-4 method: its selector, then each argument ABI-encoded.
+    """
+    return [method.get_selector()] + [arg.type.encode(value) for arg, value in zip(method.args, args)]
+
+
+def decode_agreement_record(buffer, offset=0):
+    """
+    Decode the agreement record at `offset` of `buffer`.
+    
+    Fields are unpacked straight from the buffer (bytes or memoryview) without
+    slicing it first, so many records can be read out of one large buffer.
+    
+    Returns:
+        AgreementRecord: Provider as a string, creator and executor as addresses
+            (executor None until the agreement is executed)
+    """
+    (document_hash, provider, created_at, executed_at,
+     flags, signer_count, creator, executed_by, meta_count) = AGREEMENT_RECORD.unpack_from(buffer, offset)
+    return AgreementRecord(
+        document_hash,
+        provider.rstrip(b"\0").decode('utf-8', 'replace'),
+        created_at,
+        executed_at,
+        flags,
+        signer_count,
+        encode_address(creator),
+        encode_address(executed_by) if flags & AGREEMENT_FLAG_EXECUTED else None,
+        meta_count
+    )
+
+
+def _agreement_key(agreement_id):
+    return agreement_id.to_bytes(8, 'big') if isinstance(agreement_id, int) else agreement_id
+
+
+def agreement_box_name(agreement_id):
+    return b"agreement_" + _agreement_key(agreement_id)
+
+
+def signer_box_name(agreement_id):
+    return b"signer_" + _agreement_key(agreement_id)
+
+
+def mask_box_name(agreement_id):
+    return b"mask_" + _agreement_key(agreement_id)
+
+
+def meta_box_name(agreement_id, key):
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return b"meta_" + _agreement_key(agreement_id) + b"_" + key
+
+
+def mark_batch_size(signer_count, auto_execute=False):
+    """
+    Pairs one mark_signed_batch call on an agreement can mark within its opcode budget.
+    
+    Args:
+        signer_count: Number of signers of the agreement, which sets the bisection depth
+        auto_execute: Whether the agreement has the auto-execute flag
+    """
+    pair_ops = MARK_PAIR_OPS + MARK_BISECT_OPS * signer_count.bit_length()
+    budget = APP_CALL_BUDGET - MARK_CALL_OPS
+    if auto_execute:
+        pair_ops += AUTO_EXECUTE_CHECK_OPS
+        budget -= AUTO_EXECUTE_OPS
+    return max(1, min(MARK_BATCH_SIGNATURES, budget // pair_ops))
+
+
+def agreement_min_balance(signer_count):
+    """
+    MicroAlgos an agreement's boxes add to the registry account's minimum balance.
+    
+    The registry account must hold this much above its current minimum balance
+    for each new agreement, or create_agreement is rejected.
+    """
+    agreement_box = len(agreement_box_name(0)) + AGREEMENT_RECORD.size
+    signer_box = len(signer_box_name(0)) + signer_count * SIGNER_ENTRY_SIZE
+    mask_box = len(mask_box_name(0)) + (signer_count + 7) // 8
+    return 3 * BOX_FLAT_MIN_BALANCE + BOX_BYTE_MIN_BALANCE * (agreement_box + signer_box + mask_box)
+
 
 class DocumentExecutionClient:
     """
@@ -22,6 +211,10 @@ class DocumentExecutionClient:
         self.algod_client = algod_client
         self.identity_app_id = identity_app_id
         self.agreement_app_id = agreement_app_id
+        
+        # Agreement IDs predicted for sent creates that have not confirmed or been dropped yet
+        self._reserved_ids = {}  # first agreement ID -> count
+        self._id_lock = threading.Lock()
     
     # ===== Identity Registry Functions =====
     
@@ -42,7 +235,7 @@ class DocumentExecutionClient:
             sender=sender,
             sp=params,
             index=self.identity_app_id,
-            app_args=["register_identity", claim_type, claim_value],
+            app_args=method_args(REGISTER_IDENTITY, claim_type, claim_value),
             on_complete=transaction.OnComplete.NoOpOC
         )
         
@@ -72,7 +265,8 @@ class DocumentExecutionClient:
             sender=verifier,
             sp=params,
             index=self.identity_app_id,
-            app_args=["verify_identity", wallet_to_verify, claim_type],
+            app_args=method_args(VERIFY_IDENTITY, wallet_to_verify, claim_type),
+            accounts=[wallet_to_verify],
             on_complete=transaction.OnComplete.NoOpOC
         )
         
@@ -101,7 +295,7 @@ class DocumentExecutionClient:
             sender=admin,
             sp=params,
             index=self.identity_app_id,
-            app_args=["add_verifier", verifier_address],
+            app_args=method_args(ADD_VERIFIER, verifier_address),
             on_complete=transaction.OnComplete.NoOpOC
         )
         
@@ -111,7 +305,7 @@ class DocumentExecutionClient:
             sender=admin,
             sp=params,
             index=self.agreement_app_id,
-            app_args=["add_verifier", verifier_address],
+            app_args=method_args(ADD_VERIFIER, verifier_address),
             on_complete=transaction.OnComplete.NoOpOC
         )
         
@@ -134,17 +328,19 @@ class DocumentExecutionClient:
     
     # ===== Agreement Registry Functions =====
     
-    def create_agreement(self, creator_private_key, document_hash, provider, signers):
+    def create_agreement(self, creator_private_key, document_hash, provider, signers, note=None):
         """
         Create a new agreement with document hash, provider, and list of required signers.
         
         Args:
             creator_private_key: The private key of the agreement creator
             document_hash: The SHA-256 hash of the document (bytes32)
-            provider: The document provider (e.g., "DocuSign")
-            signers: List of wallet addresses that need to sign
+            provider: The document provider (e.g., "DocuSign", up to PROVIDER_SIZE bytes)
+            signers: List of wallet addresses that need to sign (up to MAX_SIGNERS)
+            note: Optional transaction note (e.g. tracking data for verifiers)
         """
         creator = account.address_from_private_key(creator_private_key)
+        self._check_agreement(provider, signers)
         
         # If document_hash is a string, convert to bytes
         if isinstance(document_hash, str):
@@ -156,31 +352,307 @@ class DocumentExecutionClient:
         # Create application call transaction
         params = self.algod_client.suggested_params()
         
-        # Convert signers to application arguments
-        app_args = ["create_agreement", document_hash, provider]
-        app_args.extend(signers)
+        expected_id = self._reserve_agreement_ids(1)
+        txns = self._create_agreement_txns(creator, params, expected_id, document_hash, provider, signers, note)
         
-        txn = transaction.ApplicationCallTxn(
+        # Sign and send the create call, with any add_initial_signers calls, as one group
+        try:
+            tx_id = self._send_group(txns, creator_private_key)
+        except Exception:
+            self._release_agreement_ids(expected_id)
+            raise
+        
+        # Wait for confirmation and read the agreement ID from the logs
+        txinfo = self._wait_for_confirmation(tx_id)
+        agreement_id = self._created_agreement_id(txinfo)
+        
+        return expected_id if agreement_id is None else agreement_id
+    
+    def send_agreement_batch(self, creator_private_key, agreements):
+        """
+        Send many agreements' create_agreement groups without waiting.
+        
+        Every agreement is its own atomic group: its create_agreement call and,
+        with more than CREATE_SIGNERS signers, its add_initial_signers calls. A rejected
+        agreement therefore fails alone and is reported by key, so the caller
+        can retry it or void its envelope; the agreements sent after one that
+        fails once submitted are resent by `confirm_agreement_batch`.
+        
+        Args:
+            creator_private_key: The private key of the agreement creator
+            agreements: dict key -> (document_hash, provider, signers, note)
+        
+        Returns:
+            list: (key, agreement_id, tx_id, error, agreement) for every agreement,
+                with the predicted agreement_id, and tx_id None if it could not be
+                submitted; pass it to `confirm_agreement_batch`
+        """
+        creator = account.address_from_private_key(creator_private_key)
+        params = self.algod_client.suggested_params()
+        
+        submitted = []
+        for key, agreement in agreements.items():
+            try:
+                self._check_agreement(*agreement[1:3])
+            except ValueError as e:
+                submitted.append((key, None, None, str(e), agreement))
+                continue
+            agreement_id = self._reserve_agreement_ids(1)
+            txns = self._create_agreement_txns(creator, params, agreement_id, *agreement)
+            try:
+                submitted.append((key, agreement_id, self._send_group(txns, creator_private_key), None, agreement))
+            except Exception as e:
+                self._release_agreement_ids(agreement_id)
+                print(f"Failed to submit agreement {key!r}: {str(e)}")
+                submitted.append((key, None, None, str(e), agreement))
+        
+        return submitted
+    
+    def create_agreements(self, creator_private_key, agreements):
+        """
+        Bulk-create agreements without tracking notes, e.g. for an import.
+        
+        Agreements are packed into create_agreements calls, each creating up to
+        CREATE_BATCH_AGREEMENTS agreements with consecutive IDs, and the calls
+        into groups of up to MAX_GROUP_SIZE. Every group is submitted before any
+        confirmation is awaited.
+        
+        Args:
+            creator_private_key: The private key of the agreement creator
+            agreements: List of (document_hash, provider, signers), each with
+                at most CREATE_SIGNERS signers
+        
+        Returns:
+            list: The agreement ID of each entry of `agreements`, or None where its group was rejected
+        """
+        creator = account.address_from_private_key(creator_private_key)
+        params = self.algod_client.suggested_params()
+        
+        # Pack agreements into calls: (first index into agreements, count)
+        calls = []
+        signer_count = 0
+        for position, (_, provider, signers) in enumerate(agreements):
+            self._check_agreement(provider, signers)
+            if len(signers) > CREATE_SIGNERS:
+                raise ValueError(f"Bulk-created agreements take up to {CREATE_SIGNERS} signers, got {len(signers)}")
+            if not calls or calls[-1][1] == CREATE_BATCH_AGREEMENTS or signer_count + len(signers) > CREATE_BATCH_SIGNERS:
+                calls.append((position, 0))
+                signer_count = 0
+            calls[-1] = (calls[-1][0], calls[-1][1] + 1)
+            signer_count += len(signers)
+        
+        submitted = []  # (txn, first index into agreements)
+        reservations = []  # (first reserved agreement ID, tx_id of the group's first call)
+        for start in range(0, len(calls), MAX_GROUP_SIZE):
+            group_calls = calls[start:start + MAX_GROUP_SIZE]
+            first_id = agreement_id = self._reserve_agreement_ids(sum(count for _, count in group_calls))
+            txns = []
+            for position, count in group_calls:
+                txns.append(self._create_agreements_txn(creator, params, agreement_id, agreements[position:position + count]))
+                agreement_id += count
+            try:
+                reservations.append((first_id, self._send_group(txns, creator_private_key)))
+                submitted += [(txn, position) for txn, (position, _) in zip(txns, group_calls)]
+            except Exception as e:
+                self._release_agreement_ids(first_id)
+                print(f"Failed to submit agreement group: {str(e)}")
+        
+        # Read each call's ID range from its logs
+        confirmed = self._wait_for_confirmations([txn.get_txid() for txn, _ in submitted])
+        for first_id, tx_id in reservations:
+            if tx_id not in confirmed:
+                self._release_agreement_ids(first_id)
+        agreement_ids = [None] * len(agreements)
+        for txn, position in submitted:
+            for log in confirmed.get(txn.get_txid(), {}).get('logs', []):
+                log = base64.b64decode(log)
+                if log.startswith(b"AGREEMENTS_CREATED:"):
+                    first_id, count = struct.unpack(">QQ", log[len(b"AGREEMENTS_CREATED:"):])
+                    agreement_ids[position:position + count] = range(first_id, first_id + count)
+        
+        return agreement_ids
+    
+    def confirm_agreement_batch(self, creator_private_key, submitted, resend=True):
+        """
+        Wait for groups sent by `send_agreement_batch` and read the new agreement IDs from their logs.
+        
+        Creates reference the boxes of predicted IDs. Once a submitted create
+        fails to confirm, the registry's counter falls behind the IDs predicted
+        for every create sent after it, so those fail on their box references
+        too. They are sent once more, with IDs predicted from the counter as it
+        now stands.
+        
+        Args:
+            creator_private_key: The private key the agreements were sent with
+            submitted: The list returned by `send_agreement_batch`, in the order sent
+            resend: Whether to resend the creates sent after a failed one
+        
+        Returns:
+            tuple: (dict of key -> agreement_id for every confirmed agreement,
+                    dict of key -> reason for every agreement that was not created)
+        """
+        confirmed = self._wait_for_confirmations([entry[2] for entry in submitted if entry[2] is not None])
+        
+        created = {}
+        failed = {}
+        resent = {}  # key -> agreement, sent after a create that failed once submitted
+        shifted = False
+        for key, expected_id, tx_id, error, agreement in submitted:
+            agreement_id = self._created_agreement_id(confirmed.get(tx_id, {}))
+            if agreement_id is not None:
+                created[key] = agreement_id
+                continue
+            if tx_id is not None:
+                self._release_agreement_ids(expected_id)
+                if shifted and resend:
+                    resent[key] = agreement
+                    continue
+                shifted = True
+            failed[key] = error or "transaction group was not confirmed"
+        
+        if resent:
+            print(f"Resending {len(resent)} agreements whose predicted IDs were shifted by a failed create")
+            retried, still_failed = self.confirm_agreement_batch(
+                creator_private_key, self.send_agreement_batch(creator_private_key, resent), resend=False
+            )
+            created.update(retried)
+            failed.update(still_failed)
+        
+        return created, failed
+    
+    def _create_agreement_txns(self, creator, params, agreement_id, document_hash, provider, signers, note=None):
+        """
+        Build the unsigned calls creating agreement `agreement_id`, to send as one group.
+        
+        The registry keeps signers as packed addresses in ascending order, so
+        they are sorted here: the first CREATE_SIGNERS go into create_agreement,
+        the rest into add_initial_signers calls of up to ADD_SIGNERS each.
+        """
+        signers = sorted(encode_signer(signer) for signer in signers)
+        boxes = self._signature_boxes(agreement_id)
+        
+        txns = [transaction.ApplicationCallTxn(
             sender=creator,
             sp=params,
             index=self.agreement_app_id,
-            app_args=app_args,
-            on_complete=transaction.OnComplete.NoOpOC
+            app_args=method_args(
+                CREATE_AGREEMENT, document_hash, provider.encode('utf-8').ljust(PROVIDER_SIZE, b"\0"),
+                signers[:CREATE_SIGNERS]
+            ),
+            on_complete=transaction.OnComplete.NoOpOC,
+            note=note,
+            boxes=boxes
+        )]
+        for start in range(CREATE_SIGNERS, len(signers), ADD_SIGNERS):
+            txns.append(transaction.ApplicationCallTxn(
+                sender=creator,
+                sp=params,
+                index=self.agreement_app_id,
+                app_args=method_args(ADD_INITIAL_SIGNERS, agreement_id, signers[start:start + ADD_SIGNERS]),
+                on_complete=transaction.OnComplete.NoOpOC,
+                boxes=boxes
+            ))
+        return txns
+    
+    def _create_agreements_txn(self, creator, params, first_id, agreements):
+        """
+        Build the unsigned create_agreements call for `agreements`, which get IDs from `first_id` on.
+        """
+        boxes = []
+        for agreement_id in range(first_id, first_id + len(agreements)):
+            boxes += self._boxes(agreement_box_name(agreement_id), signer_box_name(agreement_id), mask_box_name(agreement_id))
+        
+        return transaction.ApplicationCallTxn(
+            sender=creator,
+            sp=params,
+            index=self.agreement_app_id,
+            app_args=method_args(CREATE_AGREEMENTS, [
+                (document_hash, provider.encode('utf-8').ljust(PROVIDER_SIZE, b"\0"),
+                 sorted(encode_signer(signer) for signer in signers))
+                for document_hash, provider, signers in agreements
+            ]),
+            on_complete=transaction.OnComplete.NoOpOC,
+            boxes=boxes + self._boxes(*[b""] * (MAX_CALL_REFS - len(boxes)))
+        )
+    
+    def _check_agreement(self, provider, signers):
+        if len(provider.encode('utf-8')) > PROVIDER_SIZE:
+            raise ValueError(f"Provider names are limited to {PROVIDER_SIZE} bytes, got {provider!r}")
+        if not 0 < len(signers) <= MAX_SIGNERS:
+            raise ValueError(f"An agreement needs between 1 and {MAX_SIGNERS} signers, got {len(signers)}")
+    
+    def _created_agreement_id(self, txinfo):
+        """
+        The agreement ID logged by a confirmed create_agreement call, or None.
+        """
+        for log in txinfo.get('logs', []):
+            log = base64.b64decode(log)
+            if log.startswith(b"AGREEMENT_CREATED:"):
+                return int.from_bytes(log[len(b"AGREEMENT_CREATED:"):], 'big')
+        return None
+    
+    def _reserve_agreement_ids(self, count):
+        """
+        Predict the IDs the registry will assign to the next `count` created agreements.
+        
+        A create call must reference the new agreement's boxes before the
+        registry assigns its ID, so IDs are taken from the on-chain counter and
+        handed out locally to creates that have not confirmed yet. A reservation
+        is outstanding until the counter passes it or it is released, and a new
+        one never starts below an outstanding one, so creates in flight never
+        share IDs.
+        
+        Predictions assume this client is the registry's single writer: an
+        agreement created by another client or process takes an ID reserved
+        here, and the create that reserved it fails on its box references.
+        
+        Returns:
+            int: The first of `count` consecutive agreement IDs
+        """
+        with self._id_lock:
+            counter = self._read_agreement_counter()
+            self._reserved_ids = {first: n for first, n in self._reserved_ids.items() if first + n > counter}
+            first_id = max([counter] + [first + n for first, n in self._reserved_ids.items()])
+            self._reserved_ids[first_id] = count
+            return first_id
+    
+    def _release_agreement_ids(self, first_id):
+        """
+        Give back the reservation starting at `first_id` after its create was rejected or dropped.
+        """
+        with self._id_lock:
+            self._reserved_ids.pop(first_id, None)
+    
+    def add_signer(self, private_key, agreement_id, signer_wallet):
+        """
+        Add a signer to an existing agreement (admin or creator only).
+        
+        The registry inserts the signer at its sorted place, shifting the signed
+        bitmap, so signers can be added in any order until the agreement is executed.
+        
+        Args:
+            private_key: The private key of the admin or agreement creator
+            agreement_id: The ID of the agreement (not executed yet)
+            signer_wallet: The wallet address of the new signer
+        """
+        sender = account.address_from_private_key(private_key)
+        
+        params = self.algod_client.suggested_params()
+        txn = transaction.ApplicationCallTxn(
+            sender=sender,
+            sp=params,
+            index=self.agreement_app_id,
+            app_args=method_args(ADD_SIGNER, agreement_id, signer_wallet),
+            on_complete=transaction.OnComplete.NoOpOC,
+            boxes=self._signature_boxes(agreement_id)
         )
         
-        # Sign and send transaction
-        signed_txn = txn.sign(creator_private_key)
+        signed_txn = txn.sign(private_key)
         tx_id = self.algod_client.send_transaction(signed_txn)
         
-        # Wait for confirmation
         self._wait_for_confirmation(tx_id)
         
-        # Get the agreement ID from the transaction result
-        # Note: In a real implementation, you would parse this from transaction logs
-        # For now, we'll assume it returns the latest agreement ID
-        agreement_id = self._get_latest_agreement_id()
-        
-        return agreement_id
+        return tx_id
     
     def mark_signed(self, verifier_private_key, agreement_id, signer_wallet):
         """
@@ -193,14 +665,22 @@ class DocumentExecutionClient:
         """
         verifier = account.address_from_private_key(verifier_private_key)
         
+        # The mark executes an auto-execute agreement if it is the final one
+        apps = []
+        record = self.get_agreement_records([agreement_id]).get(agreement_id)
+        if record and record.flags & (AGREEMENT_FLAG_AUTO_EXECUTE | AGREEMENT_FLAG_EXECUTED) == AGREEMENT_FLAG_AUTO_EXECUTE:
+            apps = self._execution_apps([agreement_id])[agreement_id]
+        
         # Create application call transaction
         params = self.algod_client.suggested_params()
         txn = transaction.ApplicationCallTxn(
             sender=verifier,
-            sp=params,
+            sp=self._execution_params(params, apps),
             index=self.agreement_app_id,
-            app_args=["mark_signed", agreement_id, signer_wallet],
-            on_complete=transaction.OnComplete.NoOpOC
+            app_args=method_args(MARK_SIGNED, agreement_id, encode_signer(signer_wallet)),
+            on_complete=transaction.OnComplete.NoOpOC,
+            foreign_apps=apps,
+            boxes=self._execution_boxes(agreement_id)
         )
         
         # Sign and send transaction
@@ -212,10 +692,177 @@ class DocumentExecutionClient:
         
         return tx_id
     
+    def mark_signed_batch(self, verifier_private_key, signatures):
+        """
+        Mark many (agreement, signer) pairs as signed in one submission wave.
+        
+        Each agreement's pairs go into mark_signed_batch calls of as many pairs
+        as one call's opcode budget covers (see `mark_batch_size`), and every call is sent as its own
+        transaction. All calls are submitted before any confirmation is awaited,
+        so the whole batch confirms in about one round. A call that is rejected
+        only fails its own pairs.
+        
+        Args:
+            verifier_private_key: The private key of the verifier
+            signatures: List of (agreement_id, signer_wallet) pairs
+            
+        Returns:
+            dict: (agreement_id, signer_wallet) -> tx_id for every confirmed pair
+        """
+        marked, _ = self.submit_signature_batch(verifier_private_key, signatures)
+        return marked
+    
+    def submit_signature_batch(self, verifier_private_key, signatures, execute_ids=()):
+        """
+        Submit signature marks, and executions they complete, in one submission wave.
+        
+        Marks of one agreement share mark_signed_batch calls. For every agreement
+        in `execute_ids`, its mark calls and an execute_agreement call are placed
+        in one atomic group, so the final signature and the execution confirm
+        together in a single round. Agreements with the auto-execute flag get no
+        execute_agreement call, as their final mark executes them. All other
+        mark calls are sent ungrouped, so one rejected call cannot take
+        unrelated marks down with it.
+        
+        Args:
+            verifier_private_key: The private key of the verifier (also the executor)
+            signatures: List of (agreement_id, signer_wallet) pairs
+            execute_ids: Agreement IDs whose signer set is completed by these marks
+            
+        Returns:
+            tuple: (dict of confirmed (agreement_id, signer_wallet) -> tx_id,
+                    set of confirmed executed agreement IDs)
+        """
+        return self.confirm_signature_batch(
+            self.send_signature_batch(verifier_private_key, signatures, execute_ids)
+        )
+    
+    def send_signature_batch(self, verifier_private_key, signatures, execute_ids=()):
+        """
+        Build and send the groups of `submit_signature_batch` without waiting for them.
+        
+        Returns:
+            list: (units, tx_id) for every submitted transaction or group, to pass to `confirm_signature_batch`
+        """
+        verifier = account.address_from_private_key(verifier_private_key)
+        params = self.algod_client.suggested_params()
+        execute_ids = set(execute_ids)
+        
+        def mark_calls(agreement_id, pairs, final_only=False):
+            # Calls that may complete an auto-execute agreement also reference and pay for its
+            # execution; with `final_only`, the marks are grouped and only the last call completes it
+            calls = []  # (txn, pairs)
+            size = batch_sizes[agreement_id]
+            for start in range(0, len(pairs), size):
+                chunk = pairs[start:start + size]
+                executes = agreement_id in auto_execute_ids and (not final_only or start + size >= len(pairs))
+                apps = execution_apps[agreement_id] if executes else []
+                calls.append((transaction.ApplicationCallTxn(
+                    sender=verifier,
+                    sp=self._execution_params(params, apps),
+                    index=self.agreement_app_id,
+                    app_args=method_args(MARK_SIGNED_BATCH, [(agreement_id, encode_signer(wallet)) for _, wallet in chunk]),
+                    on_complete=transaction.OnComplete.NoOpOC,
+                    foreign_apps=apps,
+                    boxes=self._execution_boxes(agreement_id)
+                ), chunk))
+            return calls
+        
+        by_agreement = {}
+        for pair in signatures:
+            by_agreement.setdefault(pair[0], []).append(pair)
+        
+        # Size each agreement's mark calls to fit one call's opcode budget; agreements
+        # without a readable record are sized for the most signers an agreement can have
+        records = self.get_agreement_records(list(by_agreement))
+        auto_execute_ids = {
+            agreement_id for agreement_id, record in records.items()
+            if record.flags & (AGREEMENT_FLAG_AUTO_EXECUTE | AGREEMENT_FLAG_EXECUTED) == AGREEMENT_FLAG_AUTO_EXECUTE
+        }
+        batch_sizes = {
+            agreement_id: mark_batch_size(
+                records[agreement_id].signer_count if agreement_id in records else MAX_SIGNERS,
+                agreement_id in auto_execute_ids
+            )
+            for agreement_id in by_agreement
+        }
+        
+        # An execution only rides along if all its mark calls, plus the execute call of an
+        # agreement without auto-execution, fit in one group; otherwise the marks go out alone
+        # and the agreement is executed later. An auto-execute agreement is executed by whichever
+        # mark call completes it, grouped or not, and reported from that call's EXECUTED: log
+        execute_ids = {
+            agreement_id for agreement_id in execute_ids
+            if -(-len(by_agreement.get(agreement_id, [])) // batch_sizes.get(agreement_id, 1))
+            + (agreement_id not in auto_execute_ids) <= MAX_GROUP_SIZE
+        }
+        
+        execution_apps = self._execution_apps(execute_ids | auto_execute_ids)
+        
+        # Build units that must land in the same group: (txns, pairs, executed_id). An
+        # agreement's final marks form their own unit with its execution, or alone when
+        # the final mark executes it
+        units = []
+        for agreement_id, pairs in by_agreement.items():
+            if agreement_id in execute_ids:
+                txns = [txn for txn, _ in mark_calls(agreement_id, pairs, final_only=True)]
+                if agreement_id not in auto_execute_ids:
+                    txns.append(self._execute_agreement_txn(verifier, params, agreement_id, execution_apps[agreement_id]))
+                units.append((txns, pairs, agreement_id))
+            else:
+                units.extend(([txn], chunk, None) for txn, chunk in mark_calls(agreement_id, pairs))
+        
+        # Submit every unit on its own, without waiting in between: only an execution
+        # and the marks it depends on are atomic, so a rejected mark call fails its own pairs only
+        submitted = []  # (group, tx_id)
+        for unit in units:
+            try:
+                tx_id = self._send_group(unit[0], verifier_private_key)
+                submitted.append(([unit], tx_id))
+            except Exception as e:
+                print(f"Failed to submit signature group: {str(e)}")
+        
+        return submitted
+    
+    def confirm_signature_batch(self, submitted):
+        """
+        Wait for groups sent by `send_signature_batch` to confirm.
+        
+        Executions are reported for the groups built around them and for any
+        confirmed call that logged EXECUTED:, such as an ungrouped mark call
+        completing an auto-execute agreement.
+        
+        Returns:
+            tuple: (dict of confirmed (agreement_id, signer_wallet) -> tx_id,
+                    set of confirmed executed agreement IDs)
+        """
+        # Wait for all groups collectively
+        confirmed = self._wait_for_confirmations([tx_id for _, tx_id in submitted])
+        
+        marked = {}
+        executed = set()
+        for group, tx_id in submitted:
+            if tx_id not in confirmed:
+                continue
+            for _, pairs, executed_id in group:
+                for pair in pairs:
+                    marked[pair] = tx_id
+                if executed_id is not None:
+                    executed.add(executed_id)
+            for log in confirmed[tx_id].get('logs', []):
+                log = base64.b64decode(log)
+                if log.startswith(b"EXECUTED:"):
+                    executed.add(int.from_bytes(log[len(b"EXECUTED:"):], 'big'))
+        
+        return marked, executed
+    
     def execute_agreement(self, executor_private_key, agreement_id, signers):
         """
         Execute an agreement if all signers have signed.
         
+        The contract reads the signer list from its own state, so `signers` is
+        only kept for backward compatibility and is not sent on-chain.
+        
         Args:
             executor_private_key: The private key of the executor
             agreement_id: The ID of the agreement
@@ -225,28 +872,287 @@ class DocumentExecutionClient:
         
         # Create application call transaction
         params = self.algod_client.suggested_params()
+        txn = self._execute_agreement_txn(executor, params, agreement_id, self._execution_apps([agreement_id])[agreement_id])
+        
+        # Sign and send transaction
+        signed_txn = txn.sign(executor_private_key)
+        tx_id = self.algod_client.send_transaction(signed_txn)
+        
+        # Wait for confirmation
+        self._wait_for_confirmation(tx_id)
+        
+        return tx_id
+    
+    def set_auto_execute(self, private_key, agreement_id, enabled=True):
+        """
+        Make the mark_signed that completes an agreement also execute it (admin or creator only).
         
-        # Convert agreement_id and signers to application arguments
-        app_args = ["execute_agreement", str(agreement_id)]
-        app_args.extend(signers)
+        The execution, including the Execution Router call, then confirms in the
+        same round as the final signature instead of in a separate execute_agreement call.
         
+        Args:
+            private_key: The private key of the admin or agreement creator
+            agreement_id: The ID of the agreement (not executed yet)
+            enabled: Whether to turn auto-execution on or off
+        """
+        sender = account.address_from_private_key(private_key)
+        
+        params = self.algod_client.suggested_params()
         txn = transaction.ApplicationCallTxn(
-            sender=executor,
+            sender=sender,
             sp=params,
             index=self.agreement_app_id,
-            app_args=app_args,
-            on_complete=transaction.OnComplete.NoOpOC
+            app_args=method_args(SET_AUTO_EXECUTE, agreement_id, enabled),
+            on_complete=transaction.OnComplete.NoOpOC,
+            boxes=self._boxes(agreement_box_name(agreement_id))
         )
         
-        # Sign and send transaction
-        signed_txn = txn.sign(executor_private_key)
+        signed_txn = txn.sign(private_key)
         tx_id = self.algod_client.send_transaction(signed_txn)
         
-        # Wait for confirmation
         self._wait_for_confirmation(tx_id)
         
         return tx_id
     
+    def _execute_agreement_txn(self, executor, params, agreement_id, apps=()):
+        """
+        Build an unsigned execute_agreement application call.
+        
+        The agreement ID is encoded as an 8-byte integer, matching the Itob
+        names of the boxes the Agreement Registry stores agreements in.
+        `apps` are the apps the execution calls into (see `_execution_apps`).
+        """
+        return transaction.ApplicationCallTxn(
+            sender=executor,
+            sp=self._execution_params(params, apps),
+            index=self.agreement_app_id,
+            app_args=method_args(EXECUTE_AGREEMENT, agreement_id),
+            on_complete=transaction.OnComplete.NoOpOC,
+            foreign_apps=list(apps),
+            boxes=self._execution_boxes(agreement_id)
+        )
+    
+    def _execution_apps(self, agreement_ids):
+        """
+        Apps an execution of each agreement calls into: the Execution Router and the
+        handler it registered for the agreement's `action_type` metadata.
+        
+        Returns:
+            dict: agreement_id -> list of app IDs (empty while the registry has no router)
+        """
+        if not agreement_ids:
+            return {}
+        router_id = self._global_state(self.agreement_app_id).get(b"execution_router_id", {}).get('uint', 0)
+        if not router_id:
+            return {agreement_id: [] for agreement_id in agreement_ids}
+        
+        handlers = self._global_state(router_id)
+        apps = {}
+        for agreement_id in agreement_ids:
+            action_type = self._read_box(meta_box_name(agreement_id, "action_type")) or b"default"
+            handler_id = handlers.get(b"action_type_" + action_type, {}).get('uint', 0)
+            apps[agreement_id] = [router_id] + ([handler_id] if handler_id else [])
+        return apps
+    
+    def _execution_params(self, params, apps):
+        """
+        `params` with a flat fee that also pays the inner transactions of an execution calling `apps`.
+        """
+        if not apps:
+            return params
+        execution_params = copy.copy(params)
+        execution_params.flat_fee = True
+        execution_params.fee = (params.min_fee or constants.MIN_TXN_FEE) * (1 + EXECUTION_INNER_TXNS)
+        return execution_params
+    
+    def archive_executed_agreements(self, private_key, agreement_ids, meta_keys=KNOWN_META_KEYS):
+        """
+        Archive executed agreements in bulk, releasing their boxes' minimum balance.
+        
+        Each executed agreement gets one archive_agreement call, which logs its
+        record as an ARCHIVED: summary and deletes its boxes and up to
+        ARCHIVE_META_KEYS metadata boxes. Further metadata is deleted by
+        delete_metadata calls in the same atomic group. Every agreement is its
+        own group, and every group is submitted before any confirmation is
+        awaited. The sweeper only reads the given agreements' boxes: an
+        agreement whose record counts more metadata boxes than the keys found
+        from `meta_keys` is skipped, as the registry would reject it.
+        
+        Args:
+            private_key: The private key of the admin, a verifier or the agreements' creator
+            agreement_ids: Agreements to archive, e.g. the ones a verifier executed; open ones are skipped
+            meta_keys: Metadata keys to look for, for every agreement or as a dict agreement_id -> keys
+        
+        Returns:
+            list: IDs of the archived agreements
+        """
+        sender = account.address_from_private_key(private_key)
+        params = self.algod_client.suggested_params()
+        
+        units = []  # (agreement_id, txns)
+        for agreement_id, record in self.get_agreement_records(agreement_ids).items():
+            if not record.flags & AGREEMENT_FLAG_EXECUTED:
+                continue
+            keys = []
+            if record.meta_count:
+                candidates = meta_keys.get(agreement_id, ()) if isinstance(meta_keys, dict) else meta_keys
+                keys = [key for key in candidates if self._read_box(meta_box_name(agreement_id, key)) is not None]
+            if len(keys) < record.meta_count:
+                print(f"Agreement {agreement_id} has {record.meta_count} metadata boxes, "
+                      f"{len(keys)} of them known, skipping archival")
+                continue
+            
+            archive_keys, delete_keys = keys[:ARCHIVE_META_KEYS], keys[ARCHIVE_META_KEYS:]
+            txns = []
+            for start in range(0, len(delete_keys), DELETE_META_KEYS):
+                chunk = delete_keys[start:start + DELETE_META_KEYS]
+                txns.append(transaction.ApplicationCallTxn(
+                    sender=sender,
+                    sp=params,
+                    index=self.agreement_app_id,
+                    app_args=method_args(DELETE_METADATA, agreement_id, chunk),
+                    on_complete=transaction.OnComplete.NoOpOC,
+                    boxes=self._boxes(agreement_box_name(agreement_id), *[meta_box_name(agreement_id, key) for key in chunk])
+                ))
+            names = [agreement_box_name(agreement_id), signer_box_name(agreement_id), mask_box_name(agreement_id)]
+            names += [meta_box_name(agreement_id, key) for key in archive_keys]
+            txns.append(transaction.ApplicationCallTxn(
+                sender=sender,
+                sp=params,
+                index=self.agreement_app_id,
+                app_args=method_args(ARCHIVE_AGREEMENT, agreement_id, archive_keys),
+                on_complete=transaction.OnComplete.NoOpOC,
+                boxes=self._boxes(*names) + self._boxes(*[b""] * (BOX_IO_REFS - len(names)))
+            ))
+            if len(txns) > MAX_GROUP_SIZE:
+                print(f"Agreement {agreement_id} has {len(keys)} metadata boxes, too many for one group, skipping archival")
+                continue
+            units.append((agreement_id, txns))
+        
+        # Submit every agreement's group without waiting in between
+        submitted = []  # (agreement_id, tx_id)
+        for agreement_id, txns in units:
+            try:
+                submitted.append((agreement_id, self._send_group(txns, private_key)))
+            except Exception as e:
+                print(f"Failed to submit archive group of agreement {agreement_id}: {str(e)}")
+        
+        confirmed = self._wait_for_confirmations([tx_id for _, tx_id in submitted])
+        return [agreement_id for agreement_id, tx_id in submitted if tx_id in confirmed]
+    
+    def get_signer_statuses(self, agreement_ids=None):
+        """
+        Read the on-chain signer status of many agreements.
+        
+        The Agreement Registry keeps each agreement's signers and their "0"/"1"
+        status in its `signer_` + agreement_id box, so this is one box read per
+        agreement.
+        
+        Args:
+            agreement_ids: Only return these agreements (all by default)
+        
+        Returns:
+            dict: agreement_id -> {signer_wallet: bool signed}
+        """
+        if agreement_ids is None:
+            agreement_ids = self._box_agreement_ids(b"signer_")
+        
+        statuses = {}
+        for agreement_id in agreement_ids:
+            value = self._read_box(signer_box_name(agreement_id))
+            if value is None:
+                continue
+            
+            signers = statuses.setdefault(agreement_id, {})
+            for offset in range(0, len(value), SIGNER_ENTRY_SIZE):
+                wallet = decode_signer(value[offset:offset + SIGNER_SIZE])
+                signers[wallet] = value[offset + SIGNER_SIZE:offset + SIGNER_SIZE + 1] == b"1"
+        
+        return statuses
+    
+    def get_agreement_records(self, agreement_ids=None):
+        """
+        Read the fixed-width `agreement_` + agreement_id records of many agreements.
+        
+        Args:
+            agreement_ids: Only return these agreements (all by default)
+        
+        Returns:
+            dict: agreement_id -> AgreementRecord
+        """
+        if agreement_ids is None:
+            agreement_ids = self._box_agreement_ids(b"agreement_")
+        
+        records = {}
+        for agreement_id in agreement_ids:
+            value = self._read_box(agreement_box_name(agreement_id))
+            if value is not None:
+                records[agreement_id] = decode_agreement_record(memoryview(value))
+        
+        return records
+    
+    def get_document_hashes(self, agreement_ids=None):
+        """
+        Read the document hashes anchored by `create_agreement`.
+        
+        Args:
+            agreement_ids: Only return these agreements (all by default)
+        
+        Returns:
+            dict: agreement_id -> bytes32 document hash
+        """
+        records = self.get_agreement_records(agreement_ids)
+        return {agreement_id: record.document_hash for agreement_id, record in records.items()}
+    
+    def _boxes(self, *names):
+        """
+        Box references of Agreement Registry calls (app index 0 is the called app).
+        """
+        return [(0, name) for name in names]
+    
+    def _signature_boxes(self, agreement_id):
+        """
+        Box references for an agreement's record, signers and signed bitmap.
+        
+        Empty references pad the call to BOX_IO_REFS, whose I/O budget covers
+        a signer box of MAX_SIGNERS entries.
+        """
+        names = [agreement_box_name(agreement_id), signer_box_name(agreement_id), mask_box_name(agreement_id)]
+        return self._boxes(*names) + self._boxes(*[b""] * (BOX_IO_REFS - len(names)))
+    
+    def _execution_boxes(self, agreement_id):
+        """
+        Box references of a call that may execute the agreement: signature boxes and its action type.
+        """
+        return self._signature_boxes(agreement_id) + self._boxes(meta_box_name(agreement_id, "action_type"))
+    
+    def _read_box(self, name):
+        """
+        The contents of an Agreement Registry box, or None if it does not exist.
+        """
+        try:
+            response = self.algod_client.application_box_by_name(self.agreement_app_id, name)
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+        return base64.b64decode(response['value'])
+    
+    def _box_agreement_ids(self, prefix):
+        """
+        IDs of every agreement with a box named `prefix` + Itob(agreement_id).
+        
+        algod lists every box of the registry in one response, so this only
+        suits small registries; pass agreement IDs wherever they are known.
+        """
+        response = self.algod_client.application_boxes(self.agreement_app_id)
+        agreement_ids = []
+        for box in response.get('boxes', []):
+            name = base64.b64decode(box['name'])
+            if name.startswith(prefix) and len(name) == len(prefix) + 8:
+                agreement_ids.append(int.from_bytes(name[len(prefix):], 'big'))
+        return agreement_ids
+    
     # ===== Utility Functions =====
     
     def hash_document(self, document_bytes):
@@ -254,12 +1160,21 @@ class DocumentExecutionClient:
         Create a SHA-256 hash of a document.
         
         Args:
-            document_bytes: The document as bytes
+            document_bytes: The document as bytes or a seekable binary file object,
+                which is hashed in chunks and rewound afterwards
         
         Returns:
             bytes32: The SHA-256 hash of the document
         """
-        return hashlib.sha256(document_bytes).digest()
+        if not hasattr(document_bytes, 'read'):
+            return hashlib.sha256(document_bytes).digest()
+        
+        digest = hashlib.sha256()
+        document_bytes.seek(0)
+        for chunk in iter(lambda: document_bytes.read(1024 * 1024), b''):
+            digest.update(chunk)
+        document_bytes.seek(0)
+        return digest.digest()
     
     def _wait_for_confirmation(self, txid):
         """
@@ -277,23 +1192,74 @@ class DocumentExecutionClient:
         print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
         return txinfo
     
-    def _get_latest_agreement_id(self):
+    def _send_group(self, txns, private_key):
         """
-        Get the latest agreement ID from the global state.
+        Sign and send transactions from one sender as an atomic group.
         
-        In a real implementation, this would parse application state.
+        Returns:
+            str: The transaction ID of the first transaction in the group
+        """
+        if len(txns) > 1:
+            gid = transaction.calculate_group_id(txns)
+            for txn in txns:
+                txn.group = gid
+        
+        signed_group = [txn.sign(private_key) for txn in txns]
+        self.algod_client.send_transactions(signed_group)
+        
+        return signed_group[0].get_txid()
+    
+    def _wait_for_confirmations(self, txids, max_rounds=10):
         """
-        # This is a simplification - in a real app, you'd query the app's global state
-        app_info = self.algod_client.application_info(self.agreement_app_id)
-        state = app_info['params']['global-state']
+        Wait until a set of transactions is confirmed, checking all of them each round.
         
-        # Find the counter value
-        for item in state:
-            if base64.b64decode(item['key']) == b'agreement_counter':
-                # The counter is the next ID, so we want the previous value
-                return base64.b64decode(item['value']['bytes']) - 1
+        Args:
+            txids: Transaction IDs to wait for
+            max_rounds: Rounds to wait before giving up on unconfirmed transactions
+            
+        Returns:
+            dict: tx_id -> pending transaction info for every confirmed transaction
+        """
+        pending = set(txids)
+        confirmed = {}
+        if not pending:
+            return confirmed
         
-        return 0
+        last_round = self.algod_client.status().get('last-round')
+        for _ in range(max_rounds + 1):
+            for txid in list(pending):
+                txinfo = self.algod_client.pending_transaction_info(txid)
+                if txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0:
+                    confirmed[txid] = txinfo
+                    pending.discard(txid)
+                elif txinfo.get('pool-error'):
+                    print(f"Transaction {txid} rejected: {txinfo.get('pool-error')}")
+                    pending.discard(txid)
+            
+            if not pending:
+                break
+            
+            last_round += 1
+            self.algod_client.status_after_block(last_round)
+        
+        for txid in pending:
+            print(f"Transaction {txid} not confirmed after {max_rounds} rounds.")
+        
+        print(f"{len(confirmed)} of {len(txids)} transactions confirmed.")
+        return confirmed
+    
+    def _read_agreement_counter(self):
+        """
+        The Agreement Registry's `agreement_counter`: the ID its next agreement will get.
+        """
+        return self._global_state(self.agreement_app_id).get(b"agreement_counter", {}).get('uint', 0)
+    
+    def _global_state(self, app_id):
+        """
+        An app's global state, as key (bytes) -> algod value dict.
+        """
+        app_info = self.algod_client.application_info(app_id)
+        return {base64.b64decode(item['key']): item['value'] for item in app_info['params'].get('global-state', [])}
 
 # Example usage
 def example_usage():
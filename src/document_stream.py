@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import io
+import json
+import os
+
+"""
+Streaming Request Bodies for Large Documents
+
+Purpose: Send documents of any size to a provider without holding more than one
+chunk of them in memory. The body is the provider's JSON or multipart framing
+with the document streamed (optionally base64-encoded) into the middle of it.
+Downloaded documents are hashed the same way, one chunk at a time.
+"""
+
+# Raw bytes read per chunk; a multiple of 3 so base64 chunks concatenate cleanly
+DOCUMENT_CHUNK_SIZE = 3 * 256 * 1024
+
+# Stand-in for the document in a JSON definition, replaced by the streamed content
+DOCUMENT_PLACEHOLDER = "__DOCUMENT_CONTENT__"
+
+
+def document_size(document):
+    """
+    Size in bytes of a document given as bytes or a seekable binary file object.
+    """
+    if hasattr(document, 'read'):
+        position = document.tell()
+        size = document.seek(0, io.SEEK_END)
+        document.seek(position)
+        return size
+    return len(document)
+
+
+def iter_document_chunks(document, chunk_size=DOCUMENT_CHUNK_SIZE):
+    """
+    Yield the document in chunks of at most `chunk_size` bytes.
+    
+    File objects are read from the start; in-memory documents are sliced
+    without copying.
+    """
+    if hasattr(document, 'read'):
+        document.seek(0)
+        while True:
+            chunk = document.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        view = memoryview(document)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
+
+
+def hash_chunks(chunks):
+    """
+    SHA-256 of a document streamed as an iterable of byte chunks.
+    
+    Returns:
+        tuple: (bytes32 digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.digest(), size
+
+
+class StreamingBody:
+    """
+    Iterable request body: a prefix, the streamed document and a suffix.
+    
+    It knows its length up front, so `requests` sends it with a regular
+    Content-Length header while reading the document one chunk at a time.
+    """
+    
+    def __init__(self, prefix, document, suffix, encode_base64=False, chunk_size=DOCUMENT_CHUNK_SIZE):
+        """
+        Args:
+            prefix: Bytes sent before the document
+            document: The document as bytes or a seekable binary file object
+            suffix: Bytes sent after the document
+            encode_base64: Whether to base64-encode the document on the fly
+            chunk_size: Raw bytes read per chunk (must be a multiple of 3 when encoding)
+        """
+        if encode_base64 and chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3 for base64 streaming")
+        
+        self.prefix = prefix
+        self.document = document
+        self.suffix = suffix
+        self.encode_base64 = encode_base64
+        self.chunk_size = chunk_size
+    
+    def __len__(self):
+        size = document_size(self.document)
+        if self.encode_base64:
+            size = 4 * ((size + 2) // 3)
+        return len(self.prefix) + size + len(self.suffix)
+    
+    def __iter__(self):
+        yield self.prefix
+        for chunk in iter_document_chunks(self.document, self.chunk_size):
+            yield base64.b64encode(chunk) if self.encode_base64 else bytes(chunk)
+        yield self.suffix
+    
+    @classmethod
+    def json(cls, definition, document, chunk_size=DOCUMENT_CHUNK_SIZE):
+        """
+        Stream a JSON definition whose `DOCUMENT_PLACEHOLDER` value is the base64 document.
+        """
+        prefix, suffix = json.dumps(definition).split(DOCUMENT_PLACEHOLDER)
+        return cls(prefix.encode('utf-8'), document, suffix.encode('utf-8'),
+                   encode_base64=True, chunk_size=chunk_size)
+    
+    @classmethod
+    def multipart(cls, field, filename, content_type, document, chunk_size=DOCUMENT_CHUNK_SIZE):
+        """
+        Stream a single-file multipart/form-data body.
+        
+        Returns:
+            tuple: (body, Content-Type header value)
+        """
+        boundary = os.urandom(16).hex()
+        prefix = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        suffix = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        return cls(prefix, document, suffix, chunk_size=chunk_size), f'multipart/form-data; boundary={boundary}'
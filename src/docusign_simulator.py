@@ -0,0 +1,398 @@
+import base64
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+
+"""
+Local DocuSign API Simulator
+
+Purpose: Stand in for the DocuSign eSignature REST API when load-testing the
+verifier. It serves the endpoints the verifier uses (POST /envelopes,
+POST /templates, GET /envelopes/{id}/recipients, GET /envelopes?envelope_ids=...,
+GET /envelopes/{id}/documents/combined) on localhost,
+pushes Connect-style webhooks as recipients sign, and injects configurable
+latency, server errors and throttling. Recipients sign according to a
+pluggable signing-progress model.
+"""
+
+
+# ===== Signing-Progress Models =====
+# Each model maps (number of signers, rng) to per-signer signing delays in
+# seconds after envelope creation; None means the signer never signs.
+
+def instant_signing():
+    """
+    Every recipient signs as soon as the envelope is sent.
+    """
+    return lambda count, rng: [0.0] * count
+
+
+def sequential_signing(mean_delay=30.0):
+    """
+    Recipients sign in routing order, each an exponentially distributed delay after the previous one.
+    """
+    def model(count, rng):
+        delays, elapsed = [], 0.0
+        for _ in range(count):
+            elapsed += rng.expovariate(1.0 / mean_delay)
+            delays.append(elapsed)
+        return delays
+    return model
+
+
+def parallel_signing(mean_delay=30.0):
+    """
+    Recipients sign independently, each after an exponentially distributed delay.
+    """
+    return lambda count, rng: [rng.expovariate(1.0 / mean_delay) for _ in range(count)]
+
+
+def abandoning(model, abandon_rate=0.1):
+    """
+    Wrap a model so that a fraction of envelopes stall: from a random signer on, nobody signs.
+    """
+    def wrapped(count, rng):
+        delays = model(count, rng)
+        if rng.random() < abandon_rate:
+            stop = rng.randrange(count)
+            delays = delays[:stop] + [None] * (count - stop)
+        return delays
+    return wrapped
+
+
+class DocuSignSimulator:
+    """
+    In-process DocuSign stand-in, optionally served over localhost HTTP.
+    """
+    
+    def __init__(self, signing_model=None, latency=0.0, latency_jitter=0.0, error_rate=0.0,
+                 throttle_rate=0.0, retry_after=1, webhook_url=None, clock=time.time, seed=None,
+                 auth_token=None):
+        """
+        Initialize the simulator.
+        
+        Args:
+            signing_model: Signing-progress model (defaults to sequential_signing())
+            latency: Base response latency (seconds) added to every request
+            latency_jitter: Extra uniformly distributed latency (seconds)
+            error_rate: Fraction of requests answered with HTTP 500
+            throttle_rate: Fraction of requests answered with HTTP 429
+            retry_after: Retry-After value (seconds) sent with 429 responses
+            webhook_url: If set, recipient completions are POSTed here
+            clock: Callable returning the current time in seconds
+            seed: Seed for latency, error and signing randomness
+            auth_token: If set, requests without this bearer token get HTTP 401
+        """
+        self.signing_model = signing_model or sequential_signing()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.webhook_url = webhook_url
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.auth_token = auth_token
+        
+        self.envelopes = {}  # envelope_id -> {'created_at', 'document', 'signers': [{email, recipientId, signs_at}]}
+        self.templates = {}  # template_id -> {'document', 'roles': [roleName]}
+        self.bytes_received = 0  # Request body bytes, to compare upload strategies
+        self.request_counts = {}  # endpoint -> number of requests served
+        self._lock = threading.Lock()
+        
+        # Pending webhook deliveries: (signs_at, sequence, envelope_id, recipient index)
+        self._webhooks = []
+        self._sequence = itertools.count()
+        self._server = None
+        self._stopping = threading.Event()
+    
+    # ===== Envelope State =====
+    
+    def create_template(self, definition):
+        """
+        Store a server template from a DocuSign template definition.
+        
+        Returns:
+            str: The new template ID
+        """
+        template_id = str(uuid.uuid4())
+        documents = definition.get('documents') or [{}]
+        with self._lock:
+            self.templates[template_id] = {
+                'document': base64.b64decode(documents[0].get('documentBase64', '')),
+                'roles': [signer['roleName'] for signer in definition.get('recipients', {}).get('signers', [])]
+            }
+        return template_id
+    
+    def create_envelope(self, definition):
+        """
+        Create an envelope from a DocuSign envelope definition, either inline or from a template.
+        
+        Returns:
+            str: The new envelope ID
+        
+        Raises:
+            KeyError: If the definition names an unknown template
+        """
+        envelope_id = str(uuid.uuid4())
+        now = self.clock()
+        if definition.get('templateId'):
+            template = self.templates[definition['templateId']]
+            roles = {role['roleName']: role for role in definition.get('templateRoles', [])}
+            recipients = [roles[name] for name in template['roles'] if name in roles]
+            document = template['document']
+        else:
+            recipients = definition.get('recipients', {}).get('signers', [])
+            documents = definition.get('documents') or [{}]
+            document = base64.b64decode(documents[0].get('documentBase64', ''))
+        
+        with self._lock:
+            delays = self.signing_model(len(recipients), self.rng)
+            signers = []
+            for index, (recipient, delay) in enumerate(zip(recipients, delays)):
+                signs_at = None if delay is None else now + delay
+                signers.append({
+                    'email': recipient['email'],
+                    'name': recipient.get('name', recipient['email']),
+                    'recipientId': recipient.get('recipientId', str(index + 1)),
+                    'signs_at': signs_at
+                })
+                if signs_at is not None and self.webhook_url:
+                    heapq.heappush(self._webhooks, (signs_at, next(self._sequence), envelope_id, index))
+            self.envelopes[envelope_id] = {'created_at': now, 'document': document, 'signers': signers}
+        
+        return envelope_id
+    
+    def recipients(self, envelope_id, now=None):
+        """
+        Recipient list of an envelope in the shape of GET /envelopes/{id}/recipients.
+        """
+        if now is None:
+            now = self.clock()
+        envelope = self.envelopes.get(envelope_id)
+        if envelope is None:
+            return None
+        return {
+            'signers': [
+                {
+                    'email': signer['email'],
+                    'name': signer['name'],
+                    'recipientId': signer['recipientId'],
+                    'status': self._signer_status(signer, now)
+                }
+                for signer in envelope['signers']
+            ]
+        }
+    
+    def list_envelopes(self, envelope_ids, now=None):
+        """
+        Envelopes with their recipients in the shape of GET /envelopes?include=recipients.
+        """
+        if now is None:
+            now = self.clock()
+        envelopes = []
+        for envelope_id in envelope_ids:
+            recipients = self.recipients(envelope_id, now)
+            if recipients is None:
+                continue
+            completed = all(signer['status'] == 'completed' for signer in recipients['signers'])
+            envelopes.append({
+                'envelopeId': envelope_id,
+                'status': 'completed' if completed else 'sent',
+                'recipients': recipients
+            })
+        return {'envelopes': envelopes, 'resultSetSize': str(len(envelopes))}
+    
+    def _signer_status(self, signer, now):
+        return 'completed' if signer['signs_at'] is not None and signer['signs_at'] <= now else 'sent'
+    
+    # ===== Fault Injection =====
+    
+    def _count(self, endpoint):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+    
+    def _inject_fault(self, endpoint):
+        """
+        Count the request, sleep the configured latency and pick an injected failure.
+        
+        Returns:
+            int or None: HTTP status to fail with, or None to serve the request
+        """
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+            delay = self.latency + self.rng.uniform(0, self.latency_jitter)
+            roll = self.rng.random()
+        
+        if delay > 0:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+    
+    # ===== HTTP Server =====
+    
+    @property
+    def base_url(self):
+        """
+        Base URL to configure as DOCUSIGN_BASE_URL while the server is running.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/restapi/v2.1/accounts/simulated"
+    
+    def start(self, host="127.0.0.1", port=0):
+        """
+        Serve the simulator over HTTP from daemon threads.
+        
+        Returns:
+            str: The base URL of the simulated account
+        """
+        simulator = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if not self._authorized():
+                    return
+                with simulator._lock:
+                    simulator.bytes_received += len(body)
+                path = urlparse(self.path).path.rstrip('/')
+                if path.endswith('/templates'):
+                    endpoint = 'create_template'
+                elif path.endswith('/envelopes'):
+                    endpoint = 'create_envelope'
+                else:
+                    return self._reply(404, {'errorCode': 'NOT_FOUND'})
+                
+                failure = simulator._inject_fault(endpoint)
+                if failure:
+                    return self._fail(failure)
+                try:
+                    definition = json.loads(body)
+                except ValueError:
+                    return self._reply(400, {'errorCode': 'INVALID_REQUEST_BODY'})
+                
+                if endpoint == 'create_template':
+                    return self._reply(201, {'templateId': simulator.create_template(definition)})
+                try:
+                    envelope_id = simulator.create_envelope(definition)
+                except KeyError:
+                    return self._reply(400, {'errorCode': 'TEMPLATE_NOT_FOUND'})
+                self._reply(201, {'envelopeId': envelope_id, 'status': 'sent'})
+            
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                url = urlparse(self.path)
+                route = url.path.split('/envelopes', 1)
+                if len(route) != 2:
+                    return self._reply(404, {'errorCode': 'NOT_FOUND'})
+                
+                if route[1] in ('', '/'):
+                    failure = simulator._inject_fault('list_envelopes')
+                    if failure:
+                        return self._fail(failure)
+                    ids = parse_qs(url.query).get('envelope_ids', [''])[0]
+                    return self._reply(200, simulator.list_envelopes([i for i in ids.split(',') if i]))
+                
+                parts = route[1].strip('/').split('/')
+                if len(parts) == 2 and parts[1] == 'recipients':
+                    failure = simulator._inject_fault('recipients')
+                    if failure:
+                        return self._fail(failure)
+                    recipients = simulator.recipients(parts[0])
+                    if recipients is None:
+                        return self._reply(404, {'errorCode': 'ENVELOPE_DOES_NOT_EXIST'})
+                    return self._reply(200, recipients)
+                
+                if parts[1:] == ['documents', 'combined']:
+                    failure = simulator._inject_fault('document')
+                    if failure:
+                        return self._fail(failure)
+                    envelope = simulator.envelopes.get(parts[0])
+                    if envelope is None:
+                        return self._reply(404, {'errorCode': 'ENVELOPE_DOES_NOT_EXIST'})
+                    return self._send(200, envelope['document'], 'application/pdf')
+                
+                self._reply(404, {'errorCode': 'NOT_FOUND'})
+            
+            def _authorized(self):
+                if simulator.auth_token is None:
+                    return True
+                if self.headers.get('Authorization') == f'Bearer {simulator.auth_token}':
+                    return True
+                simulator._count('unauthorized')
+                self._reply(401, {'errorCode': 'AUTHORIZATION_INVALID_TOKEN'})
+                return False
+            
+            def _fail(self, status):
+                headers = {'Retry-After': str(simulator.retry_after)} if status == 429 else {}
+                self._reply(status, {'errorCode': 'SIMULATED_FAILURE'}, headers)
+            
+            def _reply(self, status, payload, headers=None):
+                self._send(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+            
+            def _send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # Load tests would flood the console
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="docusign-simulator", daemon=True).start()
+        if self.webhook_url:
+            threading.Thread(target=self._deliver_webhooks, name="docusign-webhooks", daemon=True).start()
+        return self.base_url
+    
+    def stop(self):
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+    
+    def _deliver_webhooks(self, poll_interval=0.05):
+        """
+        POST a Connect-style recipient-completed event whenever a signer signs.
+        """
+        while not self._stopping.is_set():
+            due = []
+            with self._lock:
+                now = self.clock()
+                while self._webhooks and self._webhooks[0][0] <= now:
+                    due.append(heapq.heappop(self._webhooks))
+            
+            for _, _, envelope_id, index in due:
+                signer = self.envelopes[envelope_id]['signers'][index]
+                event = {
+                    'event': 'recipient-completed',
+                    'generatedDateTime': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    'data': {
+                        'envelopeId': envelope_id,
+                        'recipientId': signer['recipientId'],
+                        'envelopeSummary': {'recipients': self.recipients(envelope_id)}
+                    }
+                }
+                try:
+                    requests.post(self.webhook_url, json=event, timeout=5)
+                except requests.RequestException as e:
+                    print(f"Webhook delivery for envelope {envelope_id} failed: {str(e)}")
+            
+            self._stopping.wait(poll_interval)
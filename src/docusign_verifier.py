@@ -1,58 +1,108 @@
 import requests
-import time
 import os
 import json
-from algosdk import account, mnemonic
-from algosdk.v2client import algod
-from document_client_sdk import DocumentExecutionClient
+from algosdk.v2client import algod, indexer
+from chain_bootstrap import AgreementLogScanner
+from document_stream import DOCUMENT_CHUNK_SIZE, DOCUMENT_PLACEHOLDER, StreamingBody
+from provider_auth import OAuthTokenManager, StaticToken, docusign_jwt_grant
+from verification_engine import (
+    ProviderRateLimitError,
+    SignatureEvent,
+    SignatureProvider,
+    VerificationEngine,
+    parse_retry_after,
+)
 
-class DocuSignVerifier:
+
+def _raise_for_throttle(response, provider, action):
     """
-    Verifier backend that monitors DocuSign for signatures and updates
-    the on-chain agreement status accordingly.
+    Turn an HTTP 429/503 answer into a ProviderRateLimitError carrying its Retry-After.
+    """
+    if response.status_code in (429, 503):
+        raise ProviderRateLimitError(
+            f"{provider} throttled {action} request: {response.status_code}",
+            parse_retry_after(response.headers.get('Retry-After'))
+        )
+
+
+def _authorized_request(auth, method, url, headers=None, **kwargs):
+    """
+    Send a request with the current bearer token, re-authenticating once on HTTP 401.
+    """
+    for attempt in range(2):
+        token = auth.token()
+        response = requests.request(
+            method, url, headers={**(headers or {}), 'Authorization': f'Bearer {token}'}, **kwargs
+        )
+        if response.status_code != 401:
+            break
+        auth.invalidate(token)
+    return response
+
+
+def _stream_download(auth, url, provider):
     """
+    Start downloading a document and return its chunks.
     
-    def __init__(self, algod_client, identity_app_id, agreement_app_id):
-        """
-        Initialize the DocuSign verifier.
+    The response is closed if the status check fails, and otherwise once the
+    returned generator is exhausted, closed or garbage-collected, so a caller
+    that stops reading early does not leak the connection.
+    """
+    response = _authorized_request(auth, 'GET', url, stream=True)
+    try:
+        _raise_for_throttle(response, provider, "document download")
         
+        if response.status_code != 200:
+            raise Exception(f"Failed to download document: {response.text}")
+    except Exception:
+        response.close()
+        raise
+    
+    return _iter_response(response)
+
+
+def _iter_response(response):
+    with response:
+        yield from response.iter_content(DOCUMENT_CHUNK_SIZE)
+
+
+class DocuSignProvider(SignatureProvider):
+    """
+    DocuSign eSignature REST API adapter.
+    """
+    
+    name = "DocuSign"
+    
+    # GET /envelopes accepts a comma-separated list of envelope IDs
+    batch_size = 100
+    
+    supports_templates = True
+    supports_document_download = True
+    
+    def __init__(self, base_url, auth_token):
+        """
         Args:
-            algod_client: An initialized Algorand client
-            identity_app_id: The application ID for the Identity Registry
-            agreement_app_id: The application ID for the Agreement Registry
+            base_url: The account's eSignature REST API base URL
+            auth_token: A bearer token, or a token manager such as OAuthTokenManager
         """
-        self.document_client = DocumentExecutionClient(
-            algod_client, identity_app_id, agreement_app_id
-        )
-        
-        # DocuSign API credentials
-        self.docusign_base_url = os.environ.get("DOCUSIGN_BASE_URL")
-        self.docusign_api_key = os.environ.get("DOCUSIGN_API_KEY")
-        self.docusign_auth_token = os.environ.get("DOCUSIGN_AUTH_TOKEN")
-        
-        # Verifier wallet
-        self.verifier_private_key = os.environ.get("VERIFIER_PRIVATE_KEY")
-        self.verifier_address = account.address_from_private_key(self.verifier_private_key)
-        
-        # Identity mapping cache (email -> wallet address)
-        self.identity_cache = {}
-        
-        # Agreement tracking
-        self.tracked_agreements = {}  # agreement_id -> {envelope_id, signers, etc.}
+        self.base_url = base_url
+        self.auth = auth_token if hasattr(auth_token, 'token') else StaticToken(auth_token)
     
-    def create_docusign_envelope(self, document_bytes, signers):
+    def create_envelope(self, document_bytes, signers):
         """
         Create a new DocuSign envelope with the document and signers.
         
+        The document is base64-encoded chunk by chunk while the request body is
+        streamed, so memory use does not grow with the document size.
+        
         Args:
-            document_bytes: The document content as bytes
+            document_bytes: The document as bytes or a seekable binary file object
             signers: List of email addresses to sign
             
         Returns:
             envelope_id: The DocuSign envelope ID
         """
         headers = {
-            'Authorization': f'Bearer {self.docusign_auth_token}',
             'Content-Type': 'application/json'
         }
         
@@ -74,7 +124,7 @@ class DocuSignVerifier:
             'emailSubject': 'Please sign this document',
             'documents': [
                 {
-                    'documentBase64': document_bytes.decode('utf-8'),
+                    'documentBase64': DOCUMENT_PLACEHOLDER,
                     'name': 'Agreement Document',
                     'fileExtension': 'pdf',
                     'documentId': '1'
@@ -84,11 +134,12 @@ class DocuSignVerifier:
             'status': 'sent'
         }
         
-        # Call DocuSign API
-        response = requests.post(
-            f'{self.docusign_base_url}/envelopes',
+        # Call DocuSign API, streaming the document into the definition
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/envelopes',
             headers=headers,
-            data=json.dumps(envelope_definition)
+            data=StreamingBody.json(envelope_definition, document_bytes)
         )
         
         if response.status_code != 201:
@@ -97,174 +148,380 @@ class DocuSignVerifier:
         envelope_id = response.json()['envelopeId']
         return envelope_id
     
-    def register_agreement(self, document_bytes, provider, wallet_signers, email_signers):
+    def create_template(self, document_bytes, signer_count):
         """
-        Create a new agreement both on DocuSign and on-chain.
+        Upload the document once as a server template with `signer_count` signer roles.
         
-        Args:
-            document_bytes: The document content as bytes
-            provider: The provider name (e.g., "DocuSign")
-            wallet_signers: List of wallet addresses required to sign
-            email_signers: List of email addresses corresponding to the wallets
-            
         Returns:
-            agreement_id: The on-chain agreement ID
-        """
-        # 1. Create DocuSign envelope
-        envelope_id = self.create_docusign_envelope(document_bytes, email_signers)
-        
-        # 2. Create on-chain agreement
-        document_hash = self.document_client.hash_document(document_bytes)
-        agreement_id = self.document_client.create_agreement(
-            self.verifier_private_key,
-            document_hash,
-            provider,
-            wallet_signers
+            template_id: The DocuSign template ID
+        """
+        template_definition = {
+            'name': 'Agreement Template',
+            'emailSubject': 'Please sign this document',
+            'documents': [
+                {
+                    'documentBase64': DOCUMENT_PLACEHOLDER,
+                    'name': 'Agreement Document',
+                    'fileExtension': 'pdf',
+                    'documentId': '1'
+                }
+            ],
+            'recipients': {
+                'signers': [
+                    {
+                        'roleName': f'Signer {i + 1}',
+                        'recipientId': str(i + 1),
+                        'routingOrder': str(i + 1)
+                    }
+                    for i in range(signer_count)
+                ]
+            }
+        }
+        
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/templates',
+            headers={'Content-Type': 'application/json'},
+            data=StreamingBody.json(template_definition, document_bytes)
         )
         
-        # 3. Store mapping for tracking
-        self.tracked_agreements[agreement_id] = {
-            'envelope_id': envelope_id,
-            'wallet_signers': wallet_signers,
-            'email_signers': email_signers,
-            'document_hash': document_hash,
-            'signed_by': set()
+        if response.status_code != 201:
+            raise Exception(f"Failed to create template: {response.text}")
+        
+        return response.json()['templateId']
+    
+    def create_envelope_from_template(self, template_id, signers):
+        """
+        Send an envelope from a template, filling its signer roles in order.
+        """
+        envelope_definition = {
+            'templateId': template_id,
+            'templateRoles': [
+                {
+                    'email': email,
+                    'name': email.split('@')[0],
+                    'roleName': f'Signer {i + 1}'
+                }
+                for i, email in enumerate(signers)
+            ],
+            'status': 'sent'
         }
         
-        # 4. Update identity cache
-        for i in range(len(wallet_signers)):
-            self.identity_cache[email_signers[i]] = wallet_signers[i]
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/envelopes',
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps(envelope_definition)
+        )
         
-        return agreement_id
+        if response.status_code != 201:
+            raise Exception(f"Failed to create envelope: {response.text}")
+        
+        return response.json()['envelopeId']
     
-    def check_envelope_status(self, envelope_id):
+    def get_recipients(self, envelope_id):
         """
-        Check the status of a DocuSign envelope.
+        Check the recipients of a single DocuSign envelope.
         
-        Args:
-            envelope_id: The DocuSign envelope ID
-            
-        Returns:
-            dict: Envelope status information including recipients and their status
+        Raises:
+            ProviderRateLimitError: If DocuSign throttles the request
         """
-        headers = {
-            'Authorization': f'Bearer {self.docusign_auth_token}'
+        response = _authorized_request(
+            self.auth, 'GET',
+            f'{self.base_url}/envelopes/{envelope_id}/recipients'
+        )
+        
+        _raise_for_throttle(response, self.name, "envelope status")
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get envelope status: {response.text}")
+        
+        return response.json()
+    
+    def fetch_status_changes(self, envelope_ids, since=None):
+        """
+        Fetch the recipients of up to `batch_size` envelopes in one request.
+        """
+        params = {
+            'envelope_ids': ','.join(envelope_ids),
+            'include': 'recipients'
         }
+        if since is not None:
+            params['from_date'] = since
         
-        response = requests.get(
-            f'{self.docusign_base_url}/envelopes/{envelope_id}/recipients',
-            headers=headers
+        response = _authorized_request(
+            self.auth, 'GET',
+            f'{self.base_url}/envelopes',
+            params=params
         )
         
+        _raise_for_throttle(response, self.name, "envelope status")
+        
         if response.status_code != 200:
             raise Exception(f"Failed to get envelope status: {response.text}")
         
         return response.json()
     
-    def update_agreement_signatures(self, agreement_id):
+    def parse_events(self, payload):
+        events = []
+        for envelope in payload.get('envelopes') or []:
+            for signer in envelope.get('recipients', {}).get('signers', []):
+                events.append(SignatureEvent(
+                    envelope['envelopeId'],
+                    signer['email'],
+                    signer['status'],
+                    signer['status'] == 'completed'
+                ))
+        return events
+    
+    def download_document(self, envelope_id):
+        """
+        Stream the combined PDF of a completed envelope.
+        """
+        return _stream_download(self.auth, f'{self.base_url}/envelopes/{envelope_id}/documents/combined', self.name)
+
+
+class AdobeSignProvider(SignatureProvider):
+    """
+    Adobe Acrobat Sign REST API (v6) adapter.
+    """
+    
+    name = "AdobeSign"
+    
+    # Acrobat Sign has no bulk status endpoint; each agreement is fetched on its own
+    batch_size = 1
+    
+    supports_templates = True
+    supports_document_download = True
+    
+    def __init__(self, base_url, access_token):
+        """
+        Args:
+            base_url: The Acrobat Sign REST API base URL
+            access_token: A bearer token, or a token manager such as OAuthTokenManager
+        """
+        self.base_url = base_url
+        self.auth = access_token if hasattr(access_token, 'token') else StaticToken(access_token)
+    
+    def create_envelope(self, document_bytes, signers):
         """
-        Check for new signatures in DocuSign and update the on-chain agreement.
+        Upload the document and send it out as an Acrobat Sign agreement.
         
         Args:
-            agreement_id: The on-chain agreement ID
+            document_bytes: The document as bytes or a seekable binary file object
+            signers: List of email addresses to sign
             
         Returns:
-            bool: True if all signatures are complete, False otherwise
+            envelope_id: The Acrobat Sign agreement ID
+        """
+        transient_document_id = self._upload_transient_document(document_bytes)
+        return self._send_agreement({'transientDocumentId': transient_document_id}, signers)
+    
+    def create_template(self, document_bytes, signer_count):
+        """
+        Upload the document once as a library document, Acrobat Sign's reusable template.
+        
+        Returns:
+            template_id: The library document ID
         """
-        if agreement_id not in self.tracked_agreements:
-            raise Exception(f"Agreement {agreement_id} not being tracked")
+        transient_document_id = self._upload_transient_document(document_bytes)
+        library_document = {
+            'name': 'Agreement Template',
+            'fileInfos': [{'transientDocumentId': transient_document_id}],
+            'sharingMode': 'USER',
+            'state': 'ACTIVE',
+            'templateTypes': ['DOCUMENT']
+        }
         
-        agreement = self.tracked_agreements[agreement_id]
-        envelope_id = agreement['envelope_id']
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/libraryDocuments',
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps(library_document)
+        )
         
-        # Get latest envelope status
-        status = self.check_envelope_status(envelope_id)
+        if response.status_code != 201:
+            raise Exception(f"Failed to create library document: {response.text}")
         
-        # Check for new signatures
-        all_signed = True
-        for signer in status['signers']:
-            email = signer['email']
-            signed = signer['status'] == 'completed'
+        return response.json()['id']
+    
+    def create_envelope_from_template(self, template_id, signers):
+        """
+        Send an agreement for a library document without uploading it again.
+        """
+        return self._send_agreement({'libraryDocumentId': template_id}, signers)
+    
+    def _upload_transient_document(self, document_bytes):
+        """
+        Upload the document as a transient document, streamed from its source.
+        """
+        body, content_type = StreamingBody.multipart('File', 'agreement.pdf', 'application/pdf', document_bytes)
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/transientDocuments',
+            headers={'Content-Type': content_type},
+            data=body
+        )
+        
+        if response.status_code != 201:
+            raise Exception(f"Failed to upload document: {response.text}")
+        
+        return response.json()['transientDocumentId']
+    
+    def _send_agreement(self, file_info, signers):
+        """
+        Create an agreement for an uploaded document, one participant set per signer in signing order.
+        """
+        agreement_definition = {
+            'name': 'Please sign this document',
+            'fileInfos': [file_info],
+            'participantSetsInfo': [
+                {
+                    'memberInfos': [{'email': email}],
+                    'order': i + 1,
+                    'role': 'SIGNER'
+                }
+                for i, email in enumerate(signers)
+            ],
+            'signatureType': 'ESIGN',
+            'state': 'IN_PROCESS'
+        }
+        
+        response = _authorized_request(
+            self.auth, 'POST',
+            f'{self.base_url}/agreements',
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps(agreement_definition)
+        )
+        
+        if response.status_code != 201:
+            raise Exception(f"Failed to create agreement: {response.text}")
+        
+        return response.json()['id']
+    
+    def fetch_status_changes(self, envelope_ids, since=None):
+        """
+        Fetch the participant sets of each agreement.
+        """
+        agreements = []
+        for agreement_id in envelope_ids:
+            response = _authorized_request(
+                self.auth, 'GET',
+                f'{self.base_url}/agreements/{agreement_id}/members'
+            )
             
-            if signed and email not in agreement['signed_by']:
-                # New signature detected
-                wallet = self.identity_cache.get(email)
-                if wallet:
-                    # Mark as signed on-chain
-                    self.document_client.mark_signed(
-                        self.verifier_private_key,
-                        agreement_id,
-                        wallet
-                    )
-                    
-                    # Update tracking
-                    agreement['signed_by'].add(email)
-                    print(f"Marked agreement {agreement_id} as signed by {email} ({wallet})")
+            _raise_for_throttle(response, self.name, "agreement status")
             
-            all_signed = all_signed and signed
+            if response.status_code != 200:
+                raise Exception(f"Failed to get agreement status: {response.text}")
+            
+            agreements.append({'agreementId': agreement_id, **response.json()})
         
-        return all_signed
+        return {'agreements': agreements}
+    
+    def parse_events(self, payload):
+        events = []
+        for agreement in payload.get('agreements', []):
+            for participant_set in agreement.get('participantSets', []):
+                status = participant_set.get('status')
+                for member in participant_set.get('memberInfos', []):
+                    events.append(SignatureEvent(
+                        agreement['agreementId'],
+                        member['email'],
+                        status,
+                        status == 'COMPLETED'
+                    ))
+        return events
+    
+    def download_document(self, envelope_id):
+        """
+        Stream the combined PDF of a completed agreement.
+        """
+        return _stream_download(self.auth, f'{self.base_url}/agreements/{envelope_id}/combinedDocument', self.name)
+
+
+class DocuSignVerifier(VerificationEngine):
+    """
+    Verifier backend that monitors DocuSign for signatures and updates
+    the on-chain agreement status accordingly.
+    """
     
-    def execute_if_complete(self, agreement_id):
+    def __init__(self, algod_client, identity_app_id, agreement_app_id):
         """
-        Execute the agreement if all signatures are complete.
+        Initialize the DocuSign verifier.
         
         Args:
-            agreement_id: The on-chain agreement ID
-            
-        Returns:
-            bool: True if executed, False otherwise
+            algod_client: An initialized Algorand client
+            identity_app_id: The application ID for the Identity Registry
+            agreement_app_id: The application ID for the Agreement Registry
         """
-        if agreement_id not in self.tracked_agreements:
-            raise Exception(f"Agreement {agreement_id} not being tracked")
-        
-        agreement = self.tracked_agreements[agreement_id]
+        # DocuSign API credentials
+        self.docusign_base_url = os.environ.get("DOCUSIGN_BASE_URL")
+        self.docusign_api_key = os.environ.get("DOCUSIGN_API_KEY")
+        self.docusign_auth_token = os.environ.get("DOCUSIGN_AUTH_TOKEN")
         
-        # Check if all signed
-        if len(agreement['signed_by']) == len(agreement['wallet_signers']):
-            # Execute the agreement
-            self.document_client.execute_agreement(
-                self.verifier_private_key,
-                agreement_id,
-                agreement['wallet_signers']
+        # Prefer the JWT grant, which refreshes itself, over a static token
+        auth = self.docusign_auth_token
+        if os.environ.get("DOCUSIGN_INTEGRATION_KEY") and os.environ.get("DOCUSIGN_PRIVATE_KEY_PATH"):
+            with open(os.environ["DOCUSIGN_PRIVATE_KEY_PATH"]) as f:
+                private_key_pem = f.read()
+            auth = OAuthTokenManager(
+                docusign_jwt_grant(
+                    os.environ.get("DOCUSIGN_OAUTH_BASE_URL", "https://account-d.docusign.com"),
+                    os.environ["DOCUSIGN_INTEGRATION_KEY"],
+                    os.environ.get("DOCUSIGN_USER_ID"),
+                    private_key_pem
+                ),
+                cache_path=os.environ.get("DOCUSIGN_TOKEN_CACHE")
             )
-            print(f"Executed agreement {agreement_id}")
-            return True
         
-        return False
+        self.docusign = DocuSignProvider(self.docusign_base_url, auth)
+        super().__init__(algod_client, identity_app_id, agreement_app_id, providers=[self.docusign])
     
-    def monitor_agreements(self, check_interval=60):
+    def create_docusign_envelope(self, document_bytes, signers):
         """
-        Continuously monitor all tracked agreements for new signatures.
+        Create a new DocuSign envelope with the document and signers.
+        """
+        return self.docusign.create_envelope(document_bytes, signers)
+    
+    def check_envelope_status(self, envelope_id):
+        """
+        Check the status of a DocuSign envelope.
         
         Args:
-            check_interval: How often to check for updates (in seconds)
-        """
-        print(f"Starting DocuSign monitor, checking every {check_interval} seconds...")
-        
-        while True:
-            for agreement_id in list(self.tracked_agreements.keys()):
-                try:
-                    all_signed = self.update_agreement_signatures(agreement_id)
-                    
-                    if all_signed:
-                        executed = self.execute_if_complete(agreement_id)
-                        if executed:
-                            # Remove from tracking once executed
-                            del self.tracked_agreements[agreement_id]
-                
-                except Exception as e:
-                    print(f"Error processing agreement {agreement_id}: {str(e)}")
+            envelope_id: The DocuSign envelope ID
+            
+        Returns:
+            dict: Envelope status information including recipients and their status
             
-            time.sleep(check_interval)
+        Raises:
+            ProviderRateLimitError: If DocuSign throttles the request
+        """
+        with self.provider_request_seconds.time(provider=self.docusign.name):
+            return self.docusign.get_recipients(envelope_id)
 
 
-class AdobeSignVerifier:
+class AdobeSignVerifier(VerificationEngine):
     """
-    Similar implementation for Adobe Sign integration.
-    This would follow the same pattern but use Adobe's API.
+    Verifier backend that monitors Adobe Acrobat Sign for signatures and
+    updates the on-chain agreement status accordingly.
     """
-    pass
+    
+    def __init__(self, algod_client, identity_app_id, agreement_app_id):
+        """
+        Initialize the Adobe Sign verifier.
+        
+        Args:
+            algod_client: An initialized Algorand client
+            identity_app_id: The application ID for the Identity Registry
+            agreement_app_id: The application ID for the Agreement Registry
+        """
+        # Acrobat Sign API credentials
+        self.adobesign_base_url = os.environ.get("ADOBESIGN_BASE_URL")
+        self.adobesign_access_token = os.environ.get("ADOBESIGN_ACCESS_TOKEN")
+        
+        self.adobesign = AdobeSignProvider(self.adobesign_base_url, self.adobesign_access_token)
+        super().__init__(algod_client, identity_app_id, agreement_app_id, providers=[self.adobesign])
 
 
 # Example usage
@@ -281,6 +538,17 @@ def main():
     # Initialize verifier
     verifier = DocuSignVerifier(algod_client, identity_app_id, agreement_app_id)
     
+    # Resume tracking open agreements from the Agreement Registry's logs
+    indexer_address = os.environ.get("INDEXER_ADDRESS")
+    if indexer_address:
+        scanner = AgreementLogScanner(
+            indexer.IndexerClient(os.environ.get("INDEXER_TOKEN", ""), indexer_address),
+            agreement_app_id,
+            checkpoint_path=os.environ.get("VERIFIER_CHECKPOINT", "verifier_checkpoint.json"),
+            start_round=int(os.environ.get("AGREEMENT_APP_ROUND", "0"))
+        )
+        verifier.bootstrap_from_chain(scanner)
+    
     # Example: Create a new agreement
     document_bytes = b"This is a sample agreement between Alice and Bob."
     
@@ -303,7 +571,8 @@ def main():
     
     print(f"Created agreement {agreement_id}")
     
-    # Start monitoring
+    # Expose metrics for scraping, then start monitoring
+    verifier.serve_metrics(int(os.environ.get("VERIFIER_METRICS_PORT", "9108")))
     verifier.monitor_agreements()
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import time
+
+
+class EnvelopeScheduler:
+    """
+    Priority scheduler that decides when each tracked envelope is polled next.
+
+    Envelopes are kept in a min-heap keyed on their next check time. An envelope
+    that just showed activity is polled again after `min_interval`; every idle
+    poll multiplies its interval by `backoff_factor` up to `max_interval`.
+    Provider `Retry-After` hints push the next check out without touching the
+    backoff state.
+    """
+
+    def __init__(self, min_interval=15, max_interval=3600, backoff_factor=2.0, clock=time.time):
+        """
+        Initialize the scheduler.
+
+        Args:
+            min_interval: Polling interval (seconds) for recently active envelopes
+            max_interval: Upper bound (seconds) for the backed-off interval
+            backoff_factor: Multiplier applied to the interval after an idle poll
+            clock: Callable returning the current time in seconds
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.clock = clock
+
+        self._heap = []  # (next_check, sequence, agreement_id)
+        self._entries = {}  # agreement_id -> {'interval', 'next_check', 'sequence'}
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, agreement_id):
+        return agreement_id in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def add(self, agreement_id, delay=None):
+        """
+        Start scheduling an envelope.
+
+        Args:
+            agreement_id: The on-chain agreement ID the envelope belongs to
+            delay: Seconds until the first check (defaults to `min_interval`)
+        """
+        if delay is None:
+            delay = self.min_interval
+        self._entries[agreement_id] = {'interval': self.min_interval}
+        self._push(agreement_id, self.clock() + delay)
+
+    def remove(self, agreement_id):
+        """
+        Stop scheduling an envelope. Stale heap entries are skipped lazily.
+        """
+        self._entries.pop(agreement_id, None)
+
+    def pop_due(self, now=None):
+        """
+        Remove and return every envelope whose next check time has passed.
+
+        Popped envelopes stay registered but are not polled again until one of
+        `record_activity`, `record_idle` or `defer` reschedules them.
+
+        Returns:
+            list: Agreement IDs due for polling, most overdue first
+        """
+        if now is None:
+            now = self.clock()
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_check, sequence, agreement_id = heapq.heappop(self._heap)
+            entry = self._entries.get(agreement_id)
+            if entry is None or entry.get('sequence') != sequence:
+                continue  # Removed or rescheduled since this entry was pushed
+            entry['sequence'] = None
+            due.append(agreement_id)
+        return due
+
+    def seconds_until_next(self, now=None):
+        """
+        Seconds until the earliest scheduled check, or None if nothing is scheduled.
+        """
+        if now is None:
+            now = self.clock()
+
+        while self._heap:
+            next_check, sequence, agreement_id = self._heap[0]
+            entry = self._entries.get(agreement_id)
+            if entry is None or entry.get('sequence') != sequence:
+                heapq.heappop(self._heap)
+                continue
+            return max(0, next_check - now)
+        return None
+
+    def record_activity(self, agreement_id):
+        """
+        Reschedule an envelope that changed since its last poll at the minimum interval.
+        """
+        entry = self._entries.get(agreement_id)
+        if entry is None:
+            return
+        entry['interval'] = self.min_interval
+        self._push(agreement_id, self.clock() + entry['interval'])
+
+    def record_idle(self, agreement_id):
+        """
+        Reschedule an envelope that did not change, backing its interval off exponentially.
+        """
+        entry = self._entries.get(agreement_id)
+        if entry is None:
+            return
+        entry['interval'] = min(entry['interval'] * self.backoff_factor, self.max_interval)
+        self._push(agreement_id, self.clock() + entry['interval'])
+
+    def defer(self, agreement_id, retry_after):
+        """
+        Honour a provider `Retry-After` hint for an envelope.
+
+        The next check is moved to no earlier than `retry_after` seconds from now;
+        the envelope's backoff interval is left unchanged.
+        """
+        entry = self._entries.get(agreement_id)
+        if entry is None:
+            return
+        self._push(agreement_id, self.clock() + max(retry_after, 0))
+
+    def _push(self, agreement_id, next_check):
+        sequence = next(self._sequence)
+        entry = self._entries[agreement_id]
+        entry['next_check'] = next_check
+        entry['sequence'] = sequence
+        heapq.heappush(self._heap, (next_check, sequence, agreement_id))
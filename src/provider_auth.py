@@ -0,0 +1,226 @@
+import base64
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+import requests
+from Cryptodome.Hash import SHA256
+from Cryptodome.PublicKey import RSA
+from Cryptodome.Signature import pkcs1_15
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the cache is then shared without a file lock
+    fcntl = None
+
+"""
+Provider API Authentication
+
+Purpose: Supply bearer tokens to provider adapters. OAuthTokenManager caches a
+token in memory and on disk, refreshes it ahead of expiry with a single
+request shared by every concurrent caller (and, through a lock file, by every
+worker process using the same cache), and drops it when the provider answers
+401 so the next call re-authenticates once instead of in a herd.
+"""
+
+
+class StaticToken:
+    """
+    A fixed bearer token, e.g. DOCUSIGN_AUTH_TOKEN from the environment.
+    """
+    
+    def __init__(self, token):
+        self._token = token
+    
+    def token(self):
+        return self._token
+    
+    def invalidate(self, token):
+        pass  # Nothing to refresh; the provider keeps rejecting an expired token
+
+
+class OAuthTokenManager:
+    """
+    Cached OAuth access token with single-flight refresh ahead of expiry.
+    """
+    
+    def __init__(self, fetch_token, refresh_margin=300, cache_path=None, clock=time.time):
+        """
+        Initialize the token manager.
+        
+        Args:
+            fetch_token: Callable returning (access_token, expires_in seconds) from the OAuth server
+            refresh_margin: Refresh this many seconds before the token expires
+            cache_path: JSON file shared by workers to reuse a token across restarts
+            clock: Callable returning the current time in seconds
+        """
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.cache_path = cache_path
+        self.clock = clock
+        
+        self._access_token = None
+        self._expires_at = 0
+        self._refreshed = threading.Condition()
+        self._refreshing = False
+        self._rejected = None  # Last token the provider answered 401 for
+        self.refreshes = 0  # Tokens fetched from the OAuth server by this process
+        
+        self._load_cache()
+    
+    def token(self):
+        """
+        A valid access token, refreshing it if it expires within `refresh_margin`.
+        
+        While the current token is still valid, one caller refreshes and the
+        others keep using it; once it has expired, callers wait for that one refresh.
+        """
+        with self._refreshed:
+            while True:
+                now = self.clock()
+                if self._access_token and now < self._expires_at - self.refresh_margin:
+                    return self._access_token
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                if self._access_token and now < self._expires_at:
+                    return self._access_token
+                self._refreshed.wait()
+        
+        access_token, expires_at = None, 0
+        try:
+            access_token, expires_at = self._refresh()
+        finally:
+            with self._refreshed:
+                if access_token:
+                    self._access_token, self._expires_at = access_token, expires_at
+                self._refreshing = False
+                self._refreshed.notify_all()
+        return access_token
+    
+    def invalidate(self, token):
+        """
+        Drop `token` after the provider rejected it (HTTP 401).
+        
+        Only the first caller rejecting a given token triggers a refresh; callers
+        holding an older token just pick up the new one.
+        """
+        with self._refreshed:
+            self._rejected = token
+            if token == self._access_token:
+                self._expires_at = 0
+    
+    def _refresh(self):
+        """
+        Fetch a new token, unless another worker already cached a fresh one.
+        
+        Returns:
+            tuple: (access_token, expires_at)
+        """
+        with self._cache_lock():
+            cached = self._read_cache()
+            if (cached and cached['access_token'] != self._rejected
+                    and self.clock() < cached['expires_at'] - self.refresh_margin):
+                return cached['access_token'], cached['expires_at']
+            
+            access_token, expires_in = self.fetch_token()
+            expires_at = self.clock() + expires_in
+            self.refreshes += 1
+            self._write_cache(access_token, expires_at)
+            return access_token, expires_at
+    
+    # ===== On-Disk Cache =====
+    
+    def _load_cache(self):
+        cached = self._read_cache()
+        if cached:
+            self._access_token, self._expires_at = cached['access_token'], cached['expires_at']
+    
+    def _read_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except ValueError:
+            return None
+    
+    def _write_cache(self, access_token, expires_at):
+        if not self.cache_path:
+            return
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({'access_token': access_token, 'expires_at': expires_at}, f)
+        os.replace(temp_path, self.cache_path)
+    
+    @contextlib.contextmanager
+    def _cache_lock(self):
+        """
+        Exclusive lock on the cache file, so workers sharing it refresh one at a time.
+        """
+        if not self.cache_path or fcntl is None:
+            yield
+            return
+        with open(self.cache_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def docusign_jwt_grant(oauth_base_url, integration_key, user_id, private_key_pem,
+                       scopes="signature impersonation", lifetime=3600):
+    """
+    Token fetcher for DocuSign's JWT grant (service integrations impersonating a user).
+    
+    Args:
+        oauth_base_url: e.g. https://account-d.docusign.com (demo) or https://account.docusign.com
+        integration_key: The app's integration key (OAuth client ID)
+        user_id: GUID of the user to impersonate
+        private_key_pem: The app's RSA private key in PEM format
+        scopes: Space-separated OAuth scopes
+        lifetime: Requested assertion lifetime in seconds
+    
+    Returns:
+        callable: Returns (access_token, expires_in) for OAuthTokenManager
+    """
+    key = RSA.import_key(private_key_pem)
+    audience = oauth_base_url.split("://", 1)[-1].rstrip("/")
+    
+    def fetch_token():
+        now = int(time.time())
+        header = {'alg': 'RS256', 'typ': 'JWT'}
+        claims = {
+            'iss': integration_key,
+            'sub': user_id,
+            'aud': audience,
+            'iat': now,
+            'exp': now + lifetime,
+            'scope': scopes,
+            'jti': str(uuid.uuid4())
+        }
+        signing_input = b".".join(
+            _b64url(json.dumps(part, separators=(",", ":")).encode("utf-8")) for part in (header, claims)
+        )
+        signature = pkcs1_15.new(key).sign(SHA256.new(signing_input))
+        assertion = (signing_input + b"." + _b64url(signature)).decode("ascii")
+        
+        response = requests.post(
+            f"{oauth_base_url.rstrip('/')}/oauth/token",
+            data={'grant_type': 'urn:ietf:params:oauth:grant-type:jwt-bearer', 'assertion': assertion}
+        )
+        if response.status_code != 200:
+            raise Exception(f"DocuSign JWT grant failed: {response.text}")
+        
+        token = response.json()
+        return token['access_token'], int(token.get('expires_in', 3600))
+    
+    return fetch_token
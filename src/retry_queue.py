@@ -0,0 +1,219 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+"""
+Chain Operation Retry Queue
+
+Purpose: Persist on-chain verifier operations (mark_signed, execute_agreement)
+until they confirm. Failed operations are retried with per-item exponential
+backoff and jitter; after `max_attempts` they move to a dead-letter table for
+an operator to inspect and requeue, so one poisoned agreement cannot keep the
+verifier (or the provider API) busy forever.
+"""
+
+
+class ChainRetryQueue:
+    """
+    SQLite-backed queue of pending chain operations with a dead-letter table.
+    """
+    
+    def __init__(self, path, base_delay=5, max_delay=600, max_attempts=8,
+                 jitter=0.5, clock=time.time, rng=None):
+        """
+        Open (and create if needed) the queue.
+        
+        Args:
+            path: SQLite database file (":memory:" keeps the queue for this process only, e.g. in tests)
+            base_delay: Delay (seconds) before the first retry
+            max_delay: Upper bound (seconds) for the backed-off delay
+            max_attempts: Failed attempts after which an operation is dead-lettered
+            jitter: Relative random spread applied to each delay (0.5 -> +/-50%)
+            clock: Callable returning the current time in seconds
+            rng: random.Random used for jitter
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chain_ops ("
+                "op_key TEXT PRIMARY KEY, operation TEXT NOT NULL, agreement_id INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, attempts INTEGER NOT NULL, next_attempt REAL NOT NULL, "
+                "last_error TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letters ("
+                "op_key TEXT PRIMARY KEY, operation TEXT NOT NULL, agreement_id INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, attempts INTEGER NOT NULL, last_error TEXT, "
+                "failed_at REAL NOT NULL)"
+            )
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chain_ops").fetchone()[0]
+    
+    @staticmethod
+    def op_key(operation, agreement_id, *parts):
+        return ":".join([operation, str(agreement_id)] + [str(part) for part in parts])
+    
+    def enqueue(self, op_key, operation, agreement_id, payload=None):
+        """
+        Queue an operation for immediate attempt.
+        
+        Operations already queued or dead-lettered under the same key are left alone.
+        
+        Returns:
+            bool: True if the operation was newly queued
+        """
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM dead_letters WHERE op_key = ?", (op_key,)).fetchone():
+                return False
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO chain_ops "
+                "(op_key, operation, agreement_id, payload, attempts, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                (op_key, operation, agreement_id, json.dumps(payload or {}), self.clock(), self.clock())
+            )
+            return cursor.rowcount > 0
+    
+    def due(self, operation=None, now=None):
+        """
+        Operations whose next attempt time has passed, oldest first.
+        
+        Returns:
+            list: dicts with op_key, operation, agreement_id, payload and attempts
+        """
+        if now is None:
+            now = self.clock()
+        query = ("SELECT op_key, operation, agreement_id, payload, attempts FROM chain_ops "
+                 "WHERE next_attempt <= ?")
+        params = [now]
+        if operation is not None:
+            query += " AND operation = ?"
+            params.append(operation)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at, op_key", params).fetchall()
+        return [
+            {'op_key': op_key, 'operation': op, 'agreement_id': agreement_id,
+             'payload': json.loads(payload), 'attempts': attempts}
+            for op_key, op, agreement_id, payload, attempts in rows
+        ]
+    
+    def succeeded(self, op_key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chain_ops WHERE op_key = ?", (op_key,))
+    
+    def failed(self, op_key, error):
+        """
+        Record a failed attempt and schedule the retry, or dead-letter the operation.
+        
+        Returns:
+            bool: True if the operation was moved to the dead-letter table
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT operation, agreement_id, payload, attempts FROM chain_ops WHERE op_key = ?",
+                (op_key,)
+            ).fetchone()
+            if row is None:
+                return False
+            operation, agreement_id, payload, attempts = row
+            attempts += 1
+            
+            if attempts >= self.max_attempts:
+                self._conn.execute("DELETE FROM chain_ops WHERE op_key = ?", (op_key,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dead_letters "
+                    "(op_key, operation, agreement_id, payload, attempts, last_error, failed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (op_key, operation, agreement_id, payload, attempts, str(error), self.clock())
+                )
+                return True
+            
+            self._conn.execute(
+                "UPDATE chain_ops SET attempts = ?, next_attempt = ?, last_error = ? WHERE op_key = ?",
+                (attempts, self.clock() + self.retry_delay(attempts), str(error), op_key)
+            )
+            return False
+    
+    def retry_delay(self, attempts):
+        """
+        Backed-off delay (seconds) after `attempts` failed attempts, with jitter.
+        """
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        return delay * (1 + self.jitter * self.rng.uniform(-1, 1))
+    
+    def seconds_until_next(self, agreement_ids=None, now=None):
+        """
+        Seconds until the earliest queued attempt, or None if nothing is queued.
+        
+        Args:
+            agreement_ids: Only consider operations of these agreements (e.g. the ones
+                this verifier tracks when the queue file is shared)
+        """
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            rows = self._conn.execute("SELECT agreement_id, next_attempt FROM chain_ops").fetchall()
+        attempts = [next_attempt for agreement_id, next_attempt in rows
+                    if agreement_ids is None or agreement_id in agreement_ids]
+        return max(0, min(attempts) - now) if attempts else None
+    
+    def blocked_agreements(self):
+        """
+        Agreement IDs with queued or dead-lettered operations.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT agreement_id FROM chain_ops UNION SELECT agreement_id FROM dead_letters"
+            ).fetchall()
+        return {row[0] for row in rows}
+    
+    # ===== Dead Letters =====
+    
+    def dead_letters(self):
+        """
+        Every dead-lettered operation, most recent failure first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT op_key, operation, agreement_id, payload, attempts, last_error, failed_at "
+                "FROM dead_letters ORDER BY failed_at DESC"
+            ).fetchall()
+        return [
+            {'op_key': op_key, 'operation': operation, 'agreement_id': agreement_id,
+             'payload': json.loads(payload), 'attempts': attempts, 'last_error': last_error,
+             'failed_at': failed_at}
+            for op_key, operation, agreement_id, payload, attempts, last_error, failed_at in rows
+        ]
+    
+    def requeue_dead_letter(self, op_key):
+        """
+        Move a dead-lettered operation back into the queue with a fresh attempt budget.
+        
+        Returns:
+            bool: True if the operation was found and requeued
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT operation, agreement_id, payload FROM dead_letters WHERE op_key = ?", (op_key,)
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM dead_letters WHERE op_key = ?", (op_key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chain_ops "
+                "(op_key, operation, agreement_id, payload, attempts, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                (op_key, row[0], row[1], row[2], self.clock(), self.clock())
+            )
+            return True
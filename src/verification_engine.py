@@ -0,0 +1,1187 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from algosdk import account, constants
+from document_client_sdk import MAX_GROUP_SIZE, TRACKING_NOTE_PREFIX, DocumentExecutionClient
+from document_stream import hash_chunks
+from envelope_scheduler import EnvelopeScheduler
+from retry_queue import ChainRetryQueue
+from verifier_metrics import MetricsRegistry, start_metrics_server
+from verifier_pipeline import VerifierPipeline
+
+"""
+Provider-Agnostic Verification Engine
+
+Purpose: Run every document provider (DocuSign, AdobeSign, ...) on one shared
+async engine. Providers are plugins that create envelopes, fetch status changes
+and parse them into signature events; the engine multiplexes their I/O under
+per-provider rate limits, batches the resulting chain writes across providers
+and executes agreements once their signer set is complete.
+"""
+
+# One recipient status observed at a provider
+SignatureEvent = namedtuple('SignatureEvent', ['envelope_id', 'email', 'status', 'signed'])
+
+
+class ProviderRateLimitError(Exception):
+    """
+    Raised when the document provider asks us to slow down (HTTP 429/503).
+    """
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default=60):
+    """
+    Parse a `Retry-After` header given either as delta-seconds or an HTTP date.
+    
+    Args:
+        value: The raw header value (may be None)
+        default: Seconds to use when the header is missing or malformed
+    
+    Returns:
+        float: Seconds to wait before retrying
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class SignatureProvider:
+    """
+    Plugin interface for a document signing provider.
+    
+    Adapters implement the three provider-specific operations; scheduling,
+    rate limiting, identity resolution and chain writes are handled by the
+    VerificationEngine. Methods are blocking and are run on the engine's
+    I/O thread pool.
+    
+    Templates and document downloads are optional: an adapter that implements
+    them sets `supports_templates` or `supports_document_download`, and the
+    engine only calls them when the flag is set.
+    """
+    
+    # Provider name, also recorded on-chain with the agreement
+    name = None
+    
+    # Maximum number of envelopes one fetch_status_changes call may cover
+    batch_size = 1
+    
+    # Default request budget for this provider's API
+    requests_per_second = 10.0
+    
+    # Optional capabilities: create_template / create_envelope_from_template, download_document
+    supports_templates = False
+    supports_document_download = False
+    
+    def create_envelope(self, document_bytes, signers):
+        """
+        Create an envelope for the document and send it to the signers.
+        
+        Args:
+            document_bytes: The document content as bytes
+            signers: List of email addresses to sign
+        
+        Returns:
+            envelope_id: The provider's envelope (or agreement) ID
+        """
+        raise NotImplementedError
+    
+    def create_template(self, document_bytes, signer_count):
+        """
+        Upload the document once as a reusable template for `signer_count` signers.
+        
+        Returns:
+            template_id: The provider's template (or library document) ID
+        """
+        raise NotImplementedError
+    
+    def create_envelope_from_template(self, template_id, signers):
+        """
+        Send an envelope for a template's document without uploading it again.
+        
+        Args:
+            template_id: ID returned by `create_template`
+            signers: List of email addresses to sign, one per template role
+        
+        Returns:
+            envelope_id: The provider's envelope (or agreement) ID
+        """
+        raise NotImplementedError
+    
+    def fetch_status_changes(self, envelope_ids, since=None):
+        """
+        Fetch the raw recipient status payload for a batch of envelopes.
+        
+        Args:
+            envelope_ids: Up to `batch_size` envelope IDs
+            since: Optional timestamp; providers may only report changes after it
+        
+        Returns:
+            The provider's raw response, passed to `parse_events`
+        
+        Raises:
+            ProviderRateLimitError: If the provider throttles the request
+        """
+        raise NotImplementedError
+    
+    def parse_events(self, payload):
+        """
+        Turn a raw status payload into signature events.
+        
+        Returns:
+            list: SignatureEvent for every recipient in the payload
+        """
+        raise NotImplementedError
+    
+    def download_document(self, envelope_id):
+        """
+        Stream the signed document of a completed envelope.
+        
+        Returns:
+            iterable: Chunks of the document bytes, read as they arrive
+        
+        Raises:
+            ProviderRateLimitError: If the provider throttles the request
+        """
+        raise NotImplementedError
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by every request the engine sends to one provider.
+    
+    Reservations are made without awaiting, so the limiter needs no lock and
+    can be reused across event loops.
+    """
+    
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+    
+    def pause(self, seconds):
+        """
+        Hold back all requests for `seconds` (e.g. after a Retry-After hint).
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def reserve(self):
+        """
+        Reserve one request slot and return the seconds to wait before using it.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        
+        delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+        return max(delay, self._paused_until - now)
+    
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class VerificationEngine:
+    """
+    Shared verification engine: polls every registered provider concurrently,
+    resolves signers to wallets and writes signatures and executions on-chain
+    in one batched submission wave per tick.
+    """
+    
+    def __init__(self, algod_client, identity_app_id, agreement_app_id, providers=(),
+                 max_concurrency=8, metrics=None, retry_queue=None):
+        """
+        Initialize the engine.
+        
+        Args:
+            algod_client: An initialized Algorand client
+            identity_app_id: The application ID for the Identity Registry
+            agreement_app_id: The application ID for the Agreement Registry
+            providers: SignatureProvider adapters to run
+            max_concurrency: Maximum number of provider calls, and separately of chain
+                calls, in flight
+            metrics: MetricsRegistry to record into (a new one by default)
+            retry_queue: ChainRetryQueue for chain operations (defaults to one stored
+                at VERIFIER_RETRY_STORE, or verifier_retry_queue.db in VERIFIER_DATA_DIR)
+        """
+        self.document_client = DocumentExecutionClient(
+            algod_client, identity_app_id, agreement_app_id
+        )
+        
+        # Verifier wallet
+        self.verifier_private_key = os.environ.get("VERIFIER_PRIVATE_KEY")
+        self.verifier_address = account.address_from_private_key(self.verifier_private_key)
+        
+        # Identity mapping cache (email -> wallet address)
+        self.identity_cache = {}
+        
+        # Agreement tracking
+        self.tracked_agreements = {}  # agreement_id -> {provider, envelope_id, signers, etc.}
+        self.unregistered_envelopes = {}  # envelope_id -> why its bulk-created agreement failed
+        
+        # Adaptive polling schedule (agreement_id -> next envelope check)
+        self.scheduler = EnvelopeScheduler()
+        
+        # Signatures found this tick, awaiting one batched chain submission
+        self.pending_marks = {}  # (agreement_id, wallet) -> email
+        self._detected_at = {}  # (agreement_id, wallet) -> time the signature was seen
+        
+        # Completed documents checked against their on-chain hash
+        self.document_verifications = {}  # agreement_id -> verification result
+        
+        # Persistent chain operations with backoff and dead-lettering
+        self.retry_queue = retry_queue if retry_queue is not None else ChainRetryQueue(
+            os.environ.get("VERIFIER_RETRY_STORE") or os.path.join(
+                os.environ.get("VERIFIER_DATA_DIR", "."), "verifier_retry_queue.db")
+        )
+        
+        # Instrumentation
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self._init_metrics()
+        
+        # Provider plugins and their rate limiters, keyed by lower-cased name
+        self.providers = {}
+        self.rate_limiters = {}
+        for provider in providers:
+            self.add_provider(provider)
+        
+        # Provider and chain I/O use separate thread pools, so a slow algod
+        # cannot starve provider polling of threads
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._chain_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        
+        # Staged runner used by monitor_agreements
+        self.pipeline = None
+    
+    def _init_metrics(self):
+        metrics = self.metrics
+        self.tick_seconds = metrics.histogram(
+            "verifier_tick_seconds", "Duration of one monitoring tick")
+        self.provider_request_seconds = metrics.histogram(
+            "verifier_provider_request_seconds", "Latency of provider envelope status requests", ["provider"])
+        self.provider_errors = metrics.counter(
+            "verifier_provider_errors_total", "Failed provider status requests", ["provider", "reason"])
+        self.chain_submit_seconds = metrics.histogram(
+            "verifier_chain_submit_seconds", "Latency from submitting a mark_signed batch to its confirmation")
+        self.execute_seconds = metrics.histogram(
+            "verifier_execute_seconds", "Latency of standalone execute_agreement calls")
+        self.signature_to_mark_seconds = metrics.histogram(
+            "verifier_signature_to_mark_seconds", "Time from detecting a signature to its confirmed on-chain mark")
+        self.signatures_marked = metrics.counter(
+            "verifier_signatures_marked_total", "Signatures marked on-chain")
+        self.agreements_executed = metrics.counter(
+            "verifier_agreements_executed_total", "Agreements executed on-chain")
+        self.chain_errors = metrics.counter(
+            "verifier_chain_errors_total", "Failed chain submissions", ["operation"])
+        self.reconciled_marks = metrics.counter(
+            "verifier_reconciled_marks_total", "Queued marks skipped because they were already on-chain")
+        self.dead_letters = metrics.counter(
+            "verifier_dead_letters_total", "Chain operations moved to the dead-letter table", ["operation"])
+        self.document_verify_seconds = metrics.histogram(
+            "verifier_document_verify_seconds", "Latency of downloading and hashing a completed document",
+            ["provider"])
+        self.document_verifications_total = metrics.counter(
+            "verifier_document_verifications_total", "Completed documents checked against their on-chain hash",
+            ["result"])
+        self.retry_queue_gauge = metrics.gauge(
+            "verifier_retry_queue_depth", "Chain operations waiting for (re)submission")
+        self.tracked_gauge = metrics.gauge(
+            "verifier_tracked_agreements", "Agreements currently being monitored")
+        self.pending_marks_gauge = metrics.gauge(
+            "verifier_pending_marks", "Signatures queued for the next chain submission")
+        self.due_envelopes_gauge = metrics.gauge(
+            "verifier_due_envelopes", "Envelopes polled in the last tick")
+    
+    def serve_metrics(self, port, host="127.0.0.1"):
+        """
+        Expose the engine's metrics at http://host:port/metrics in the Prometheus text format.
+        """
+        return start_metrics_server(self.metrics, port, host)
+    
+    def add_provider(self, provider):
+        """
+        Register a provider adapter with the engine.
+        """
+        key = provider.name.lower()
+        self.providers[key] = provider
+        self.rate_limiters[key] = AsyncRateLimiter(provider.requests_per_second)
+    
+    def _provider_for(self, name):
+        provider = self.providers.get(str(name).lower())
+        if provider is None and len(self.providers) == 1:
+            provider = next(iter(self.providers.values()))
+        if provider is None:
+            raise Exception(f"No provider registered for {name}")
+        return provider
+    
+    # ===== Agreement Registration =====
+    
+    def register_agreement(self, document_bytes, provider, wallet_signers, email_signers):
+        """
+        Create a new agreement both at the provider and on-chain.
+        
+        Args:
+            document_bytes: The document content as bytes
+            provider: The provider name (e.g., "DocuSign")
+            wallet_signers: List of wallet addresses required to sign
+            email_signers: List of email addresses corresponding to the wallets
+        
+        Returns:
+            agreement_id: The on-chain agreement ID
+        """
+        adapter = self._provider_for(provider)
+        
+        # 1. Create provider envelope
+        envelope_id = adapter.create_envelope(document_bytes, email_signers)
+        
+        # 2. Create on-chain agreement, noting what a restarted verifier needs to resume tracking
+        document_hash = self.document_client.hash_document(document_bytes)
+        agreement_id = self.document_client.create_agreement(
+            self.verifier_private_key,
+            document_hash,
+            provider,
+            wallet_signers,
+            note=self._tracking_note(envelope_id, wallet_signers, email_signers)
+        )
+        
+        # 3. Store mapping for tracking
+        self.track_agreement(agreement_id, adapter.name, envelope_id,
+                             wallet_signers, email_signers, document_hash)
+        
+        return agreement_id
+    
+    def register_agreements_bulk(self, document_bytes, provider, signer_sets):
+        """
+        Send one document to many signer sets, uploading it to the provider only once.
+        
+        The document becomes a provider template; envelopes are then created from
+        it concurrently, and every MAX_GROUP_SIZE finished envelopes are sent
+        on-chain, one create_agreement group per agreement, while the next
+        envelopes are still being created. Providers without template support
+        fall back to one upload per envelope. Envelopes whose agreement was not
+        created are kept in `unregistered_envelopes` with the reason, to be
+        retried or voided at the provider.
+        
+        Args:
+            document_bytes: The document as bytes or a seekable binary file object
+            provider: The provider name (e.g., "DocuSign")
+            signer_sets: List of (wallet_signers, email_signers), one per agreement
+        
+        Returns:
+            list: The agreement ID for each signer set, or None where creation failed
+        """
+        return asyncio.run(self._register_bulk(document_bytes, provider, signer_sets))
+    
+    async def _register_bulk(self, document_bytes, provider, signer_sets):
+        adapter = self._provider_for(provider)
+        limiter = self.rate_limiters[adapter.name.lower()]
+        document_hash = self.document_client.hash_document(document_bytes)
+        
+        templates = {}  # signer count -> task resolving to a template ID, or None if unsupported
+        upload_lock = asyncio.Lock()  # Fallback uploads share the document's file position
+        
+        async def create_template(signer_count):
+            if not adapter.supports_templates:
+                return None
+            await limiter.acquire()
+            return await self.run_blocking(adapter.create_template, document_bytes, signer_count)
+        
+        async def create_envelope(emails):
+            if len(emails) not in templates:
+                templates[len(emails)] = asyncio.ensure_future(create_template(len(emails)))
+            template_id = await templates[len(emails)]
+            if template_id is None:
+                async with upload_lock:
+                    await limiter.acquire()
+                    return await self.run_blocking(adapter.create_envelope, document_bytes, emails)
+            await limiter.acquire()
+            return await self.run_blocking(adapter.create_envelope_from_template, template_id, emails)
+        
+        # Envelope creation runs ahead while earlier envelopes go on-chain
+        envelopes = [asyncio.ensure_future(create_envelope(emails)) for _, emails in signer_sets]
+        envelope_ids = {}
+        submitted = []
+        for start in range(0, len(signer_sets), MAX_GROUP_SIZE):
+            chunk = range(start, min(start + MAX_GROUP_SIZE, len(signer_sets)))
+            outcomes = await asyncio.gather(*(envelopes[i] for i in chunk), return_exceptions=True)
+            
+            agreements = {}
+            for i, outcome in zip(chunk, outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"Error creating envelope for signer set {i}: {str(outcome)}")
+                    continue
+                wallets, emails = signer_sets[i]
+                envelope_ids[i] = outcome
+                agreements[i] = (document_hash, provider, wallets, self._tracking_note(outcome, wallets, emails))
+            if agreements:
+                submitted += await self.run_chain(
+                    self.document_client.send_agreement_batch, self.verifier_private_key, agreements
+                )
+        
+        created, failed = await self.run_chain(
+            self.document_client.confirm_agreement_batch, self.verifier_private_key, submitted
+        )
+        
+        agreement_ids = []
+        for i, (wallets, emails) in enumerate(signer_sets):
+            agreement_id = created.get(i)
+            if i in failed:
+                self.unregistered_envelopes[envelope_ids[i]] = failed[i]
+                print(f"Envelope {envelope_ids[i]} was sent but its agreement was not created on-chain: {failed[i]}")
+            if agreement_id is not None:
+                self.track_agreement(agreement_id, adapter.name, envelope_ids[i], wallets, emails, document_hash)
+            agreement_ids.append(agreement_id)
+        
+        print(f"Created {len(created)} of {len(signer_sets)} agreements")
+        return agreement_ids
+    
+    def _tracking_note(self, envelope_id, wallet_signers, email_signers):
+        """
+        create_agreement note that lets a restarted verifier resume tracking (see chain_bootstrap).
+        
+        Emails are keyed by wallet, as the registry stores signers sorted rather than
+        in the order given. Returns None if the note would exceed the note size limit;
+        such an agreement is created untracked by a restarted verifier.
+        """
+        note = TRACKING_NOTE_PREFIX + json.dumps({
+            'envelope_id': envelope_id,
+            'signers': dict(zip(wallet_signers, email_signers))
+        }).encode('utf-8')
+        if len(note) > constants.note_max_length:
+            print(f"Tracking note of envelope {envelope_id} exceeds {constants.note_max_length} bytes, omitting it")
+            return None
+        return note
+    
+    def track_agreement(self, agreement_id, provider, envelope_id, wallet_signers,
+                        email_signers, document_hash):
+        """
+        Start monitoring an on-chain agreement and its provider envelope.
+        """
+        self.tracked_agreements[agreement_id] = {
+            'provider': provider,
+            'envelope_id': envelope_id,
+            'wallet_signers': wallet_signers,
+            'email_signers': email_signers,
+            'document_hash': document_hash,
+            'signed_by': set(),
+            'recipient_statuses': {},
+            'last_activity': time.time()
+        }
+        self.scheduler.add(agreement_id)
+        
+        # Update identity cache
+        for i in range(len(wallet_signers)):
+            self.identity_cache[email_signers[i]] = wallet_signers[i]
+    
+    def bootstrap_from_chain(self, scanner, to_round=None):
+        """
+        Resume tracking every open agreement found in the Agreement Registry's logs.
+        
+        Args:
+            scanner: An AgreementLogScanner for this engine's Agreement Registry
+            to_round: Scan up to this round (the indexer's latest by default)
+        
+        Returns:
+            list: Open agreement IDs that could not be tracked (no tracking note or provider)
+        """
+        started = time.perf_counter()
+        state = scanner.scan(to_round)
+        
+        resumed, untracked = 0, []
+        for agreement_id, record in sorted(state['agreements'].items()):
+            if agreement_id in self.tracked_agreements:
+                continue
+            wallets = list(record['signers'])
+            signer_emails = record['signer_emails']
+            if not record['envelope_id'] or set(signer_emails) != set(wallets):
+                untracked.append(agreement_id)
+                continue
+            try:
+                provider = self._provider_for(record['provider']).name
+            except Exception:
+                untracked.append(agreement_id)
+                continue
+            
+            self.track_agreement(agreement_id, provider, record['envelope_id'], wallets,
+                                 [signer_emails[wallet] for wallet in wallets], record['document_hash'])
+            # Signatures already on chain need no new mark
+            self.tracked_agreements[agreement_id]['signed_by'] = {
+                signer_emails[wallet] for wallet, signed in record['signers'].items() if signed
+            }
+            resumed += 1
+        
+        print(f"Resumed tracking {resumed} open agreements up to round "
+              f"{state['round']} in {time.perf_counter() - started:.2f}s")
+        if untracked:
+            print(f"Could not resume tracking agreements without tracking data: {untracked}")
+        return untracked
+    
+    # ===== Signature Processing =====
+    
+    def update_agreement_signatures(self, agreement_id, defer_marks=False):
+        """
+        Check for new signatures at the provider and update the on-chain agreement.
+        
+        Args:
+            agreement_id: The on-chain agreement ID
+            defer_marks: If True, new signatures are only queued in `pending_marks`
+                and written on-chain by the next `flush_pending_marks` call
+        
+        Returns:
+            bool: True if all signatures are complete, False otherwise
+        """
+        if agreement_id not in self.tracked_agreements:
+            raise Exception(f"Agreement {agreement_id} not being tracked")
+        
+        agreement = self.tracked_agreements[agreement_id]
+        provider = self._provider_for(agreement.get('provider'))
+        
+        # Get latest envelope status
+        payload = self.fetch_status(provider, [agreement['envelope_id']])
+        all_signed = self._apply_events(agreement_id, provider.parse_events(payload))
+        
+        if not defer_marks:
+            self.flush_pending_marks()
+        
+        return all_signed
+    
+    def _apply_events(self, agreement_id, events):
+        """
+        Record recipient statuses for an agreement and queue marks for new signatures.
+        
+        Returns:
+            bool: True if every recipient has signed
+        """
+        agreement = self.tracked_agreements[agreement_id]
+        if not events:
+            return False
+        
+        # Record any recipient status change as envelope activity
+        recipient_statuses = {event.email: event.status for event in events}
+        if recipient_statuses != agreement.get('recipient_statuses'):
+            agreement['recipient_statuses'] = recipient_statuses
+            agreement['last_activity'] = time.time()
+        
+        # Check for new signatures
+        all_signed = True
+        for event in events:
+            if event.signed and event.email not in agreement['signed_by']:
+                # New signature detected, queue it for the on-chain mark
+                wallet = self.identity_cache.get(event.email)
+                if wallet:
+                    self.retry_queue.enqueue(
+                        ChainRetryQueue.op_key("mark_signed", agreement_id, wallet),
+                        "mark_signed", agreement_id, {'wallet': wallet, 'email': event.email}
+                    )
+                    self._detected_at.setdefault((agreement_id, wallet), time.time())
+            
+            all_signed = all_signed and event.signed
+        
+        return all_signed
+    
+    def flush_pending_marks(self):
+        """
+        Write every due queued signature on-chain in one batched submission wave.
+        
+        When the submitted marks complete an agreement's signer set, the final
+        marks and the execute_agreement call are submitted as one atomic group,
+        so the agreement is executed in the same round as its last signature.
+        Marks whose group fails to confirm are retried with backoff by the
+        retry queue, and dead-lettered after its maximum attempt count.
+        Marks already recorded on-chain (e.g. after a crash or a double run)
+        are reconciled first and never resubmitted.
+        
+        Returns:
+            int: Number of signatures marked on-chain
+        """
+        ops = self.due_mark_ops()
+        if not ops:
+            return 0
+        
+        # Only submit writes where on-chain state actually differs
+        self.reconcile_chain_state({agreement_id for agreement_id, _ in ops})
+        self.drop_reconciled_marks(ops)
+        if not ops:
+            return 0
+        
+        try:
+            with self.chain_submit_seconds.time():
+                confirmed, executed = self.document_client.submit_signature_batch(
+                    self.verifier_private_key,
+                    list(ops),
+                    execute_ids=self.completing_agreements(ops)
+                )
+        except Exception as e:
+            self.mark_submission_failed(ops, e)
+            raise
+        
+        return self.apply_mark_results(ops, confirmed, executed)
+    
+    def due_mark_ops(self, exclude=()):
+        """
+        Due mark_signed operations of tracked agreements, keyed by (agreement_id, wallet).
+        
+        Args:
+            exclude: op_keys already being submitted elsewhere
+        """
+        ops = {}
+        for op in self.retry_queue.due("mark_signed"):
+            if op['agreement_id'] in self.tracked_agreements and op['op_key'] not in exclude:
+                pair = (op['agreement_id'], op['payload']['wallet'])
+                self.pending_marks[pair] = op['payload']['email']
+                ops[pair] = op
+        return ops
+    
+    def drop_reconciled_marks(self, ops):
+        """
+        Remove marks that reconciliation found on-chain from `ops` and the retry queue.
+        """
+        for pair, op in list(ops.items()):
+            agreement = self.tracked_agreements.get(pair[0])
+            if agreement is not None and op['payload']['email'] in agreement['signed_by']:
+                self.retry_queue.succeeded(op['op_key'])
+                self.pending_marks.pop(pair, None)
+                self._detected_at.pop(pair, None)
+                self.reconciled_marks.inc()
+                del ops[pair]
+    
+    def apply_mark_results(self, ops, confirmed, executed):
+        """
+        Record the outcome of a mark_signed submission in the retry queue and tracking.
+        
+        Returns:
+            int: Number of signatures marked on-chain
+        """
+        for pair, op in ops.items():
+            if pair in confirmed:
+                self.retry_queue.succeeded(op['op_key'])
+            else:
+                self.record_failure(op, "transaction group was not confirmed")
+        
+        now = time.time()
+        for (agreement_id, wallet) in confirmed:
+            email = self.pending_marks.pop((agreement_id, wallet))
+            detected_at = self._detected_at.pop((agreement_id, wallet), None)
+            if detected_at is not None:
+                self.signature_to_mark_seconds.observe(now - detected_at)
+            
+            # Update tracking
+            if agreement_id in self.tracked_agreements:
+                self.tracked_agreements[agreement_id]['signed_by'].add(email)
+            print(f"Marked agreement {agreement_id} as signed by {email} ({wallet})")
+        
+        for agreement_id in executed:
+            print(f"Executed agreement {agreement_id}")
+            # Remove from tracking once executed
+            self.tracked_agreements.pop(agreement_id, None)
+            self.scheduler.remove(agreement_id)
+        
+        # Forget detection times of marks dropped from the queue elsewhere
+        for pair in [p for p in self._detected_at if p not in self.pending_marks]:
+            del self._detected_at[pair]
+        
+        self.signatures_marked.inc(len(confirmed))
+        self.agreements_executed.inc(len(executed))
+        return len(confirmed)
+    
+    def mark_submission_failed(self, ops, error):
+        """
+        Count a failed mark_signed submission against each of its operations.
+        """
+        self.chain_errors.inc(operation="mark_signed")
+        for op in ops.values():
+            self.record_failure(op, error)
+    
+    def reconcile_chain_state(self, agreement_ids=None, statuses=None):
+        """
+        Bring `signed_by` in line with the signer status stored on-chain.
+        
+        All requested agreements are read with one registry state query. If the
+        query fails, tracking is left unchanged and the submission goes ahead.
+        
+        Args:
+            agreement_ids: Tracked agreements to reconcile (all by default)
+            statuses: Signer statuses already read with `get_signer_statuses`
+        
+        Returns:
+            int: Number of signatures found on-chain that tracking had missed
+        """
+        if agreement_ids is None:
+            agreement_ids = list(self.tracked_agreements)
+        if statuses is None:
+            statuses = self.read_signer_statuses(agreement_ids)
+        
+        found = 0
+        for agreement_id, signers in statuses.items():
+            agreement = self.tracked_agreements.get(agreement_id)
+            if agreement is None:
+                continue
+            for wallet, email in zip(agreement['wallet_signers'], agreement['email_signers']):
+                if signers.get(wallet) and email not in agreement['signed_by']:
+                    agreement['signed_by'].add(email)
+                    found += 1
+        return found
+    
+    def read_signer_statuses(self, agreement_ids):
+        try:
+            return self.document_client.get_signer_statuses(agreement_ids)
+        except Exception as e:
+            print(f"Error reading on-chain signer status: {str(e)}")
+            return {}
+    
+    def record_failure(self, op, error):
+        """
+        Schedule a failed chain operation for retry, dead-lettering it when out of attempts.
+        """
+        if not self.retry_queue.failed(op['op_key'], error):
+            return
+        
+        print(f"Dead-lettered {op['operation']} for agreement {op['agreement_id']}: {error}")
+        self.dead_letters.inc(operation=op['operation'])
+        if op['operation'] == "mark_signed":
+            self.pending_marks.pop((op['agreement_id'], op['payload']['wallet']), None)
+    
+    def completing_agreements(self, pairs):
+        """
+        Find tracked agreements whose signer set is completed by the submitted marks.
+        
+        Args:
+            pairs: (agreement_id, wallet) marks being submitted together
+        
+        Returns:
+            list: Agreement IDs that can be executed together with their final marks
+        """
+        pending_wallets = {}
+        for (agreement_id, wallet) in pairs:
+            pending_wallets.setdefault(agreement_id, set()).add(wallet)
+        
+        completing = []
+        for agreement_id, wallets in pending_wallets.items():
+            agreement = self.tracked_agreements.get(agreement_id)
+            if agreement is None:
+                continue
+            signed_wallets = {self.identity_cache.get(email) for email in agreement['signed_by']}
+            if set(agreement['wallet_signers']) <= signed_wallets | wallets:
+                completing.append(agreement_id)
+        
+        return completing
+    
+    def execute_if_complete(self, agreement_id):
+        """
+        Execute the agreement if all signatures are complete.
+        
+        Args:
+            agreement_id: The on-chain agreement ID
+        
+        Returns:
+            bool: True if executed, False otherwise
+        """
+        if agreement_id not in self.tracked_agreements:
+            raise Exception(f"Agreement {agreement_id} not being tracked")
+        
+        agreement = self.tracked_agreements[agreement_id]
+        
+        # Check if all signed
+        if len(agreement['signed_by']) == len(agreement['wallet_signers']):
+            # Execute the agreement
+            try:
+                with self.execute_seconds.time():
+                    self.document_client.execute_agreement(
+                        self.verifier_private_key,
+                        agreement_id,
+                        agreement['wallet_signers']
+                    )
+            except Exception:
+                self.chain_errors.inc(operation="execute_agreement")
+                raise
+            self.agreements_executed.inc()
+            print(f"Executed agreement {agreement_id}")
+            return True
+        
+        return False
+    
+    # ===== Document Verification =====
+    
+    def claim_completed_documents(self, completed):
+        """
+        Claim completed agreements whose signed document has not been verified yet.
+        
+        Returns:
+            list: (agreement_id, provider, envelope_id) to pass to `verify_document`
+        """
+        claimed = []
+        for agreement_id in completed:
+            agreement = self.tracked_agreements.get(agreement_id)
+            if agreement is None or agreement_id in self.document_verifications:
+                continue
+            self.document_verifications[agreement_id] = {'status': 'pending'}
+            claimed.append((agreement_id, self._provider_for(agreement['provider']), agreement['envelope_id']))
+        return claimed
+    
+    def verify_document(self, agreement_id, provider, envelope_id):
+        """
+        Stream the completed document into SHA-256 and compare it to the on-chain hash.
+        
+        The document is hashed chunk by chunk as it downloads, so memory use
+        does not grow with its size.
+        
+        Returns:
+            dict: The result ('match', 'mismatch', 'unsupported' or 'error'), also
+            stored in `document_verifications`
+        """
+        result = {'status': 'error', 'sha256': None, 'expected': None, 'size': 0, 'error': None}
+        if not provider.supports_document_download:
+            result['status'] = 'unsupported'
+        else:
+            try:
+                started = time.perf_counter()
+                chunks = provider.download_document(envelope_id)
+                try:
+                    digest, result['size'] = hash_chunks(chunks)
+                finally:
+                    # Release a streamed download even if hashing stopped early
+                    if hasattr(chunks, 'close'):
+                        chunks.close()
+                self.document_verify_seconds.observe(time.perf_counter() - started, provider=provider.name)
+                result['sha256'] = digest.hex()
+                
+                expected = self.document_client.get_document_hashes([agreement_id]).get(agreement_id)
+                if expected is None:
+                    raise Exception("no document hash on-chain")
+                result['expected'] = expected.hex()
+                result['status'] = 'match' if digest == expected else 'mismatch'
+            except Exception as e:
+                result['error'] = str(e)
+        
+        if result['status'] == 'mismatch':
+            print(f"Agreement {agreement_id}: completed document hash {result['sha256']} "
+                  f"does not match on-chain hash {result['expected']}")
+        elif result['status'] == 'error':
+            print(f"Error verifying document of agreement {agreement_id}: {result['error']}")
+        
+        result['verified_at'] = time.time()
+        self.document_verifications[agreement_id] = result
+        self.document_verifications_total.inc(result=result['status'])
+        return result
+    
+    async def verify_documents(self, claimed):
+        """
+        Verify claimed documents concurrently, each download under its provider's rate limit.
+        """
+        async def verify(agreement_id, provider, envelope_id):
+            await self.rate_limiters[provider.name.lower()].acquire()
+            return await self.run_blocking(self.verify_document, agreement_id, provider, envelope_id)
+        
+        return await asyncio.gather(*(verify(*item) for item in claimed))
+    
+    # ===== Monitoring =====
+    
+    def monitor_agreements(self, check_interval=None, pipeline=None):
+        """
+        Continuously monitor all tracked agreements for new signatures.
+        
+        Envelopes are polled on an adaptive schedule: recently active envelopes
+        are checked every `check_interval` seconds, idle ones back off
+        exponentially, and provider `Retry-After` hints are honoured. Polling,
+        identity resolution, submission and confirmation run as separate stages
+        connected by bounded queues (see VerifierPipeline).
+        
+        Args:
+            check_interval: Polling interval for recently active envelopes (in seconds);
+                defaults to the scheduler's minimum interval
+            pipeline: A configured VerifierPipeline for this engine (default settings if None)
+        """
+        asyncio.run(self.run_forever(check_interval, pipeline))
+    
+    async def run_forever(self, check_interval=None, pipeline=None):
+        """
+        Async form of `monitor_agreements`, for embedding in an existing event loop.
+        """
+        if check_interval is not None:
+            self.scheduler.min_interval = check_interval
+        
+        names = ", ".join(provider.name for provider in self.providers.values())
+        print(f"Starting verification engine for {names}, active envelopes checked every "
+              f"{self.scheduler.min_interval} seconds (idle backoff up to {self.scheduler.max_interval})...")
+        
+        self.pipeline = pipeline or VerifierPipeline(self)
+        await self.pipeline.run()
+    
+    def run_monitor_tick(self):
+        """
+        Run one monitoring pass over the envelopes that are due for a check.
+        
+        Returns:
+            float: Seconds to sleep before the next tick
+        """
+        return asyncio.run(self.run_tick())
+    
+    async def run_tick(self):
+        """
+        Poll every provider concurrently, then write the tick's signatures in one wave.
+        
+        Returns:
+            float: Seconds to sleep before the next tick
+        """
+        start = time.perf_counter()
+        self.sync_schedule()
+        due = self.scheduler.pop_due()
+        self.due_envelopes_gauge.set(len(due))
+        
+        # Poll every provider batch concurrently, each under its provider's rate limit
+        batches = self.provider_batches(due)
+        results = await asyncio.gather(
+            *(self._poll_batch(provider, batch) for provider, batch in batches), return_exceptions=True
+        )
+        completed = []
+        for (provider, batch), result in zip(batches, results):
+            if isinstance(result, Exception):
+                print(f"Error resolving {provider.name} statuses for agreements {batch}: {str(result)}")
+            else:
+                completed.extend(result)
+        
+        self.stop_polling_completed(completed)
+        
+        # Completed documents are downloaded and hashed while the chain writes run
+        verifying = asyncio.ensure_future(self.verify_documents(self.claim_completed_documents(completed)))
+        
+        try:
+            await self.run_chain(self.flush_pending_marks)
+        except Exception as e:
+            print(f"Error submitting signatures: {str(e)}")
+        
+        await self.run_chain(self.run_due_executions)
+        await verifying
+        
+        self.tracked_gauge.set(len(self.tracked_agreements))
+        self.pending_marks_gauge.set(len(self.pending_marks))
+        self.retry_queue_gauge.set(len(self.retry_queue))
+        self.tick_seconds.observe(time.perf_counter() - start)
+        
+        waits = [self.scheduler.seconds_until_next(),
+                 self.retry_queue.seconds_until_next(self.tracked_agreements)]
+        waits = [wait for wait in waits if wait is not None]
+        return min(waits + [self.scheduler.max_interval]) if waits else self.scheduler.min_interval
+    
+    def run_due_executions(self):
+        """
+        Execute agreements whose marks all landed without an execution (e.g. signatures
+        confirmed on an earlier tick), through the retry queue.
+        
+        Returns:
+            int: Number of agreements executed
+        """
+        executed = 0
+        for op in self.due_executions():
+            try:
+                done = self.execute_if_complete(op['agreement_id'])
+            except Exception as e:
+                self.settle_execution(op, e)
+                continue
+            self.settle_execution(op, executed=done)
+            if done:
+                executed += 1
+        
+        return executed
+    
+    def due_executions(self, exclude=()):
+        """
+        Queue executions of fully signed agreements and return the ones that are due.
+        
+        Args:
+            exclude: op_keys already being executed elsewhere
+        
+        Returns:
+            list: Due execute_agreement operations of tracked agreements
+        """
+        for agreement_id, agreement in self.tracked_agreements.items():
+            if len(agreement['signed_by']) == len(agreement['wallet_signers']):
+                self.retry_queue.enqueue(
+                    ChainRetryQueue.op_key("execute_agreement", agreement_id),
+                    "execute_agreement", agreement_id
+                )
+        
+        return [
+            op for op in self.retry_queue.due("execute_agreement")
+            if op['agreement_id'] in self.tracked_agreements and op['op_key'] not in exclude
+        ]
+    
+    def settle_execution(self, op, error=None, executed=True):
+        """
+        Record the outcome of an execute_agreement operation from `due_executions`.
+        
+        A failed execution is retried with backoff; a successful one ends tracking.
+        An agreement that turned out not to be fully signed (`executed` False) stays
+        tracked, and its operation is dropped until `due_executions` queues it again.
+        """
+        agreement_id = op['agreement_id']
+        if error is not None:
+            print(f"Error executing agreement {agreement_id}: {str(error)}")
+            self.record_failure(op, error)
+            return
+        if not executed:
+            self.retry_queue.succeeded(op['op_key'])
+            return
+        
+        self.retry_queue.succeeded(op['op_key'])
+        # Remove from tracking once executed
+        self.tracked_agreements.pop(agreement_id, None)
+        self.scheduler.remove(agreement_id)
+    
+    async def _poll_batch(self, provider, batch):
+        """
+        Fetch one provider batch under the provider's rate limit and apply it.
+        
+        Returns:
+            list: Agreement IDs whose recipients have all signed
+        """
+        envelopes = {self.tracked_agreements[a]['envelope_id']: a for a in batch}
+        try:
+            await self.rate_limiters[provider.name.lower()].acquire()
+            payload = await self.run_blocking(self.fetch_status, provider, list(envelopes))
+        except Exception as e:
+            self.poll_failed(provider, batch, e)
+            return []
+        return self.resolve_batch(provider, envelopes, payload)
+    
+    def provider_batches(self, agreement_ids):
+        """
+        Split due agreements into (provider, batch) pairs sized for each provider.
+        """
+        by_provider = {}
+        for agreement_id in agreement_ids:
+            if agreement_id in self.tracked_agreements:
+                provider = self._provider_for(self.tracked_agreements[agreement_id].get('provider'))
+                by_provider.setdefault(provider.name.lower(), (provider, []))[1].append(agreement_id)
+        
+        batches = []
+        for provider, ids in by_provider.values():
+            size = max(1, provider.batch_size)
+            batches.extend((provider, ids[i:i + size]) for i in range(0, len(ids), size))
+        return batches
+    
+    def resolve_batch(self, provider, envelopes, payload):
+        """
+        Apply a provider status payload to its agreements and reschedule their next poll.
+        
+        Args:
+            provider: The provider the payload came from
+            envelopes: envelope_id -> agreement_id for the polled batch
+            payload: Raw `fetch_status_changes` response
+        
+        Returns:
+            list: Agreement IDs whose recipients have all signed
+        
+        `pop_due` took the batch off the schedule, so if applying the payload
+        raises, the agreements not rescheduled yet are rescheduled as idle
+        before the error propagates.
+        """
+        completed = []
+        pending = dict(envelopes)
+        try:
+            events_by_envelope = {}
+            for event in provider.parse_events(payload):
+                events_by_envelope.setdefault(event.envelope_id, []).append(event)
+            
+            for envelope_id, agreement_id in envelopes.items():
+                agreement = self.tracked_agreements.get(agreement_id)
+                if agreement is None:
+                    del pending[envelope_id]
+                    continue  # Executed or handed off while the request was in flight
+                last_activity = agreement.get('last_activity')
+                if self._apply_events(agreement_id, events_by_envelope.get(envelope_id, [])):
+                    completed.append(agreement_id)
+                
+                del pending[envelope_id]
+                if agreement.get('last_activity') != last_activity:
+                    self.scheduler.record_activity(agreement_id)
+                else:
+                    self.scheduler.record_idle(agreement_id)
+        finally:
+            for agreement_id in pending.values():
+                self.scheduler.record_idle(agreement_id)
+        return completed
+    
+    def stop_polling_completed(self, completed):
+        """
+        Fully signed envelopes need no more provider calls; the retry queue
+        finishes their chain operations.
+        """
+        blocked = self.retry_queue.blocked_agreements()
+        for agreement_id in completed:
+            if agreement_id in blocked:
+                self.scheduler.remove(agreement_id)
+    
+    def poll_failed(self, provider, batch, error):
+        """
+        Reschedule a batch whose status request failed.
+        """
+        if isinstance(error, ProviderRateLimitError):
+            # The provider limit is account-wide, so hold back all of its requests
+            print(f"{provider.name} rate limit hit, retrying in {error.retry_after:.0f} seconds")
+            self.rate_limiters[provider.name.lower()].pause(error.retry_after)
+            for agreement_id in batch:
+                self.scheduler.defer(agreement_id, error.retry_after)
+        else:
+            print(f"Error polling {provider.name} for agreements {batch}: {str(error)}")
+            for agreement_id in batch:
+                self.scheduler.record_idle(agreement_id)
+    
+    def fetch_status(self, provider, envelope_ids):
+        """
+        Fetch envelope statuses from a provider, recording latency and failures.
+        """
+        try:
+            with self.provider_request_seconds.time(provider=provider.name):
+                return provider.fetch_status_changes(envelope_ids)
+        except ProviderRateLimitError:
+            self.provider_errors.inc(provider=provider.name, reason="rate_limited")
+            raise
+        except Exception:
+            self.provider_errors.inc(provider=provider.name, reason="error")
+            raise
+    
+    async def run_blocking(self, func, *args):
+        """
+        Run a blocking provider call on the engine's provider I/O thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    async def run_chain(self, func, *args):
+        """
+        Run a blocking Algorand call on the engine's chain I/O thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._chain_executor, functools.partial(func, *args))
+    
+    def sync_schedule(self):
+        """
+        Keep the polling schedule in step with the tracked agreements.
+        """
+        blocked = self.retry_queue.blocked_agreements()
+        for agreement_id in self.tracked_agreements:
+            if agreement_id not in self.scheduler and agreement_id not in blocked:
+                self.scheduler.add(agreement_id, delay=0)
+        for agreement_id in [a for a in self.scheduler if a not in self.tracked_agreements]:
+            self.scheduler.remove(agreement_id)
@@ -0,0 +1,316 @@
+import asyncio
+import time
+
+"""
+Staged Verifier Pipeline
+
+Purpose: Run the verification engine as independent stages connected by
+bounded queues, so a slow Algorand node cannot stall provider polling and a
+burst of signatures cannot pile up in memory:
+
+    dispatch -> [ingest] -> pollers -> [resolve] -> resolvers -> retry queue
+    retry queue -> feeder -> [submit] -> submitters -> [confirm] -> confirmers
+    retry queue -> feeder -> [execute] -> executors (standalone executions)
+    resolvers -> [verify] -> document verifiers (completed envelopes)
+
+Each bracketed queue is bounded; a full queue makes its producer wait
+(backpressure). Resolved signatures are persisted in the engine's retry queue,
+which buffers them between ingestion and chain submission. Queue depth and
+busy workers per stage are exported as metrics.
+"""
+
+
+class StageQueue:
+    """
+    Bounded queue feeding one pipeline stage, with occupancy metrics.
+    """
+    
+    def __init__(self, name, maxsize, metrics):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = asyncio.Queue(maxsize)
+        self._depth = metrics.gauge(
+            "verifier_stage_queue_depth", "Items waiting in a pipeline stage queue", ["stage"])
+        self._backpressure = metrics.counter(
+            "verifier_stage_backpressure_total", "Puts that waited for space in a full stage queue", ["stage"])
+        metrics.gauge(
+            "verifier_stage_queue_capacity", "Capacity of a pipeline stage queue", ["stage"]
+        ).set(maxsize, stage=name)
+        self._depth.set(0, stage=name)
+    
+    def qsize(self):
+        return self._queue.qsize()
+    
+    async def put(self, item):
+        if self._queue.full():
+            self._backpressure.inc(stage=self.name)
+        await self._queue.put(item)
+        self._depth.set(self._queue.qsize(), stage=self.name)
+    
+    async def get(self, timeout=None):
+        """
+        Take the next item, waiting up to `timeout` seconds (forever if None).
+        
+        Raises:
+            asyncio.TimeoutError: If no item arrived in time
+        """
+        if timeout is None:
+            item = await self._queue.get()
+        else:
+            item = await asyncio.wait_for(self._queue.get(), timeout)
+        self._depth.set(self._queue.qsize(), stage=self.name)
+        return item
+
+
+class VerifierPipeline:
+    """
+    Staged, backpressured runner for a VerificationEngine.
+    """
+    
+    STAGES = ("ingest", "resolve", "submit", "confirm", "execute", "verify")
+    
+    def __init__(self, engine, poll_concurrency=4, resolve_concurrency=1, submit_concurrency=1,
+                 confirm_concurrency=4, execute_concurrency=2, verify_concurrency=2, queue_size=256,
+                 submit_batch_size=64, submit_linger=0.25, idle_interval=1.0):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            engine: The VerificationEngine whose state the stages operate on
+            poll_concurrency: Provider requests in flight
+            resolve_concurrency: Workers applying provider results and resolving identities
+            submit_concurrency: Workers building and sending mark_signed batches
+            confirm_concurrency: Submitted batches awaiting confirmation at once
+            execute_concurrency: Standalone executions sent and awaiting confirmation at once
+            verify_concurrency: Completed documents downloaded and hashed at once
+            queue_size: Capacity of each stage queue
+            submit_batch_size: Maximum marks per submission batch
+            submit_linger: Seconds a submitter waits to fill a batch
+            idle_interval: Longest sleep of the dispatcher and feeder when there is no work
+        """
+        self.engine = engine
+        self.concurrency = {
+            'ingest': poll_concurrency,
+            'resolve': resolve_concurrency,
+            'submit': submit_concurrency,
+            'confirm': confirm_concurrency,
+            'execute': execute_concurrency,
+            'verify': verify_concurrency
+        }
+        self.queue_size = queue_size
+        self.submit_batch_size = submit_batch_size
+        self.submit_linger = submit_linger
+        self.idle_interval = idle_interval
+        
+        self.queues = {}
+        self.busy = {stage: 0 for stage in self.STAGES}
+        self._busy_gauge = engine.metrics.gauge(
+            "verifier_stage_busy_workers", "Pipeline workers currently processing an item", ["stage"])
+        self._in_flight = set()  # op_keys handed to the submit stage and not yet settled
+        self._work_available = None
+    
+    def occupancy(self):
+        """
+        Current queue depth and busy workers of every stage.
+        
+        Returns:
+            dict: stage -> {'queued', 'capacity', 'busy', 'workers'}
+        """
+        return {
+            stage: {
+                'queued': self.queues[stage].qsize() if stage in self.queues else 0,
+                'capacity': self.queue_size,
+                'busy': self.busy[stage],
+                'workers': self.concurrency[stage]
+            }
+            for stage in self.STAGES
+        }
+    
+    async def run(self):
+        """
+        Run every stage until cancelled.
+        """
+        metrics = self.engine.metrics
+        self.queues = {stage: StageQueue(stage, self.queue_size, metrics) for stage in self.STAGES}
+        self._work_available = asyncio.Event()
+        
+        workers = [self._dispatch(), self._feed()]
+        workers += [self._worker('ingest', self._poll) for _ in range(self.concurrency['ingest'])]
+        workers += [self._worker('resolve', self._resolve) for _ in range(self.concurrency['resolve'])]
+        workers += [self._submitter() for _ in range(self.concurrency['submit'])]
+        workers += [self._worker('confirm', self._confirm) for _ in range(self.concurrency['confirm'])]
+        workers += [self._worker('execute', self._execute) for _ in range(self.concurrency['execute'])]
+        workers += [self._worker('verify', self._verify) for _ in range(self.concurrency['verify'])]
+        await asyncio.gather(*workers)
+    
+    async def _worker(self, stage, handle):
+        while True:
+            item = await self.queues[stage].get()
+            await self._process(stage, handle, item)
+    
+    async def _process(self, stage, handle, item):
+        self._set_busy(stage, 1)
+        try:
+            await handle(item)
+        except Exception as e:
+            print(f"Error in {stage} stage: {str(e)}")
+        finally:
+            self._set_busy(stage, -1)
+    
+    def _set_busy(self, stage, delta):
+        self.busy[stage] += delta
+        self._busy_gauge.set(self.busy[stage], stage=stage)
+    
+    # ===== Ingest =====
+    
+    async def _dispatch(self):
+        """
+        Hand due envelopes to the pollers, batch by batch; waits while the ingest queue is full.
+        """
+        engine = self.engine
+        while True:
+            engine.sync_schedule()
+            due = engine.scheduler.pop_due()
+            engine.due_envelopes_gauge.set(len(due))
+            for provider, batch in engine.provider_batches(due):
+                await self.queues['ingest'].put((provider, batch))
+            
+            engine.tracked_gauge.set(len(engine.tracked_agreements))
+            engine.pending_marks_gauge.set(len(engine.pending_marks))
+            engine.retry_queue_gauge.set(len(engine.retry_queue))
+            
+            wait = engine.scheduler.seconds_until_next()
+            await asyncio.sleep(self.idle_interval if wait is None else min(wait, self.idle_interval))
+    
+    async def _poll(self, item):
+        provider, batch = item
+        engine = self.engine
+        envelopes = {
+            engine.tracked_agreements[a]['envelope_id']: a for a in batch if a in engine.tracked_agreements
+        }
+        if not envelopes:
+            return
+        try:
+            await engine.rate_limiters[provider.name.lower()].acquire()
+            payload = await engine.run_blocking(engine.fetch_status, provider, list(envelopes))
+        except Exception as e:
+            engine.poll_failed(provider, list(envelopes.values()), e)
+            return
+        await self.queues['resolve'].put((provider, envelopes, payload))
+    
+    async def _resolve(self, item):
+        provider, envelopes, payload = item
+        completed = self.engine.resolve_batch(provider, envelopes, payload)
+        self.engine.stop_polling_completed(completed)
+        self._work_available.set()
+        for item in self.engine.claim_completed_documents(completed):
+            await self.queues['verify'].put(item)
+    
+    async def _verify(self, item):
+        await self.engine.verify_documents([item])
+    
+    # ===== Chain Submission =====
+    
+    async def _feed(self):
+        """
+        Move due chain operations from the retry queue into the submit and execute stages.
+        """
+        engine = self.engine
+        while True:
+            self._work_available.clear()
+            for op in engine.due_mark_ops(exclude=self._in_flight).values():
+                self._in_flight.add(op['op_key'])
+                await self.queues['submit'].put(op)
+            
+            for op in engine.due_executions(exclude=self._in_flight):
+                self._in_flight.add(op['op_key'])
+                await self.queues['execute'].put(op)
+            
+            wait = engine.retry_queue.seconds_until_next(engine.tracked_agreements)
+            timeout = self.idle_interval if wait is None else min(max(wait, 0.01), self.idle_interval)
+            try:
+                await asyncio.wait_for(self._work_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _submitter(self):
+        queue = self.queues['submit']
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.submit_linger
+            while len(batch) < self.submit_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await queue.get(timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._process('submit', self._submit, batch)
+    
+    async def _submit(self, batch):
+        engine = self.engine
+        ops = {}
+        for op in batch:
+            if op['agreement_id'] in engine.tracked_agreements:
+                ops[(op['agreement_id'], op['payload']['wallet'])] = op
+            else:
+                self._in_flight.discard(op['op_key'])
+        
+        # Only submit writes where on-chain state actually differs
+        agreement_ids = {agreement_id for agreement_id, _ in ops}
+        statuses = await engine.run_chain(engine.read_signer_statuses, agreement_ids)
+        engine.reconcile_chain_state(agreement_ids, statuses)
+        before = {op['op_key'] for op in ops.values()}
+        engine.drop_reconciled_marks(ops)
+        self._in_flight.difference_update(before - {op['op_key'] for op in ops.values()})
+        if not ops:
+            return
+        
+        started = time.perf_counter()
+        try:
+            submitted = await engine.run_chain(
+                engine.document_client.send_signature_batch,
+                engine.verifier_private_key, list(ops), engine.completing_agreements(ops)
+            )
+        except Exception as e:
+            self._settle_failure(ops, e)
+            return
+        await self.queues['confirm'].put((ops, submitted, started))
+    
+    async def _confirm(self, item):
+        ops, submitted, started = item
+        engine = self.engine
+        try:
+            confirmed, executed = await engine.run_chain(
+                engine.document_client.confirm_signature_batch, submitted
+            )
+        except Exception as e:
+            self._settle_failure(ops, e)
+            return
+        
+        engine.chain_submit_seconds.observe(time.perf_counter() - started)
+        engine.apply_mark_results(ops, confirmed, executed)
+        self._in_flight.difference_update(op['op_key'] for op in ops.values())
+        self._work_available.set()
+    
+    def _settle_failure(self, ops, error):
+        print(f"Error submitting signatures: {str(error)}")
+        self.engine.mark_submission_failed(ops, error)
+        self._in_flight.difference_update(op['op_key'] for op in ops.values())
+    
+    async def _execute(self, op):
+        """
+        Execute one fully signed agreement whose marks landed without an execution.
+        """
+        engine = self.engine
+        executed = False
+        try:
+            if op['agreement_id'] in engine.tracked_agreements:
+                executed = await engine.run_chain(engine.execute_if_complete, op['agreement_id'])
+        except Exception as e:
+            engine.settle_execution(op, e)
+        else:
+            engine.settle_execution(op, executed=executed)
+        finally:
+            self._in_flight.discard(op['op_key'])
@@ -0,0 +1,409 @@
+import bisect
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from algosdk.v2client import algod
+from docusign_verifier import DocuSignVerifier
+
+"""
+Sharded Verifier Workers
+
+Purpose: Scale the verifier horizontally by partitioning agreements across
+N worker processes (or hosts sharing a volume) with consistent hashing on the
+agreement ID. Workers heartbeat into a shared SQLite store, rebuild the hash
+ring from the live worker set every tick, and hand agreements over when
+workers join or leave.
+"""
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring mapping agreement IDs to worker IDs.
+
+    Each worker is placed on the ring `replicas` times so that adding or
+    removing one worker only moves about 1/N of the agreements.
+    """
+
+    def __init__(self, nodes=(), replicas=64):
+        """
+        Initialize the ring.
+
+        Args:
+            nodes: Initial worker IDs
+            replicas: Virtual points per worker on the ring
+        """
+        self.replicas = replicas
+        self._points = []  # sorted ring positions
+        self._owners = {}  # ring position -> worker ID
+        self._nodes = set()
+
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self):
+        return sorted(self._nodes)
+
+    def add_node(self, node):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove_node(self, node):
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.remove(point)
+
+    def owner(self, key):
+        """
+        Return the worker responsible for a key, or None if the ring is empty.
+        """
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(str(key))) % len(self._points)
+        return self._owners[self._points[index]]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.sha256(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class ShardStore:
+    """
+    SQLite store shared by all workers: live workers, agreements and their owners.
+    """
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) the shared store.
+
+        Args:
+            path: Path of the SQLite database file shared by all workers
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "worker_id TEXT PRIMARY KEY, last_heartbeat REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS agreements ("
+                "agreement_id INTEGER PRIMARY KEY, record TEXT NOT NULL, "
+                "owner TEXT, claimed_at REAL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ===== Workers =====
+
+    def heartbeat(self, worker_id, now=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (worker_id, last_heartbeat) VALUES (?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat",
+                (worker_id, time.time() if now is None else now)
+            )
+
+    def remove_worker(self, worker_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+            conn.execute("UPDATE agreements SET owner = NULL WHERE owner = ?", (worker_id,))
+
+    def live_workers(self, ttl, now=None):
+        """
+        Return the IDs of workers that sent a heartbeat within the last `ttl` seconds.
+        """
+        cutoff = (time.time() if now is None else now) - ttl
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT worker_id FROM workers WHERE last_heartbeat >= ? ORDER BY worker_id",
+                (cutoff,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # ===== Agreements =====
+
+    def put_agreement(self, agreement_id, record):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO agreements (agreement_id, record) VALUES (?, ?) "
+                "ON CONFLICT(agreement_id) DO UPDATE SET record = excluded.record",
+                (agreement_id, _encode_record(record))
+            )
+
+    def update_owned_agreement(self, agreement_id, record, worker_id):
+        """
+        Store an agreement's progress only if `worker_id` still owns it.
+
+        Returns:
+            bool: True if the record was written
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE agreements SET record = ? WHERE agreement_id = ? AND owner = ?",
+                (_encode_record(record), agreement_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def remove_agreement(self, agreement_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM agreements WHERE agreement_id = ?", (agreement_id,))
+
+    def agreement_ids(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT agreement_id FROM agreements").fetchall()
+        return [row[0] for row in rows]
+
+    def load_agreements(self, agreement_ids):
+        """
+        Return {agreement_id: record} for the requested agreements.
+        """
+        records = {}
+        with self._connect() as conn:
+            for agreement_id in agreement_ids:
+                row = conn.execute(
+                    "SELECT record FROM agreements WHERE agreement_id = ?", (agreement_id,)
+                ).fetchone()
+                if row:
+                    records[agreement_id] = _decode_record(row[0])
+        return records
+
+    def owners(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT agreement_id, owner FROM agreements").fetchall()
+        return {agreement_id: owner for agreement_id, owner in rows}
+
+    def claim(self, agreement_id, worker_id, live_workers):
+        """
+        Take ownership of an agreement unless another live worker still holds it.
+
+        Returns:
+            bool: True if `worker_id` owns the agreement after the call
+        """
+        placeholders = ",".join("?" for _ in live_workers) or "NULL"
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE agreements SET owner = ?, claimed_at = ? WHERE agreement_id = ? "
+                f"AND (owner IS NULL OR owner = ? OR owner NOT IN ({placeholders}))",
+                (worker_id, time.time(), agreement_id, worker_id, *live_workers)
+            )
+            row = conn.execute(
+                "SELECT owner FROM agreements WHERE agreement_id = ?", (agreement_id,)
+            ).fetchone()
+        return bool(row) and row[0] == worker_id
+
+    def release(self, agreement_id, worker_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE agreements SET owner = NULL WHERE agreement_id = ? AND owner = ?",
+                (agreement_id, worker_id)
+            )
+
+
+def _encode_record(record):
+    encoded = dict(record)
+    encoded['signed_by'] = sorted(record.get('signed_by', ()))
+    if isinstance(encoded.get('document_hash'), bytes):
+        encoded['document_hash'] = encoded['document_hash'].hex()
+    return json.dumps(encoded)
+
+
+def _decode_record(data):
+    record = json.loads(data)
+    record['signed_by'] = set(record.get('signed_by', ()))
+    if isinstance(record.get('document_hash'), str):
+        record['document_hash'] = bytes.fromhex(record['document_hash'])
+    return record
+
+
+class ShardedVerifierWorker:
+    """
+    Runs a verifier over the share of agreements the hash ring assigns to this worker.
+    """
+
+    def __init__(self, verifier, store, worker_id=None, heartbeat_ttl=30, replicas=64):
+        """
+        Initialize the worker.
+
+        Args:
+            verifier: The verification engine that polls and writes for this worker
+            store: The ShardStore shared by all workers
+            worker_id: Unique worker ID (defaults to host:pid:random)
+            heartbeat_ttl: Seconds without a heartbeat before a worker is considered gone
+            replicas: Virtual ring points per worker
+        """
+        self.verifier = verifier
+        self.store = store
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_ttl = heartbeat_ttl
+        self.replicas = replicas
+        self.owned = set()
+
+    def register_agreement(self, document_bytes, provider, wallet_signers, email_signers):
+        """
+        Create an agreement and publish it to the shared store for its owning worker.
+
+        Returns:
+            agreement_id: The on-chain agreement ID
+        """
+        agreement_id = self.verifier.register_agreement(
+            document_bytes, provider, wallet_signers, email_signers
+        )
+        self.store.put_agreement(agreement_id, self.verifier.tracked_agreements[agreement_id])
+
+        # The owner picks it up on its next rebalance
+        if agreement_id not in self.owned:
+            self._drop(agreement_id)
+
+        return agreement_id
+
+    def rebalance(self):
+        """
+        Heartbeat, rebuild the ring from live workers and adjust owned agreements.
+        """
+        self.store.heartbeat(self.worker_id)
+        live = self.store.live_workers(self.heartbeat_ttl)
+        ring = ConsistentHashRing(live, replicas=self.replicas)
+
+        # A tick that outlasted the heartbeat TTL may have let other workers take over
+        # agreements; they own the stored progress now, so drop without persisting
+        owners = self.store.owners()
+        for agreement_id in [a for a in self.owned if owners.get(a) != self.worker_id]:
+            self._drop(agreement_id)
+            self.owned.discard(agreement_id)
+
+        assigned = {a for a in self.store.agreement_ids() if ring.owner(a) == self.worker_id}
+
+        # Hand over agreements that moved to another worker
+        for agreement_id in self.owned - assigned:
+            self._persist(agreement_id)
+            self._drop(agreement_id)
+            self.store.release(agreement_id, self.worker_id)
+            self.owned.discard(agreement_id)
+
+        # Pick up newly assigned agreements once their previous owner let go
+        claimed = [a for a in assigned - self.owned if self.store.claim(a, self.worker_id, live)]
+        for agreement_id, record in self.store.load_agreements(claimed).items():
+            self.verifier.tracked_agreements[agreement_id] = record
+            for email, wallet in zip(record['email_signers'], record['wallet_signers']):
+                self.verifier.identity_cache[email] = wallet
+            self.owned.add(agreement_id)
+
+        if claimed or len(self.owned) != len(assigned):
+            print(f"Worker {self.worker_id} owns {len(self.owned)} agreements "
+                  f"({len(live)} live workers)")
+
+    def run_tick(self):
+        """
+        Rebalance, run one verifier tick and persist progress.
+
+        Returns:
+            float: Seconds to sleep before the next tick
+        """
+        self.rebalance()
+        wait = self.verifier.run_monitor_tick()
+
+        for agreement_id in list(self.owned):
+            if agreement_id in self.verifier.tracked_agreements:
+                self._persist(agreement_id)
+            else:
+                # Executed and dropped by the verifier
+                self.store.remove_agreement(agreement_id)
+                self.owned.discard(agreement_id)
+
+        # Heartbeat well within the TTL so ownership stays stable
+        return min(wait, self.heartbeat_ttl / 3)
+
+    def run(self):
+        """
+        Run the worker until interrupted, leaving the ring cleanly on exit.
+        """
+        print(f"Starting sharded verifier worker {self.worker_id}...")
+        try:
+            while True:
+                time.sleep(self.run_tick())
+        finally:
+            for agreement_id in list(self.owned):
+                self._persist(agreement_id)
+            self.store.remove_worker(self.worker_id)
+
+    def _persist(self, agreement_id):
+        record = self.verifier.tracked_agreements.get(agreement_id)
+        if record is not None:
+            self.store.update_owned_agreement(agreement_id, record, self.worker_id)
+
+    def _drop(self, agreement_id):
+        self.verifier.tracked_agreements.pop(agreement_id, None)
+        for pair in [p for p in self.verifier.pending_marks if p[0] == agreement_id]:
+            del self.verifier.pending_marks[pair]
+
+
+def _worker_main(store_path, algod_address, algod_token, identity_app_id, agreement_app_id,
+                 metrics_port=None):
+    algod_client = algod.AlgodClient(algod_token, algod_address)
+    verifier = DocuSignVerifier(algod_client, identity_app_id, agreement_app_id)
+    if metrics_port is not None:
+        verifier.serve_metrics(metrics_port)
+    ShardedVerifierWorker(verifier, ShardStore(store_path)).run()
+
+
+def run_sharded_verifiers(num_workers, store_path, algod_address, algod_token,
+                          identity_app_id, agreement_app_id, metrics_port=None):
+    """
+    Start `num_workers` verifier processes sharing one shard store and wait for them.
+
+    If `metrics_port` is given, worker i serves its metrics on `metrics_port + i`.
+    """
+    ShardStore(store_path)  # Create the schema once before the workers race for it
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(store_path, algod_address, algod_token, identity_app_id, agreement_app_id,
+                  None if metrics_port is None else metrics_port + i),
+            name=f"verifier-worker-{i}"
+        )
+        for i in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def main():
+    run_sharded_verifiers(
+        int(os.environ.get("VERIFIER_WORKERS", "4")),
+        os.environ.get("VERIFIER_SHARD_STORE", "verifier_shards.db"),
+        os.environ.get("ALGOD_ADDRESS", "https://testnet-api.algonode.cloud"),
+        os.environ.get("ALGOD_TOKEN", ""),
+        int(os.environ.get("IDENTITY_APP_ID", "0")),
+        int(os.environ.get("AGREEMENT_APP_ID", "0")),
+        int(os.environ["VERIFIER_METRICS_PORT"]) if os.environ.get("VERIFIER_METRICS_PORT") else None
+    )
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import os
 import sys
 import traceback
 from dotenv import load_dotenv
-from algosdk import account, mnemonic, transaction
+from algosdk import abi, account, mnemonic, transaction
 from algosdk.v2client import algod
 from algosdk.error import AlgodHTTPError
 
@@ -62,6 +62,11 @@ def wait_for_confirmation(client, txid):
     print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
     return txinfo
 
+def method_args(signature, *args):
+    """App args calling the ARC-4 method with this signature: its selector, then each argument ABI-encoded."""
+    method = abi.Method.from_signature(signature)
+    return [method.get_selector()] + [arg.type.encode(value) for arg, value in zip(method.args, args)]
+
 def call_app(client, sender_private_key, app_id, app_args, accounts=None, foreign_apps=None, foreign_assets=None):
     """Call a smart contract application."""
     sender = account.address_from_private_key(sender_private_key)
@@ -207,7 +212,7 @@ def test_identity_registry():
             client,
             ADMIN_PRIVATE_KEY,
             IDENTITY_APP_ID,
-            [b"add_verifier", verifier_address.encode()]
+            method_args("add_verifier(address)void", verifier_address)
         )
         print(f"Verifier {verifier_address} added.")
     except Exception as e:
@@ -245,7 +250,7 @@ def test_identity_registry():
             client,
             user_private_key,
             IDENTITY_APP_ID,
-            [b"register_identity", claim_type.encode(), claim_value.encode()]
+            method_args("register_identity(string,string)void", claim_type, claim_value)
         )
         print(f"Identity claim registered: {claim_type}:{claim_value}")
     except Exception as e:
@@ -286,7 +291,8 @@ def test_identity_registry():
             client,
             verifier_private_key,
             IDENTITY_APP_ID,
-            [b"verify_identity", user_address.encode(), claim_type.encode()]
+            method_args("verify_identity(address,string)void", user_address, claim_type),
+            accounts=[user_address]
         )
         print(f"Identity claim verification attempted.")
     except Exception as e:
@@ -318,7 +324,7 @@ def test_identity_registry():
             client,
             user_private_key,
             IDENTITY_APP_ID,
-            [b"update_claim", claim_type.encode(), claim_value.encode(), new_claim_value.encode()]
+            method_args("update_claim(string,string,string)void", claim_type, claim_value, new_claim_value)
         )
         print(f"Identity claim update attempted: {claim_type}:{claim_value} -> {new_claim_value}")
     except Exception as e:
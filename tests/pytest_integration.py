@@ -5,22 +5,32 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, "src"))
 
 import pytest
 import base64
 import time
-from algosdk import account, mnemonic, transaction
+from algosdk import abi, account, logic, mnemonic
+from algosdk.future import transaction
 from algosdk.v2client import algod
 from algosdk.encoding import decode_address, encode_address
+from algosdk.error import AlgodHTTPError
 from pyteal import compileTeal, Mode
+from document_client_sdk import (
+    DocumentExecutionClient, method_args, decode_agreement_record, mark_batch_size,
+    agreement_box_name, signer_box_name, mask_box_name, meta_box_name,
+    AGREEMENT_FLAG_EXECUTED, BOX_IO_REFS, CREATE_SIGNERS, SIGNER_ENTRY_SIZE
+)
 
 # Now we can import from the contracts package
 from contracts.identity_registry import approval_program as identity_approval, clear_state_program as identity_clear
 from contracts.agreement_registry import approval_program as agreement_approval, clear_state_program as agreement_clear
+from contracts.agreement_registry import TEAL_VERSION as AGREEMENT_TEAL_VERSION
 from contracts.execution_router import approval_program as router_approval, clear_state_program as router_clear
 from contracts.escrow_release_handler import approval_program as escrow_approval, clear_state_program as escrow_clear
 from contracts.asset_transfer_handler import approval_program as asset_approval, clear_state_program as asset_clear
 from contracts.contract_deployment_handler import approval_program as deploy_approval, clear_state_program as deploy_clear
+from contracts import identity_registry, agreement_registry, execution_router, escrow_release_handler
 
 # Test file path
 import os
@@ -79,9 +89,9 @@ def accounts(algod_client):
 @pytest.fixture(scope="module")
 def compiled_contracts(algod_client):
     """Compile all contract programs."""
-    def compile_program(client, program):
+    def compile_program(client, program, version=6):
         """Compile a PyTeal program to TEAL binary."""
-        teal = compileTeal(program, Mode.Application, version=6)
+        teal = compileTeal(program, Mode.Application, version=version)
         compile_result = client.compile(teal)
         return base64.b64decode(compile_result["result"])
     
@@ -95,8 +105,8 @@ def compiled_contracts(algod_client):
     
     # Agreement Registry
     contracts["agreement"] = {
-        "approval": compile_program(algod_client, agreement_approval()),
-        "clear": compile_program(algod_client, agreement_clear())
+        "approval": compile_program(algod_client, agreement_approval(), AGREEMENT_TEAL_VERSION),
+        "clear": compile_program(algod_client, agreement_clear(), AGREEMENT_TEAL_VERSION)
     }
     
     # Execution Router
@@ -160,31 +170,31 @@ def deployed_apps(algod_client, accounts, compiled_contracts):
     app_ids["agreement"] = deploy_app(
         "agreement", 
         transaction.StateSchema(num_uints=64, num_byte_slices=128),
-        transaction.StateSchema(num_uints=32, num_byte_slices=32)
+        transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     app_ids["router"] = deploy_app(
         "router", 
         transaction.StateSchema(num_uints=32, num_byte_slices=64),
-        transaction.StateSchema(num_uints=16, num_byte_slices=16)
+        transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     app_ids["escrow"] = deploy_app(
         "escrow", 
         transaction.StateSchema(num_uints=16, num_byte_slices=32),
-        transaction.StateSchema(num_uints=8, num_byte_slices=8)
+        transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     app_ids["asset"] = deploy_app(
         "asset", 
         transaction.StateSchema(num_uints=32, num_byte_slices=64),
-        transaction.StateSchema(num_uints=16, num_byte_slices=16)
+        transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     app_ids["deploy"] = deploy_app(
         "deploy", 
         transaction.StateSchema(num_uints=32, num_byte_slices=64),
-        transaction.StateSchema(num_uints=16, num_byte_slices=16)
+        transaction.StateSchema(num_uints=0, num_byte_slices=0)
     )
     
     return app_ids
@@ -214,40 +224,85 @@ def configured_apps(algod_client, accounts, deployed_apps):
         return result
     
     # 1. Add verifier to Identity Registry
-    call_app(app_ids["identity"], [b"add_verifier", decode_address(verifier["address"])])
+    call_app(app_ids["identity"], abi_args(identity_registry.ADD_VERIFIER, verifier["address"]))
     print(f"Added verifier {verifier['address']} to Identity Registry")
     
     # 2. Add verifier to Agreement Registry
-    call_app(app_ids["agreement"], [b"add_verifier", decode_address(verifier["address"])])
+    call_app(app_ids["agreement"], abi_args(agreement_registry.ADD_VERIFIER, verifier["address"]))
     print(f"Added verifier {verifier['address']} to Agreement Registry")
     
     # 3. Connect Agreement Registry to Execution Router
-    call_app(app_ids["agreement"], [b"set_execution_router", app_ids["router"].to_bytes(8, "big")])
+    call_app(app_ids["agreement"], abi_args(agreement_registry.SET_EXECUTION_ROUTER, app_ids["router"]))
     print(f"Connected Agreement Registry to Execution Router")
     
     # 4. Connect Execution Router to Agreement Registry
-    call_app(app_ids["router"], [b"set_agreement_registry", app_ids["agreement"].to_bytes(8, "big")])
+    call_app(app_ids["router"], abi_args(execution_router.SET_AGREEMENT_REGISTRY, app_ids["agreement"]))
     print(f"Connected Execution Router to Agreement Registry")
     
     # 5. Add administrator as executor to Execution Router
-    call_app(app_ids["router"], [b"add_executor", decode_address(admin["address"])])
+    call_app(app_ids["router"], abi_args(execution_router.ADD_EXECUTOR, admin["address"]))
     print(f"Added admin as executor to Execution Router")
     
     # 6. Set up handlers to know about the router
-    call_app(app_ids["escrow"], [b"set_router", app_ids["router"].to_bytes(8, "big")])
-    call_app(app_ids["asset"], [b"set_router", app_ids["router"].to_bytes(8, "big")])
-    call_app(app_ids["deploy"], [b"set_router", app_ids["router"].to_bytes(8, "big")])
+    call_app(app_ids["escrow"], abi_args(escrow_release_handler.SET_ROUTER, app_ids["router"]))
+    call_app(app_ids["asset"], abi_args(escrow_release_handler.SET_ROUTER, app_ids["router"]))
+    call_app(app_ids["deploy"], abi_args(escrow_release_handler.SET_ROUTER, app_ids["router"]))
     print(f"Connected all handlers to Execution Router")
     
     # 7. Register action types with Execution Router
-    call_app(app_ids["router"], [b"register_action_type", b"escrow_release", app_ids["escrow"].to_bytes(8, "big")])
-    call_app(app_ids["router"], [b"register_action_type", b"asset_transfer", app_ids["asset"].to_bytes(8, "big")])
-    call_app(app_ids["router"], [b"register_action_type", b"deploy_contract", app_ids["deploy"].to_bytes(8, "big")])
+    call_app(app_ids["router"], abi_args(execution_router.REGISTER_ACTION_TYPE, "escrow_release", app_ids["escrow"]))
+    call_app(app_ids["router"], abi_args(execution_router.REGISTER_ACTION_TYPE, "asset_transfer", app_ids["asset"]))
+    call_app(app_ids["router"], abi_args(execution_router.REGISTER_ACTION_TYPE, "deploy_contract", app_ids["deploy"]))
     print(f"Registered all action types with Execution Router")
     
     return app_ids
 
-# Helper functions 
+@pytest.fixture(scope="module")
+def sandbox(algod_client):
+    """Skip the registry behaviour tests when no sandbox is running."""
+    try:
+        algod_client.status()
+    except Exception as e:
+        pytest.skip(f"No Algorand sandbox at {ALGOD_ADDRESS}: {str(e)}")
+
+@pytest.fixture(scope="module")
+def registry_app(sandbox, algod_client, accounts, compiled_contracts):
+    """A fresh Agreement Registry without router, funded for its boxes, with accounts[1] as verifier."""
+    admin = accounts[0]
+    verifier = accounts[1]
+
+    txn = transaction.ApplicationCreateTxn(
+        sender=admin["address"],
+        sp=algod_client.suggested_params(),
+        on_complete=transaction.OnComplete.NoOpOC,
+        approval_program=compiled_contracts["agreement"]["approval"],
+        clear_program=compiled_contracts["agreement"]["clear"],
+        global_schema=transaction.StateSchema(num_uints=64, num_byte_slices=128),
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0)
+    )
+    tx_id = algod_client.send_transaction(txn.sign(admin["private_key"]))
+    app_id = transaction.wait_for_confirmation(algod_client, tx_id, 10)["application-index"]
+
+    # Box storage is paid from the app account's minimum balance
+    txn = transaction.PaymentTxn(
+        admin["address"], algod_client.suggested_params(), logic.get_application_address(app_id), 10_000_000
+    )
+    tx_id = algod_client.send_transaction(txn.sign(admin["private_key"]))
+    transaction.wait_for_confirmation(algod_client, tx_id, 10)
+
+    app_call(algod_client, admin, app_id, abi_args(agreement_registry.ADD_VERIFIER, verifier["address"]))
+    return app_id
+
+@pytest.fixture
+def registry(algod_client, registry_app):
+    """SDK client of the fresh Agreement Registry."""
+    return DocumentExecutionClient(algod_client, 0, registry_app)
+
+# Helper functions
+def abi_args(signature, *args):
+    """App args calling the ARC-4 method with this signature."""
+    return method_args(abi.Method.from_signature(signature), *args)
+
 def app_call(client, caller, app_id, app_args, accounts=None, apps=None, assets=None):
     """Call an application method."""
     sp = client.suggested_params()
@@ -290,6 +345,73 @@ def app_optin(client, account, app_id):
     print(f"Account {account['address']} opted into app {app_id}")
     return result
 
+def registry_call(client, caller, app_id, app_args, boxes=()):
+    """An unsigned Agreement Registry call referencing these boxes (b"" adds box I/O budget)."""
+    return transaction.ApplicationNoOpTxn(
+        sender=caller["address"],
+        sp=client.suggested_params(),
+        index=app_id,
+        app_args=app_args,
+        boxes=[(0, name) for name in boxes]
+    )
+
+def send_group(client, caller, txns):
+    """Sign and send calls as one atomic group; returns the confirmed first transaction."""
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    signed_txns = [txn.sign(caller["private_key"]) for txn in txns]
+    client.send_transactions(signed_txns)
+    return transaction.wait_for_confirmation(client, signed_txns[0].get_txid(), 10)
+
+def signature_boxes(agreement_id):
+    """Box refs of an agreement's record, signers and bitmap, padded to the signer box's I/O budget."""
+    names = [agreement_box_name(agreement_id), signer_box_name(agreement_id), mask_box_name(agreement_id)]
+    return names + [b""] * (BOX_IO_REFS - len(names))
+
+def box_value(client, app_id, name):
+    """The contents of an app box, or None if it does not exist."""
+    try:
+        return base64.b64decode(client.application_box_by_name(app_id, name)["value"])
+    except AlgodHTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+def decoded_logs(result):
+    """The raw logs of a confirmed transaction."""
+    return [base64.b64decode(log) for log in result.get("logs", [])]
+
+def next_agreement_id(client, app_id):
+    """The ID the Agreement Registry gives its next agreement."""
+    for entry in client.application_info(app_id)["params"].get("global-state", []):
+        if base64.b64decode(entry["key"]) == b"agreement_counter":
+            return entry["value"]["uint"]
+    return 0
+
+def new_signers(count):
+    """Fresh signer addresses in the ascending order the registry requires."""
+    return sorted((account.generate_account()[1] for _ in range(count)), key=decode_address)
+
+def create_agreement(client, caller, app_id, signers, document_hash=b"\x01" * 32):
+    """Create an agreement with up to CREATE_SIGNERS signers and return its ID."""
+    agreement_num = next_agreement_id(client, app_id)
+    send_group(client, caller, [registry_call(
+        client, caller, app_id,
+        abi_args(agreement_registry.CREATE_AGREEMENT, document_hash, b"behaviour".ljust(16, b"\0"), signers),
+        signature_boxes(agreement_num)
+    )])
+    return agreement_num
+
+def signer_entries(client, app_id, agreement_num):
+    """Signer addresses in the order of the agreement's signer box."""
+    raw = box_value(client, app_id, signer_box_name(agreement_num))
+    return [encode_address(raw[i:i + 32]) for i in range(0, len(raw), SIGNER_ENTRY_SIZE)]
+
+def expected_mask(count, signed=()):
+    """The signed bitmap of `count` signers with these indexes signed; padding bits are preset."""
+    bits = set(signed) | set(range(count, (count + 7) // 8 * 8))
+    return bytes(sum(0x80 >> (i % 8) for i in bits if i // 8 == byte) for byte in range((count + 7) // 8))
+
 # Test the Identity Registry
 def test_identity_registry_basics(algod_client, accounts, configured_apps):
     """Test basic functionality of the Identity Registry."""
@@ -306,7 +428,7 @@ def test_identity_registry_basics(algod_client, accounts, configured_apps):
         algod_client, 
         user, 
         identity_id, 
-        [b"register_identity", b"email", b"user@example.com"]
+        abi_args(identity_registry.REGISTER_IDENTITY, "email", "user@example.com")
     )
     
     assert "logs" in result, "Registration should produce logs"
@@ -316,7 +438,8 @@ def test_identity_registry_basics(algod_client, accounts, configured_apps):
         algod_client,
         verifier,
         identity_id,
-        [b"verify_identity", decode_address(user["address"]), b"email"]
+        abi_args(identity_registry.VERIFY_IDENTITY, user["address"], "email"),
+        accounts=[user["address"]]
     )
     
     assert "logs" in result, "Verification should produce logs"
@@ -330,16 +453,13 @@ def test_agreement_registry_basics(algod_client, accounts, configured_apps):
     verifier = accounts[1]
     user = accounts[2]
     
-    # User opts in
-    app_optin(algod_client, user, agreement_id)
-    
     # Create agreement
-    document_hash = b"0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+    document_hash = b"0123456789abcdef0123456789abcdef"
     result = app_call(
         algod_client,
         admin,
         agreement_id,
-        [b"create_agreement", document_hash, b"provider", decode_address(user["address"])]
+        abi_args(agreement_registry.CREATE_AGREEMENT, document_hash, b"provider".ljust(16, b"\0"), [user["address"]])
     )
     
     assert "logs" in result, "Agreement creation should produce logs"
@@ -349,7 +469,7 @@ def test_agreement_registry_basics(algod_client, accounts, configured_apps):
         algod_client,
         admin,
         agreement_id,
-        [b"add_metadata", b"1", b"description", b"Test agreement"]
+        abi_args(agreement_registry.ADD_METADATA, 1, "description", "Test agreement")
     )
     
     assert "logs" in result, "Adding metadata should produce logs"
@@ -359,7 +479,7 @@ def test_agreement_registry_basics(algod_client, accounts, configured_apps):
         algod_client,
         admin,
         agreement_id,
-        [b"add_metadata", b"1", b"action_type", b"escrow_release"]
+        abi_args(agreement_registry.ADD_METADATA, 1, "action_type", "escrow_release")
     )
     
     print("Agreement Registry basics test passed!")
@@ -374,23 +494,23 @@ def test_agreement_execution_flow(algod_client, accounts, configured_apps):
     user = accounts[2]
     
     # Create a new agreement
-    document_hash = b"integration0123456789abcdef0123456789abcdefintegration0123456789ab"
+    document_hash = b"integration0123456789abcdef01234"
     result = app_call(
         algod_client,
         admin,
         agreement_id,
-        [b"create_agreement", document_hash, b"integration-test", decode_address(user["address"])]
+        abi_args(agreement_registry.CREATE_AGREEMENT, document_hash, b"integration-test", [user["address"]])
     )
     
     # The agreement ID should be 2 (assuming we created one in the previous test)
-    agreement_num = b"2"
+    agreement_num = 2
     
     # Set action type for router
     app_call(
         algod_client,
         admin,
         agreement_id,
-        [b"add_metadata", agreement_num, b"action_type", b"escrow_release"]
+        abi_args(agreement_registry.ADD_METADATA, agreement_num, "action_type", "escrow_release")
     )
     
     # Set up mock escrow for this agreement
@@ -398,7 +518,7 @@ def test_agreement_execution_flow(algod_client, accounts, configured_apps):
         algod_client,
         admin,
         escrow_id,
-        [b"register_escrow", agreement_num, decode_address(admin["address"])]
+        abi_args(escrow_release_handler.REGISTER_ESCROW, agreement_num, admin["address"])
     )
     
     # Mark as signed by verifier
@@ -406,7 +526,7 @@ def test_agreement_execution_flow(algod_client, accounts, configured_apps):
         algod_client,
         verifier,
         agreement_id,
-        [b"mark_signed", agreement_num, decode_address(user["address"])]
+        abi_args(agreement_registry.MARK_SIGNED, agreement_num, user["address"])
     )
     
     # Try to execute - will likely fail in the router call since we're using a mock escrow,
@@ -416,7 +536,7 @@ def test_agreement_execution_flow(algod_client, accounts, configured_apps):
             algod_client,
             admin,
             agreement_id,
-            [b"execute_agreement", agreement_num]
+            abi_args(agreement_registry.EXECUTE_AGREEMENT, agreement_num)
         )
         print("Full execution completed successfully")
     except Exception as e:
@@ -425,6 +545,191 @@ def test_agreement_execution_flow(algod_client, accounts, configured_apps):
     
     print("Agreement execution flow test completed!")
 
+# Agreement Registry behaviour on a fresh registry
+def test_create_agreements_stores_every_tuple(sandbox, algod_client, accounts, registry_app):
+    """create_agreements parses each tuple into its own record, signer box and bitmap."""
+    admin = accounts[0]
+    first = next_agreement_id(algod_client, registry_app)
+    agreements = [
+        (b"\x02" * 32, b"batch-a".ljust(16, b"\0"), new_signers(2)),
+        (b"\x03" * 32, b"batch-b".ljust(16, b"\0"), new_signers(3))
+    ]
+    boxes = []
+    for agreement_num in (first, first + 1):
+        boxes += [agreement_box_name(agreement_num), signer_box_name(agreement_num), mask_box_name(agreement_num)]
+
+    result = send_group(algod_client, admin, [registry_call(
+        algod_client, admin, registry_app, abi_args(agreement_registry.CREATE_AGREEMENTS, agreements), boxes + [b"", b""]
+    )])
+
+    assert b"AGREEMENTS_CREATED:" + first.to_bytes(8, "big") + (2).to_bytes(8, "big") in decoded_logs(result)
+    assert next_agreement_id(algod_client, registry_app) == first + 2
+    for agreement_num, (document_hash, provider, signers) in enumerate(agreements, first):
+        record = decode_agreement_record(box_value(algod_client, registry_app, agreement_box_name(agreement_num)))
+        assert record.document_hash == document_hash
+        assert record.provider == provider.rstrip(b"\0").decode()
+        assert record.signer_count == len(signers)
+        assert record.creator == admin["address"]
+        assert signer_entries(algod_client, registry_app, agreement_num) == signers
+        assert box_value(algod_client, registry_app, mask_box_name(agreement_num)) == expected_mask(len(signers))
+
+def test_unsorted_and_duplicate_signers_are_rejected(sandbox, algod_client, accounts, registry_app):
+    """Signers must be strictly ascending, which also rules out duplicates."""
+    admin = accounts[0]
+    low, high = new_signers(2)
+
+    for signers in ([high, low], [low, low]):
+        agreement_num = next_agreement_id(algod_client, registry_app)
+        with pytest.raises(AlgodHTTPError):
+            create_agreement(algod_client, admin, registry_app, signers)
+        assert next_agreement_id(algod_client, registry_app) == agreement_num
+        assert box_value(algod_client, registry_app, agreement_box_name(agreement_num)) is None
+
+def test_initial_signers_complete_the_bitmap(sandbox, algod_client, accounts, registry_app, registry):
+    """Signers added in the creation group share one bitmap, which gates execution until every bit is set."""
+    admin = accounts[0]
+    verifier = accounts[1]
+    signers = new_signers(CREATE_SIGNERS + 1)
+    agreement_num = next_agreement_id(algod_client, registry_app)
+
+    send_group(algod_client, admin, [
+        registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.CREATE_AGREEMENT, b"\x04" * 32, b"initial".ljust(16, b"\0"),
+                     signers[:CREATE_SIGNERS]),
+            signature_boxes(agreement_num)
+        ),
+        registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.ADD_INITIAL_SIGNERS, agreement_num, signers[CREATE_SIGNERS:]),
+            signature_boxes(agreement_num)
+        )
+    ])
+    assert signer_entries(algod_client, registry_app, agreement_num) == signers
+    assert box_value(algod_client, registry_app, mask_box_name(agreement_num)) == expected_mask(len(signers))
+
+    # Signers cannot be appended outside the creation group
+    with pytest.raises(AlgodHTTPError):
+        send_group(algod_client, admin, [registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.ADD_INITIAL_SIGNERS, agreement_num, [encode_address(b"\xff" * 32)]),
+            signature_boxes(agreement_num)
+        )])
+
+    # Batch calls of mark_batch_size pairs stay within the opcode budget
+    assert mark_batch_size(len(signers)) > 1
+    marked = registry.mark_signed_batch(verifier["private_key"], [(agreement_num, signer) for signer in signers[:-1]])
+    assert len(marked) == len(signers) - 1
+    assert box_value(algod_client, registry_app, mask_box_name(agreement_num)) == \
+        expected_mask(len(signers), range(len(signers) - 1))
+
+    with pytest.raises(AlgodHTTPError):
+        registry.execute_agreement(admin["private_key"], agreement_num, signers)
+
+    registry.mark_signed(verifier["private_key"], agreement_num, signers[-1])
+    assert box_value(algod_client, registry_app, mask_box_name(agreement_num)) == \
+        expected_mask(len(signers), range(len(signers)))
+
+    registry.execute_agreement(admin["private_key"], agreement_num, signers)
+    record = decode_agreement_record(box_value(algod_client, registry_app, agreement_box_name(agreement_num)))
+    assert record.flags & AGREEMENT_FLAG_EXECUTED
+    assert record.executed_by == admin["address"]
+
+def test_add_signer_inserts_into_existing_agreement(sandbox, algod_client, accounts, registry_app, registry):
+    """add_signer splices signers in at their sorted place and shifts the bitmap with them."""
+    admin = accounts[0]
+    verifier = accounts[1]
+    signers = new_signers(10)
+    initial = signers[1:9:2] + signers[8:]  # Six signers: additions first use padding bits, then add a byte
+    agreement_num = create_agreement(algod_client, admin, registry_app, initial)
+    registry.mark_signed(verifier["private_key"], agreement_num, initial[-1])
+
+    for signer in [signers[0], signers[2], signers[4], signers[6]]:
+        registry.add_signer(admin["private_key"], agreement_num, signer)
+
+    current = sorted(initial + [signers[0], signers[2], signers[4], signers[6]], key=decode_address)
+    assert signer_entries(algod_client, registry_app, agreement_num) == current
+    assert box_value(algod_client, registry_app, mask_box_name(agreement_num)) == \
+        expected_mask(len(current), [current.index(initial[-1])])
+
+    with pytest.raises(AlgodHTTPError):
+        registry.add_signer(admin["private_key"], agreement_num, signers[2])
+
+    # The added signers gate execution like the initial ones
+    registry.mark_signed_batch(verifier["private_key"], [(agreement_num, s) for s in current if s != signers[0]])
+    with pytest.raises(AlgodHTTPError):
+        registry.execute_agreement(admin["private_key"], agreement_num, current)
+    registry.mark_signed(verifier["private_key"], agreement_num, signers[0])
+    registry.execute_agreement(admin["private_key"], agreement_num, current)
+
+    # Executed agreements take no new signers
+    with pytest.raises(AlgodHTTPError):
+        registry.add_signer(admin["private_key"], agreement_num, encode_address(b"\xff" * 32))
+
+def test_archive_parses_metadata_keys(sandbox, algod_client, accounts, registry_app, registry):
+    """archive_agreement deletes the string[] keys it is given and refuses to leave counted metadata behind."""
+    admin = accounts[0]
+    verifier = accounts[1]
+    signers = new_signers(1)
+    agreement_num = create_agreement(algod_client, admin, registry_app, signers)
+    metadata = {"action_type": "escrow_release", "note": "archived", "x": "y"}
+    for key, value in metadata.items():
+        send_group(algod_client, admin, [registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.ADD_METADATA, agreement_num, key, value),
+            [agreement_box_name(agreement_num), meta_box_name(agreement_num, key)]
+        )])
+    record = decode_agreement_record(box_value(algod_client, registry_app, agreement_box_name(agreement_num)))
+    assert record.meta_count == len(metadata)
+
+    registry.mark_signed(verifier["private_key"], agreement_num, signers[0])
+    registry.execute_agreement(admin["private_key"], agreement_num, signers)
+
+    def archive_call(keys):
+        return registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.ARCHIVE_AGREEMENT, agreement_num, keys),
+            signature_boxes(agreement_num)[:3] + [meta_box_name(agreement_num, key) for key in keys]
+        )
+
+    # A counted metadata box that is not listed keeps the agreement
+    with pytest.raises(AlgodHTTPError):
+        send_group(algod_client, admin, [archive_call(["action_type", "note"])])
+    assert box_value(algod_client, registry_app, agreement_box_name(agreement_num)) is not None
+
+    # Keys of any length, and keys without a box, are parsed out of the string[]
+    delete_call = registry_call(
+        algod_client, admin, registry_app,
+        abi_args(agreement_registry.DELETE_METADATA, agreement_num, ["x", "missing"]),
+        [agreement_box_name(agreement_num), meta_box_name(agreement_num, "x"), meta_box_name(agreement_num, "missing")]
+    )
+    result = send_group(algod_client, admin, [delete_call, archive_call(["action_type", "missing", "note"])])
+
+    assert b"METADATA_DELETED:" + agreement_num.to_bytes(8, "big") in decoded_logs(result)
+    for name in [agreement_box_name(agreement_num), signer_box_name(agreement_num), mask_box_name(agreement_num)] + \
+            [meta_box_name(agreement_num, key) for key in metadata]:
+        assert box_value(algod_client, registry_app, name) is None
+
+def test_sweeper_archives_agreements_with_many_metadata_keys(sandbox, algod_client, accounts, registry_app, registry):
+    """Metadata beyond one archive call is deleted by delete_metadata calls in the archive group."""
+    admin = accounts[0]
+    verifier = accounts[1]
+    signers = new_signers(1)
+    agreement_num = create_agreement(algod_client, admin, registry_app, signers)
+    keys = [f"key{i}" for i in range(9)]
+    for key in keys:
+        send_group(algod_client, admin, [registry_call(
+            algod_client, admin, registry_app,
+            abi_args(agreement_registry.ADD_METADATA, agreement_num, key, "value"),
+            [agreement_box_name(agreement_num), meta_box_name(agreement_num, key)]
+        )])
+    registry.mark_signed(verifier["private_key"], agreement_num, signers[0])
+    registry.execute_agreement(admin["private_key"], agreement_num, signers)
+
+    assert registry.archive_executed_agreements(verifier["private_key"], [agreement_num], keys) == [agreement_num]
+    for name in [agreement_box_name(agreement_num)] + [meta_box_name(agreement_num, key) for key in keys]:
+        assert box_value(algod_client, registry_app, name) is None
+
 # Run the full suite of tests if this file is executed directly
 if __name__ == "__main__":
     # Use pytest to run all tests
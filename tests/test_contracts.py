@@ -9,10 +9,15 @@ from pathlib import Path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, "src"))
 
 from pyteal import *
 from contracts.identity_registry import approval_program as identity_approval, clear_state_program as identity_clear
 from contracts.agreement_registry import approval_program as agreement_approval, clear_state_program as agreement_clear
+from contracts.agreement_registry import TEAL_VERSION as AGREEMENT_TEAL_VERSION
+from contracts.identity_registry import app_spec as identity_spec
+from contracts.agreement_registry import app_spec as agreement_spec
+import document_client_sdk
 
 class TestSmartContracts(unittest.TestCase):
     """Test the Identity and Agreement Registry smart contracts locally."""
@@ -22,9 +27,9 @@ class TestSmartContracts(unittest.TestCase):
         # Create output directory for the compiled TEAL
         os.makedirs("build", exist_ok=True)
     
-    def compile_program(self, program, output_file):
+    def compile_program(self, program, output_file, version=6):
         """Compile a PyTeal program to TEAL and write to a file."""
-        teal_code = compileTeal(program, mode=Mode.Application, version=6)
+        teal_code = compileTeal(program, mode=Mode.Application, version=version)
         
         with open(output_file, "w") as f:
             f.write(teal_code)
@@ -57,14 +62,14 @@ class TestSmartContracts(unittest.TestCase):
         
         # Compile approval program
         approval_file = "build/agreement_registry_approval.teal"
-        approval_teal = self.compile_program(agreement_approval(), approval_file)
+        approval_teal = self.compile_program(agreement_approval(), approval_file, AGREEMENT_TEAL_VERSION)
         
         self.assertTrue(len(approval_teal) > 0, "Approval program should not be empty")
         print(f"✅ Agreement Registry approval program compiled successfully ({len(approval_teal)} bytes)")
         
         # Compile clear state program
         clear_file = "build/agreement_registry_clear_state.teal"
-        clear_teal = self.compile_program(agreement_clear(), clear_file)
+        clear_teal = self.compile_program(agreement_clear(), clear_file, AGREEMENT_TEAL_VERSION)
         
         self.assertTrue(len(clear_teal) > 0, "Clear state program should not be empty")
         print(f"✅ Agreement Registry clear state program compiled successfully ({len(clear_teal)} bytes)")
@@ -105,7 +110,7 @@ class TestSmartContracts(unittest.TestCase):
         
         # Compile the approval program
         approval_file = "build/agreement_registry_approval.teal"
-        approval_teal = self.compile_program(agreement_approval(), approval_file)
+        approval_teal = self.compile_program(agreement_approval(), approval_file, AGREEMENT_TEAL_VERSION)
         
         # Check for required opcodes and logic
         required_elements = [
@@ -115,7 +120,11 @@ class TestSmartContracts(unittest.TestCase):
             "add_verifier",       # Check for add verifier action
             "remove_verifier",    # Check for remove verifier action
             "app_global_put",     # Check for global state operations
-            "app_local_put",      # Check for local state operations
+            "box_create",         # Check for per-agreement box storage
+            "box_replace",        # Check for in-place box updates
+            "box_extract",        # Check for box reads
+            "b<",                 # Check for signer list bisection
+            "setbit",             # Check for signature bitmap updates
             "concat",             # Check for string concatenation
             "itob",               # Check for integer to bytes conversion
             "extract",            # Check for extract operation (adjusted to match TEAL output)
@@ -195,7 +204,7 @@ class TestSmartContracts(unittest.TestCase):
         
         # Compile the approval program
         approval_file = "build/agreement_registry_approval.teal"
-        approval_teal = self.compile_program(agreement_approval(), approval_file)
+        approval_teal = self.compile_program(agreement_approval(), approval_file, AGREEMENT_TEAL_VERSION)
         
         # Check for action handlers in the code
         actions_found = {
@@ -293,7 +302,7 @@ class TestSmartContracts(unittest.TestCase):
         
         # Compile the approval program
         approval_file = "build/agreement_registry_approval.teal"
-        approval_teal = self.compile_program(agreement_approval(), approval_file)
+        approval_teal = self.compile_program(agreement_approval(), approval_file, AGREEMENT_TEAL_VERSION)
         
         # Check for admin validation
         admin_reference_found = False
@@ -335,6 +344,40 @@ class TestSmartContracts(unittest.TestCase):
         self.assertTrue(existence_validation_found, "Should validate existence")
         print(f"✅ Agreement Registry validates existence")
         
+        # Appended signers are only accepted in the group that created the agreement
+        self.assertIn("gtxn 0 ApplicationID", approval_teal)
+        self.assertIn("gtxna 0 ApplicationArgs 0", approval_teal)
+        print(f"✅ Agreement Registry limits add_initial_signers to the creation group")
+        
+        # add_signer inserts into existing agreements by shifting the bitmap with byte math
+        self.assertIn(f'method "{document_client_sdk.ADD_SIGNER.get_signature()}"', approval_teal)
+        for opcode in ["b/", "b*", "b%"]:
+            self.assertIn(opcode, approval_teal.splitlines())
+        print(f"✅ Agreement Registry inserts signers into existing agreements")
+        
+        return True
+    
+    def test_client_methods_match_contract_specs(self):
+        """Test that the client SDK calls methods the registries' ARC-4 specs declare."""
+        print("\n----- Testing Client Methods Against Contract Specs -----")
+        
+        identity_methods = {method.get_signature() for method in identity_spec().methods}
+        agreement_methods = {method.get_signature() for method in agreement_spec().methods}
+        
+        for method in [document_client_sdk.REGISTER_IDENTITY, document_client_sdk.VERIFY_IDENTITY]:
+            self.assertIn(method.get_signature(), identity_methods)
+        for method in [document_client_sdk.CREATE_AGREEMENT, document_client_sdk.ADD_INITIAL_SIGNERS,
+                       document_client_sdk.ADD_SIGNER, document_client_sdk.MARK_SIGNED,
+                       document_client_sdk.EXECUTE_AGREEMENT]:
+            self.assertIn(method.get_signature(), agreement_methods)
+        self.assertIn(document_client_sdk.ADD_VERIFIER.get_signature(), identity_methods & agreement_methods)
+        print(f"✅ Client methods are declared by the contract specs")
+        
+        # Selectors are what the approval programs dispatch on
+        approval_teal = compileTeal(agreement_approval(), mode=Mode.Application, version=AGREEMENT_TEAL_VERSION)
+        self.assertIn(f'method "{document_client_sdk.CREATE_AGREEMENT.get_signature()}"', approval_teal)
+        print(f"✅ Agreement Registry dispatches on method selectors")
+        
         return True
     
     def run_all_tests(self):
@@ -347,7 +390,8 @@ class TestSmartContracts(unittest.TestCase):
             self.test_identity_registry_control_flow,
             self.test_agreement_registry_control_flow,
             self.test_identity_registry_security,
-            self.test_agreement_registry_security
+            self.test_agreement_registry_security,
+            self.test_client_methods_match_contract_specs
         ]
         
         results = {}
@@ -128,7 +128,7 @@ class TestExecutionRouter:
             "register_action_type", # Check for register action type action
             "check_agreement_executed", # Check for verification action
             "app_global_put",       # Check for global state operations
-            "app_local_put",        # Check for local state operations
+            "store",                # Check for scratch space operations
             "concat",               # Check for string concatenation
             # "itob" is not required if not present in the actual implementation
             "btoi",                 # Check for bytes to integer conversion
@@ -161,7 +161,7 @@ class TestExecutionRouter:
             "set_router",           # Check for set router action
             "register_escrow",      # Check for register escrow action
             "app_global_put",       # Check for global state operations
-            "app_local_put",        # Check for local state operations
+            "store",                # Check for scratch space operations
             "concat",               # Check for string concatenation
             "!=",                   # Check for comparison operations
             "==",                   # Check for comparison operations
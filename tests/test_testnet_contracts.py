@@ -7,8 +7,9 @@ import json
 import time
 import os
 from dotenv import load_dotenv
-from algosdk import account, mnemonic, transaction
+from algosdk import abi, account, mnemonic, transaction
 from algosdk.v2client import algod
+from algosdk.encoding import decode_address
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,17 +30,12 @@ algod_token = ""
 client = algod.AlgodClient(algod_token, algod_address)
 
 def setup_admin_account():
-    """Ensure admin account is opted in to all apps."""
+    """Ensure admin account is opted in to the apps that keep local state."""
     print("\nSetting up admin account...")
     
-    # List of all app IDs
+    # Only the Identity Registry keeps per-account state; the other apps use scratch space
     app_ids = [
-        IDENTITY_APP_ID,
-        AGREEMENT_APP_ID,
-        ROUTER_APP_ID,
-        ESCROW_APP_ID,
-        ASSET_APP_ID,
-        DEPLOY_APP_ID
+        IDENTITY_APP_ID
     ]
     
     # Check if admin is already opted in
@@ -116,6 +112,11 @@ def wait_for_confirmation(client, txid):
     print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
     return txinfo
 
+def method_args(signature, *args):
+    """App args calling the ARC-4 method with this signature: its selector, then each argument ABI-encoded."""
+    method = abi.Method.from_signature(signature)
+    return [method.get_selector()] + [arg.type.encode(value) for arg, value in zip(method.args, args)]
+
 def call_app(client, sender_private_key, app_id, app_args, accounts=None, foreign_apps=None, foreign_assets=None):
     """Call a smart contract application."""
     sender = account.address_from_private_key(sender_private_key)
@@ -222,7 +223,7 @@ def test_identity_registry():
         client,
         ADMIN_PRIVATE_KEY,
         IDENTITY_APP_ID,
-        [b"add_verifier", verifier_address.encode()]
+        method_args("add_verifier(address)void", verifier_address)
     )
     print(f"Verifier {verifier_address} added.")
     
@@ -238,7 +239,7 @@ def test_identity_registry():
         client,
         user_private_key,
         IDENTITY_APP_ID,
-        [b"register_identity", claim_type.encode(), claim_value.encode()]
+        method_args("register_identity(string,string)void", claim_type, claim_value)
     )
     print(f"Identity claim registered: {claim_type}:{claim_value}")
     
@@ -248,7 +249,8 @@ def test_identity_registry():
         client,
         verifier_private_key,
         IDENTITY_APP_ID,
-        [b"verify_identity", user_address.encode(), claim_type.encode()]
+        method_args("verify_identity(address,string)void", user_address, claim_type),
+        accounts=[user_address]
     )
     print(f"Identity claim verified.")
     
@@ -271,7 +273,7 @@ def test_identity_registry():
         client,
         user_private_key,
         IDENTITY_APP_ID,
-        [b"update_claim", claim_type.encode(), claim_value.encode(), new_claim_value.encode()]
+        method_args("update_claim(string,string,string)void", claim_type, claim_value, new_claim_value)
     )
     print(f"Identity claim updated: {claim_type}:{new_claim_value}")
     
@@ -309,7 +311,7 @@ def test_agreement_registry():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"add_verifier", verifier_address.encode()]
+        method_args("add_verifier(address)void", verifier_address)
     )
     print(f"Verifier {verifier_address} added.")
     
@@ -322,7 +324,7 @@ def test_agreement_registry():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"create_agreement", document_hash, provider.encode(), signer1_address.encode(), signer2_address.encode()],
+        method_args("create_agreement(byte[32],byte[16],address[])void", document_hash, provider.encode().ljust(16, b"\0"), sorted([signer1_address, signer2_address], key=decode_address)),
         accounts=[signer1_address, signer2_address]
     )
     print(f"Agreement created with document hash: {document_hash.hex()}")
@@ -348,7 +350,7 @@ def test_agreement_registry():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"add_metadata", agreement_id.to_bytes(8, 'big'), b"action_type", action_type.encode()]
+        method_args("add_metadata(uint64,string,string)void", agreement_id, "action_type", action_type)
     )
     print(f"Metadata added to agreement: action_type = {action_type}")
     
@@ -358,7 +360,7 @@ def test_agreement_registry():
         client,
         verifier_private_key,
         AGREEMENT_APP_ID,
-        [b"mark_signed", agreement_id.to_bytes(8, 'big'), signer1_address.encode()]
+        method_args("mark_signed(uint64,address)void", agreement_id, signer1_address)
     )
     print(f"Agreement marked as signed for signer 1.")
     
@@ -367,7 +369,7 @@ def test_agreement_registry():
         client,
         verifier_private_key,
         AGREEMENT_APP_ID,
-        [b"mark_signed", agreement_id.to_bytes(8, 'big'), signer2_address.encode()]
+        method_args("mark_signed(uint64,address)void", agreement_id, signer2_address)
     )
     print(f"Agreement marked as signed for signer 2.")
     
@@ -397,7 +399,7 @@ def test_agreement_registry():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"execute_agreement", agreement_id.to_bytes(8, 'big')]
+        method_args("execute_agreement(uint64)void", agreement_id)
     )
     print(f"Agreement executed.")
     
@@ -432,13 +434,13 @@ def test_execution_router():
     # 2. Fund the account
     fund_account(executor_address)
     
-    # 3. Add executor to the router using the short key format
+    # 3. Add executor to the router
     print("\nAdding executor to the router...")
     result = call_app(
         client,
         ADMIN_PRIVATE_KEY,
         ROUTER_APP_ID,
-        [b"add_executor_short", executor_address.encode()]
+        method_args("add_executor(address)void", executor_address)
     )
     print(f"Executor {executor_address} added to router.")
     
@@ -465,7 +467,7 @@ def test_execution_router():
         client,
         ADMIN_PRIVATE_KEY,
         ROUTER_APP_ID,
-        [b"register_action_type", action_type.encode(), handler_app_id.to_bytes(8, 'big')]
+        method_args("register_action_type(string,uint64)void", action_type, handler_app_id)
     )
     print(f"Action type {action_type} registered with handler {handler_app_id}.")
     
@@ -499,7 +501,7 @@ def test_execution_router():
         client,
         executor_private_key,
         ROUTER_APP_ID,
-        [b"check_agreement_executed", test_agreement_id.to_bytes(8, 'big')]
+        method_args("check_agreement_executed(uint64)void", test_agreement_id)
     )
     print(f"Agreement execution verification test completed.")
     
@@ -528,7 +530,7 @@ def test_escrow_release_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"create_agreement", document_hash, provider.encode(), sender_address.encode(), receiver_address.encode()],
+        method_args("create_agreement(byte[32],byte[16],address[])void", document_hash, provider.encode().ljust(16, b"\0"), sorted([sender_address, receiver_address], key=decode_address)),
         accounts=[sender_address, receiver_address]
     )
     
@@ -552,7 +554,7 @@ def test_escrow_release_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"add_metadata", agreement_id.to_bytes(8, 'big'), b"action_type", action_type.encode()]
+        method_args("add_metadata(uint64,string,string)void", agreement_id, "action_type", action_type)
     )
     print(f"Metadata added: action_type = {action_type}")
     
@@ -565,7 +567,7 @@ def test_escrow_release_handler():
         client,
         ADMIN_PRIVATE_KEY,
         ESCROW_APP_ID,
-        [b"register_escrow", agreement_id.to_bytes(8, 'big'), escrow_address.encode()]
+        method_args("register_escrow(uint64,address)void", agreement_id, escrow_address)
     )
     print(f"Escrow account {escrow_address} registered for agreement {agreement_id}.")
     
@@ -679,7 +681,7 @@ def test_asset_transfer_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"create_agreement", document_hash, provider.encode(), ADMIN_ADDRESS.encode(), receiver_address.encode()],
+        method_args("create_agreement(byte[32],byte[16],address[])void", document_hash, provider.encode().ljust(16, b"\0"), sorted([ADMIN_ADDRESS, receiver_address], key=decode_address)),
         accounts=[ADMIN_ADDRESS, receiver_address]
     )
     
@@ -703,7 +705,7 @@ def test_asset_transfer_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"add_metadata", agreement_id.to_bytes(8, 'big'), b"action_type", action_type.encode()]
+        method_args("add_metadata(uint64,string,string)void", agreement_id, "action_type", action_type)
     )
     print(f"Metadata added: action_type = {action_type}")
     
@@ -800,7 +802,7 @@ def test_contract_deployment_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"create_agreement", document_hash, provider.encode(), ADMIN_ADDRESS.encode()],
+        method_args("create_agreement(byte[32],byte[16],address[])void", document_hash, provider.encode().ljust(16, b"\0"), [ADMIN_ADDRESS]),
         accounts=[ADMIN_ADDRESS]
     )
     
@@ -824,7 +826,7 @@ def test_contract_deployment_handler():
         client,
         ADMIN_PRIVATE_KEY,
         AGREEMENT_APP_ID,
-        [b"add_metadata", agreement_id.to_bytes(8, 'big'), b"action_type", action_type.encode()]
+        method_args("add_metadata(uint64,string,string)void", agreement_id, "action_type", action_type)
     )
     print(f"Metadata added: action_type = {action_type}")
     
@@ -0,0 +1,1283 @@
+#!/usr/bin/env python3
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from types import SimpleNamespace
+
+# Add the src directory to the path so we can import the verifier modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, "src"))
+
+from algosdk import account
+from algosdk.encoding import decode_address
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from envelope_scheduler import EnvelopeScheduler
+from document_client_sdk import DocumentExecutionClient, MAX_GROUP_SIZE
+from verifier_sharding import ConsistentHashRing, ShardStore, ShardedVerifierWorker
+from verification_engine import SignatureEvent, SignatureProvider, VerificationEngine
+from docusign_verifier import AdobeSignProvider, DocuSignProvider
+from document_stream import DOCUMENT_PLACEHOLDER, StreamingBody
+from verifier_metrics import MetricsRegistry, start_metrics_server
+from retry_queue import ChainRetryQueue
+from docusign_simulator import DocuSignSimulator, instant_signing
+from verification_engine import ProviderRateLimitError
+from verifier_pipeline import VerifierPipeline
+from chain_bootstrap import AgreementLogScanner
+from document_client_sdk import (TRACKING_NOTE_PREFIX, AGREEMENT_RECORD, agreement_box_name, mask_box_name,
+                                 signer_box_name, ADD_INITIAL_SIGNERS, CREATE_AGREEMENT, CREATE_AGREEMENTS,
+                                 EXECUTE_AGREEMENT, MARK_SIGNED_BATCH, AGREEMENT_FLAG_AUTO_EXECUTE,
+                                 ARCHIVE_AGREEMENT, DELETE_METADATA, meta_box_name, mark_batch_size, APP_CALL_BUDGET,
+                                 MARK_CALL_OPS, MARK_PAIR_OPS, MARK_BISECT_OPS, MAX_SIGNERS)
+from provider_auth import OAuthTokenManager
+
+
+class FakeClock:
+    """Manually advanced clock for deterministic scheduling tests."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeAlgodClient:
+    """Records submitted groups and confirms every transaction in the next round."""
+
+    def __init__(self):
+        self.groups = []
+        self.round = 100
+        self.global_state = []  # Agreement Registry global state, as algod returns it
+        self.boxes = {}  # Agreement Registry box name -> contents
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(1000, self.round, self.round + 1000, "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+
+    def send_transactions(self, signed_group):
+        self.groups.append(signed_group)
+        return signed_group[0].get_txid()
+
+    def send_transaction(self, signed_txn):
+        return self.send_transactions([signed_txn])
+
+    def status(self):
+        return {'last-round': self.round}
+
+    def status_after_block(self, block):
+        self.round = block
+        return self.status()
+
+    def pending_transaction_info(self, txid):
+        return {'confirmed-round': self.round + 1}
+
+    def application_info(self, app_id):
+        return {'params': {'global-state': self.global_state}}
+
+    def application_box_by_name(self, app_id, box_name):
+        if box_name not in self.boxes:
+            raise AlgodHTTPError("box not found", 404)
+        return {'name': base64.b64encode(box_name).decode(), 'value': base64.b64encode(self.boxes[box_name]).decode()}
+
+    def application_boxes(self, app_id):
+        return {'boxes': [{'name': base64.b64encode(name).decode()} for name in self.boxes]}
+
+
+class FailingAlgodClient(FakeAlgodClient):
+    """Rejects every submission until `failing` is cleared."""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+
+    def send_transactions(self, signed_group):
+        if self.failing:
+            raise Exception("node unavailable")
+        return super().send_transactions(signed_group)
+
+
+class RejectingAlgodClient(FakeAlgodClient):
+    """Rejects submissions that mark a signature on one of `rejected` agreements."""
+
+    def __init__(self, rejected):
+        super().__init__()
+        self.rejected = set(rejected)
+
+    def send_transactions(self, signed_group):
+        for stxn in signed_group:
+            if stxn.transaction.app_args[0] == MARK_SIGNED_BATCH.get_selector():
+                pairs = MARK_SIGNED_BATCH.args[0].type.decode(stxn.transaction.app_args[1])
+                if self.rejected & {agreement_id for agreement_id, _ in pairs}:
+                    raise Exception("logic eval error: assert failed")
+        return super().send_transactions(signed_group)
+
+
+class AutoExecutingAlgodClient(FakeAlgodClient):
+    """Logs EXECUTED: for mark calls that mark one of the `final` (agreement_id, wallet) pairs."""
+
+    def __init__(self, final):
+        super().__init__()
+        self.final = set(final)
+        self.logs = {}  # tx_id -> base64 logs
+
+    def send_transactions(self, signed_group):
+        for stxn in signed_group:
+            if stxn.transaction.app_args[0] == MARK_SIGNED_BATCH.get_selector():
+                for agreement_id, wallet in MARK_SIGNED_BATCH.args[0].type.decode(stxn.transaction.app_args[1]):
+                    if (agreement_id, wallet) in self.final:
+                        log = b"EXECUTED:" + agreement_id.to_bytes(8, 'big')
+                        self.logs[stxn.get_txid()] = [base64.b64encode(log).decode()]
+        return super().send_transactions(signed_group)
+
+    def pending_transaction_info(self, txid):
+        return dict(super().pending_transaction_info(txid), logs=self.logs.get(txid, []))
+
+
+class RegistryAlgodClient(FakeAlgodClient):
+    """Assigns agreement IDs to create_agreement(s) calls and reports them in the logs."""
+
+    def __init__(self):
+        super().__init__()
+        self.next_agreement_id = 1
+        self.logs = {}  # tx_id -> base64 logs
+
+    def send_transactions(self, signed_group):
+        for stxn in signed_group:
+            if stxn.transaction.app_args[0] == CREATE_AGREEMENT.get_selector():
+                log = b"AGREEMENT_CREATED:" + self.next_agreement_id.to_bytes(8, 'big')
+                self.logs[stxn.get_txid()] = [base64.b64encode(log).decode()]
+                self.next_agreement_id += 1
+            elif stxn.transaction.app_args[0] == CREATE_AGREEMENTS.get_selector():
+                count = int.from_bytes(stxn.transaction.app_args[1][:2], 'big')
+                log = b"AGREEMENTS_CREATED:" + self.next_agreement_id.to_bytes(8, 'big') + count.to_bytes(8, 'big')
+                self.logs[stxn.get_txid()] = [base64.b64encode(log).decode()]
+                self.next_agreement_id += count
+        return super().send_transactions(signed_group)
+
+    def pending_transaction_info(self, txid):
+        return dict(super().pending_transaction_info(txid), logs=self.logs.get(txid, []))
+
+
+class DroppingAlgodClient(FakeAlgodClient):
+    """Drops the `dropped`-th create_agreement from the pool; like the registry, a create only
+    confirms if it references the boxes of the ID the counter gives it."""
+
+    def __init__(self, dropped):
+        super().__init__()
+        self.dropped = dropped
+        self.creates = 0
+        self.counter = {'key': base64.b64encode(b"agreement_counter").decode(), 'value': {'type': 2, 'uint': 0}}
+        self.global_state.append(self.counter)
+        self.logs = {}  # tx_id -> base64 logs of confirmed creates
+
+    def send_transactions(self, signed_group):
+        create = signed_group[0]
+        self.creates += 1
+        next_id = self.counter['value']['uint']
+        if self.creates != self.dropped and create.transaction.boxes[0].name == agreement_box_name(next_id):
+            log = b"AGREEMENT_CREATED:" + next_id.to_bytes(8, 'big')
+            self.logs[create.get_txid()] = [base64.b64encode(log).decode()]
+            self.counter['value']['uint'] += 1
+        return super().send_transactions(signed_group)
+
+    def pending_transaction_info(self, txid):
+        if txid not in self.logs:
+            return {'pool-error': "transaction dropped"}
+        return dict(super().pending_transaction_info(txid), logs=self.logs[txid])
+
+
+class SlowAlgodClient(FakeAlgodClient):
+    """Takes `delay` seconds to report each pending transaction."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def pending_transaction_info(self, txid):
+        time.sleep(self.delay)
+        return super().pending_transaction_info(txid)
+
+
+class FakeIndexerClient:
+    """Serves Agreement Registry transactions by round and records the scanned ranges."""
+
+    def __init__(self, page_size=2):
+        self.transactions = []
+        self.page_size = page_size
+        self.ranges = []
+
+    def add(self, confirmed_round, logs, args=(), note=None):
+        self.transactions.append({
+            'confirmed-round': confirmed_round,
+            'intra-round-offset': 0,
+            'logs': [base64.b64encode(log).decode() for log in logs],
+            'note': base64.b64encode(note).decode() if note else None,
+            'application-transaction': {'application-args': [base64.b64encode(a).decode() for a in args]}
+        })
+
+    def health(self):
+        return {'round': max(txn['confirmed-round'] for txn in self.transactions)}
+
+    def search_transactions(self, application_id=None, min_round=None, max_round=None,
+                            limit=None, next_page=None):
+        if next_page is None:
+            self.ranges.append((min_round, max_round))
+        matching = [txn for txn in self.transactions if min_round <= txn['confirmed-round'] <= max_round]
+        offset = int(next_page or 0)
+        page = matching[offset:offset + self.page_size]
+        response = {'transactions': page}
+        if offset + self.page_size < len(matching):
+            response['next-token'] = str(offset + self.page_size)
+        return response
+
+
+class FakeProvider(SignatureProvider):
+    """Serves recipient statuses from memory and records every status request."""
+
+    name = "Fake"
+    batch_size = 2
+    supports_document_download = True
+
+    def __init__(self, statuses):
+        self.statuses = statuses  # envelope_id -> {email: status}
+        self.documents = {}  # envelope_id -> completed document bytes
+        self.requests = []
+
+    def fetch_status_changes(self, envelope_ids, since=None):
+        self.requests.append(list(envelope_ids))
+        return {envelope_id: self.statuses[envelope_id] for envelope_id in envelope_ids}
+
+    def parse_events(self, payload):
+        return [SignatureEvent(envelope_id, email, status, status == "signed")
+                for envelope_id, recipients in payload.items()
+                for email, status in recipients.items()]
+
+    def download_document(self, envelope_id):
+        if envelope_id not in self.documents:
+            raise KeyError(envelope_id)
+        document = self.documents[envelope_id]
+        return (document[offset:offset + 4] for offset in range(0, len(document), 4))
+
+
+class TestEnvelopeScheduler(unittest.TestCase):
+    """Test the adaptive per-envelope polling schedule."""
+
+    def setUp(self):
+        """Set up a scheduler driven by a fake clock."""
+        self.clock = FakeClock()
+        self.scheduler = EnvelopeScheduler(min_interval=10, max_interval=80, backoff_factor=2.0, clock=self.clock)
+
+    def test_idle_envelopes_back_off_exponentially(self):
+        """Idle polls double the interval up to the maximum."""
+        print("\n----- Testing Idle Envelope Backoff -----")
+
+        self.scheduler.add(1, delay=0)
+        intervals = []
+        for _ in range(5):
+            self.assertEqual(self.scheduler.pop_due(), [1])
+            self.scheduler.record_idle(1)
+            intervals.append(self.scheduler.seconds_until_next())
+            self.clock.advance(intervals[-1])
+
+        self.assertEqual(intervals, [20, 40, 80, 80, 80])
+        print(f"✅ Idle intervals back off as expected: {intervals}")
+
+    def test_activity_resets_interval(self):
+        """A status change brings an envelope back to the minimum interval."""
+        print("\n----- Testing Activity Reset -----")
+
+        self.scheduler.add(1, delay=0)
+        for _ in range(3):
+            self.scheduler.pop_due()
+            self.scheduler.record_idle(1)
+            self.clock.advance(self.scheduler.seconds_until_next())
+
+        self.scheduler.pop_due()
+        self.scheduler.record_activity(1)
+        self.assertEqual(self.scheduler.seconds_until_next(), 10)
+        print("✅ Activity resets the polling interval")
+
+    def test_due_order_and_retry_after(self):
+        """Envelopes come out most overdue first and Retry-After hints are honoured."""
+        print("\n----- Testing Due Order and Retry-After -----")
+
+        self.scheduler.add("a", delay=5)
+        self.scheduler.add("b", delay=1)
+        self.scheduler.add("c", delay=30)
+        self.clock.advance(10)
+
+        self.assertEqual(self.scheduler.pop_due(), ["b", "a"])
+
+        self.scheduler.defer("a", 120)
+        self.scheduler.record_idle("b")
+        self.clock.advance(100)
+        self.assertCountEqual(self.scheduler.pop_due(), ["b", "c"])
+        self.assertNotIn("a", self.scheduler.pop_due())
+
+        self.clock.advance(30)
+        self.assertEqual(self.scheduler.pop_due(), ["a"])
+        print("✅ Due order and Retry-After deferral are correct")
+
+    def test_removed_envelopes_are_not_returned(self):
+        """Removing an envelope drops it from the schedule."""
+        print("\n----- Testing Envelope Removal -----")
+
+        self.scheduler.add(1, delay=0)
+        self.scheduler.add(2, delay=0)
+        self.scheduler.remove(1)
+
+        self.assertEqual(self.scheduler.pop_due(), [2])
+        self.assertNotIn(1, self.scheduler)
+        print("✅ Removed envelopes are skipped")
+
+
+class TestBatchedChainWrites(unittest.TestCase):
+    """Test the batched mark_signed submission path of the client SDK."""
+
+    def test_unrelated_marks_are_submitted_ungrouped(self):
+        """Marks of different agreements go out as separate transactions, so a rejected one fails only its own pairs."""
+        print("\n----- Testing Batched mark_signed -----")
+
+        algod_client = RejectingAlgodClient({3})
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, _ = account.generate_account()
+        signatures = [(agreement_id, account.generate_account()[1]) for agreement_id in range(MAX_GROUP_SIZE + 4)]
+
+        confirmed = client.mark_signed_batch(verifier_key, signatures)
+
+        self.assertEqual([len(group) for group in algod_client.groups], [1] * (len(signatures) - 1))
+        self.assertTrue(all(group[0].transaction.group is None for group in algod_client.groups))
+        self.assertEqual(set(confirmed), set(signatures) - {signatures[3]})
+        print(f"✅ {len(confirmed)} of {len(signatures)} signatures confirmed despite a rejected call")
+
+    def test_final_signature_and_execution_share_a_group(self):
+        """The final marks of a completed agreement are grouped with its execution."""
+        print("\n----- Testing Atomic Final Signature and Execution -----")
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, _ = account.generate_account()
+        signatures = [(agreement_id, account.generate_account()[1]) for agreement_id in range(MAX_GROUP_SIZE)]
+        signatures.append((7, account.generate_account()[1]))
+
+        marked, executed = client.submit_signature_batch(verifier_key, signatures, execute_ids=[7])
+
+        self.assertEqual(executed, {7})
+        self.assertEqual(set(marked), set(signatures))
+        for group in algod_client.groups:
+            calls = [stxn.transaction.app_args for stxn in group]
+            if [EXECUTE_AGREEMENT.get_selector(), (7).to_bytes(8, "big")] in calls:
+                marks = [pair for call in calls if call[0] == MARK_SIGNED_BATCH.get_selector()
+                         for pair in MARK_SIGNED_BATCH.args[0].type.decode(call[1])]
+                self.assertEqual(marks, [[7, wallet] for agreement_id, wallet in signatures if agreement_id == 7])
+                break
+        else:
+            self.fail("execute_agreement was not submitted")
+        print("✅ Final signatures and execution were submitted as one atomic group")
+
+    def test_auto_execute_agreements_are_executed_by_their_final_mark(self):
+        """Agreements flagged for auto-execution get no execute_agreement call of their own."""
+        print("\n----- Testing Auto-Execution on the Final Signature -----")
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, creator = account.generate_account()
+        algod_client.boxes[agreement_box_name(4)] = AGREEMENT_RECORD.pack(
+            bytes(32), b"DocuSign", 100, 0, AGREEMENT_FLAG_AUTO_EXECUTE, 1, decode_address(creator), bytes(32), 0)
+        signatures = [(4, account.generate_account()[1]), (5, account.generate_account()[1])]
+
+        marked, executed = client.submit_signature_batch(verifier_key, signatures, execute_ids=[4, 5])
+
+        self.assertEqual(set(marked), set(signatures))
+        self.assertEqual(executed, {4, 5})
+        calls = [stxn.transaction.app_args for group in algod_client.groups for stxn in group]
+        self.assertEqual([call for call in calls if call[0] == EXECUTE_AGREEMENT.get_selector()],
+                         [[EXECUTE_AGREEMENT.get_selector(), (5).to_bytes(8, "big")]])
+        print("✅ Only the agreement without auto-execution got an execute_agreement call")
+
+    def test_executions_by_final_marks_are_reported_from_their_logs(self):
+        """Auto-executions are reported wherever the completing mark lands, and need no execute call room."""
+        print("\n----- Testing Reported Auto-Executions -----")
+
+        verifier_key, creator = account.generate_account()
+        signatures = [(7, account.generate_account()[1]) for _ in range(3)]
+        signatures += [(8, account.generate_account()[1]) for _ in range(MAX_GROUP_SIZE * 2)]
+        algod_client = AutoExecutingAlgodClient([signatures[2], signatures[-1]])
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        for agreement_id in (7, 8):
+            algod_client.boxes[agreement_box_name(agreement_id)] = AGREEMENT_RECORD.pack(
+                bytes(32), b"DocuSign", 100, 0, AGREEMENT_FLAG_AUTO_EXECUTE, 13, decode_address(creator), bytes(32), 0)
+
+        # Agreement 7 is completed by an ungrouped mark; agreement 8's marks fill a whole group
+        marked, executed = client.submit_signature_batch(verifier_key, signatures, execute_ids=[8])
+
+        self.assertEqual(set(marked), set(signatures))
+        self.assertEqual(executed, {7, 8})
+        self.assertEqual(sorted(len(group) for group in algod_client.groups), [1, 1, MAX_GROUP_SIZE])
+        print("✅ Executions by ungrouped final marks are reported from their EXECUTED: logs")
+
+    def test_executing_calls_reference_and_pay_for_the_router(self):
+        """Calls that can execute reference the router and handler and pay for their inner transactions."""
+        print("\n----- Testing Execution Router References and Fees -----")
+
+        algod_client = FakeAlgodClient()
+        for key, value in ((b"execution_router_id", 50), (b"action_type_default", 60)):
+            algod_client.global_state.append({'key': base64.b64encode(key).decode(), 'value': {'type': 2, 'uint': value}})
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, creator = account.generate_account()
+        for agreement_id, flags in ((4, AGREEMENT_FLAG_AUTO_EXECUTE), (5, 0), (6, AGREEMENT_FLAG_AUTO_EXECUTE)):
+            algod_client.boxes[agreement_box_name(agreement_id)] = AGREEMENT_RECORD.pack(
+                bytes(32), b"DocuSign", 100, 0, flags, 13, decode_address(creator), bytes(32), 0)
+        signatures = [(agreement_id, account.generate_account()[1]) for agreement_id in (4, 4, 4, 5, 6)]
+
+        client.submit_signature_batch(verifier_key, signatures, execute_ids=[4, 5])
+
+        groups = {int.from_bytes(group[0].transaction.app_args[1][2:10], "big"): [
+            (stxn.transaction.app_args[0], stxn.transaction.foreign_apps, stxn.transaction.fee) for stxn in group
+        ] for group in algod_client.groups}
+        mark, execute = MARK_SIGNED_BATCH.get_selector(), EXECUTE_AGREEMENT.get_selector()
+        self.assertEqual(groups, {
+            4: [(mark, None, 1000), (mark, [50, 60], 4000)],
+            5: [(mark, None, 1000), (execute, [50, 60], 4000)],
+            6: [(mark, [50, 60], 4000)],
+        })
+        self.assertTrue(all(len(stxn.transaction.foreign_apps or []) + len(stxn.transaction.boxes) <= 8
+                            for group in algod_client.groups for stxn in group))
+        print("✅ Final marks and executions reference the router and handler and cover their fees")
+
+    def test_marks_of_one_agreement_share_batch_calls(self):
+        """An agreement's marks are packed into mark_signed_batch calls sized by its signer count."""
+        print("\n----- Testing Batched mark_signed Calls -----")
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, creator = account.generate_account()
+        algod_client.boxes[agreement_box_name(3)] = AGREEMENT_RECORD.pack(
+            bytes(32), b"DocuSign", 100, 0, 0, 13, decode_address(creator), bytes(32), 0)
+        signatures = [(3, account.generate_account()[1]) for _ in range(3)]
+
+        marked, executed = client.submit_signature_batch(verifier_key, signatures, execute_ids=[3])
+
+        self.assertEqual(set(marked), set(signatures))
+        self.assertEqual(executed, {3})
+        [group] = algod_client.groups
+        calls = [stxn.transaction.app_args for stxn in group]
+        self.assertEqual([call[0] for call in calls], [MARK_SIGNED_BATCH.get_selector()] * 2 + [EXECUTE_AGREEMENT.get_selector()])
+        pairs = [tuple(pair) for call in calls[:2] for pair in MARK_SIGNED_BATCH.args[0].type.decode(call[1])]
+        self.assertEqual(pairs, signatures)
+        self.assertEqual([len(call[1]) for call in calls[:2]], [2 + 40 * 2, 2 + 40])
+        print(f"✅ {len(signatures)} signatures sent in {len(calls) - 1} mark_signed_batch calls")
+
+    def test_mark_calls_stay_within_the_opcode_budget(self):
+        """Mark calls carry as many pairs as fit one call's opcode budget at the agreement's signer count."""
+        print("\n----- Testing mark_signed_batch Opcode Budget -----")
+
+        def cost(signer_count, pairs):
+            return MARK_CALL_OPS + pairs * (MARK_PAIR_OPS + MARK_BISECT_OPS * signer_count.bit_length())
+
+        for signer_count in (1, 2, 13, 14, 99, MAX_SIGNERS):
+            size = mark_batch_size(signer_count)
+            self.assertLessEqual(cost(signer_count, size), APP_CALL_BUDGET)
+            self.assertGreater(cost(signer_count, size + 1), APP_CALL_BUDGET)
+        self.assertEqual([mark_batch_size(1), mark_batch_size(13), mark_batch_size(99)], [4, 2, 1])
+        self.assertLessEqual(mark_batch_size(13, auto_execute=True), mark_batch_size(13))
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        verifier_key, creator = account.generate_account()
+        algod_client.boxes[agreement_box_name(8)] = AGREEMENT_RECORD.pack(
+            bytes(32), b"DocuSign", 100, 0, 0, 13, decode_address(creator), bytes(32), 0)
+        signatures = [(8, account.generate_account()[1]) for _ in range(13)] + [(9, account.generate_account()[1])] * 2
+
+        client.mark_signed_batch(verifier_key, signatures)
+
+        sizes = {}
+        for group in algod_client.groups:
+            pairs = MARK_SIGNED_BATCH.args[0].type.decode(group[0].transaction.app_args[1])
+            sizes.setdefault(pairs[0][0], []).append(len(pairs))
+        self.assertEqual(sizes, {8: [2] * 6 + [1], 9: [1, 1]})
+        print(f"✅ 13-signer agreements are marked {mark_batch_size(13)} signatures per call")
+
+    def test_agreement_calls_reference_registry_boxes(self):
+        """Calls reference their agreement's boxes; long signer lists spill into grouped add_initial_signers calls."""
+        print("\n----- Testing Agreement Registry Box References -----")
+
+        algod_client = FakeAlgodClient()
+        algod_client.global_state.append({
+            'key': base64.b64encode(b"agreement_counter").decode(), 'value': {'type': 2, 'uint': 5}
+        })
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator_key, _ = account.generate_account()
+        wallets = [account.generate_account()[1] for _ in range(30)]
+        document_hash = hashlib.sha256(b"contract").digest()
+
+        client.send_agreement_batch(creator_key, {"closing": (document_hash, "DocuSign", wallets, None),
+                                                  "nda": (document_hash, "DocuSign", wallets[:1], None)})
+        client.send_agreement_batch(creator_key, {"side-letter": (document_hash, "DocuSign", wallets[:2], None)})
+        client.submit_signature_batch(creator_key, [(7, wallets[0])], execute_ids=[7])
+
+        # In-flight creates reserve distinct IDs; 30 signers take one create and two add_initial_signers calls
+        txns = [stxn.transaction for group in algod_client.groups for stxn in group]
+        self.assertEqual([len(group) for group in algod_client.groups], [3, 1, 1, 2])
+        self.assertEqual([txn.app_args[0] for txn in txns[:3]],
+                         [CREATE_AGREEMENT.get_selector()] + [ADD_INITIAL_SIGNERS.get_selector()] * 2)
+        self.assertEqual(txns[0].app_args[2], b"DocuSign".ljust(16, b"\0"))
+        signer_args = [ADD_INITIAL_SIGNERS.args[1].type.decode(txn.app_args[-1]) for txn in txns[:3]]
+        self.assertEqual([len(arg) for arg in signer_args], [13, 14, 3])
+        self.assertEqual([decode_address(signer) for arg in signer_args for signer in arg],
+                         sorted(decode_address(wallet) for wallet in wallets))
+        boxes = [[ref.name for ref in txn.boxes if ref.name] for txn in txns]
+        self.assertEqual([boxes[i][0] for i in (0, 3, 4)], [agreement_box_name(i) for i in (5, 6, 7)])
+        self.assertEqual(boxes[5], [agreement_box_name(7), signer_box_name(7), mask_box_name(7),
+                                    b"meta_" + (7).to_bytes(8, "big") + b"_action_type"])
+        self.assertEqual(boxes[6], boxes[5])
+
+        # Signer boxes hold packed addresses with their signed flag
+        algod_client.boxes[signer_box_name(7)] = b"".join(
+            decode_address(wallet) + flag + bytes(8) for wallet, flag in ((wallets[0], b"1"), (wallets[1], b"0"))
+        )
+        self.assertEqual(client.get_signer_statuses([7, 8]), {7: {wallets[0]: True, wallets[1]: False}})
+        print(f"✅ {len(txns)} calls referenced the boxes of agreements 5-7")
+
+    def test_agreement_batch_reports_failures_per_agreement(self):
+        """Each agreement is its own group, so one that cannot be created fails alone."""
+        print("\n----- Testing Per-Agreement Create Failures -----")
+
+        algod_client = RegistryAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator_key, _ = account.generate_account()
+        wallets = [account.generate_account()[1] for _ in range(3)]
+        document_hash = hashlib.sha256(b"contract").digest()
+
+        submitted = client.send_agreement_batch(creator_key, {
+            "closing": (document_hash, "DocuSign", wallets, None),
+            "nda": (document_hash, "A provider name that is far too long", wallets, None),
+            "side-letter": (document_hash, "DocuSign", wallets[:1], None),
+        })
+        created, failed = client.confirm_agreement_batch(creator_key, submitted)
+
+        self.assertEqual(created, {"closing": 1, "side-letter": 2})
+        self.assertEqual(list(failed), ["nda"])
+        self.assertEqual([len(group) for group in algod_client.groups], [1, 1])
+        print(f"✅ Created {sorted(created)}, reported {failed}")
+
+    def test_creates_after_a_dropped_create_are_resent(self):
+        """A create that fails once submitted shifts the later predicted IDs, so the later creates are resent."""
+        print("\n----- Testing Creates After a Dropped Create -----")
+
+        algod_client = DroppingAlgodClient(dropped=2)
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator_key, _ = account.generate_account()
+        agreement = (hashlib.sha256(b"contract").digest(), "DocuSign", [account.generate_account()[1]], None)
+
+        submitted = client.send_agreement_batch(creator_key, {key: agreement for key in "abcd"})
+        created, failed = client.confirm_agreement_batch(creator_key, submitted)
+
+        self.assertEqual(created, {"a": 0, "c": 1, "d": 2})
+        self.assertEqual(list(failed), ["b"])
+        self.assertEqual([group[0].transaction.boxes[0].name for group in algod_client.groups],
+                         [agreement_box_name(i) for i in (0, 1, 2, 3, 1, 2)])
+        print(f"✅ Resent the creates after the dropped one: {created}")
+
+    def test_rejected_create_does_not_reuse_ids_in_flight(self):
+        """A rejected create gives back only its own IDs, never those of creates still in flight."""
+        print("\n----- Testing Agreement ID Reservations -----")
+
+        algod_client = FailingAlgodClient()
+        algod_client.failing = False
+        counter = {'key': base64.b64encode(b"agreement_counter").decode(), 'value': {'type': 2, 'uint': 5}}
+        algod_client.global_state.append(counter)
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator_key, _ = account.generate_account()
+        agreement = (hashlib.sha256(b"contract").digest(), "DocuSign", [account.generate_account()[1]], None)
+
+        in_flight = client.send_agreement_batch(creator_key, {"a": agreement})
+        algod_client.failing = True
+        rejected = client.send_agreement_batch(creator_key, {"b": agreement})
+        algod_client.failing = False
+        retried = client.send_agreement_batch(creator_key, {"b": agreement})
+        counter['value']['uint'] = 9
+        later = client.send_agreement_batch(creator_key, {"c": agreement})
+
+        self.assertEqual([entry[:2] for entry in in_flight + rejected + retried + later],
+                         [("a", 5), ("b", None), ("b", 6), ("c", 9)])
+        self.assertEqual([group[0].transaction.boxes[0].name for group in algod_client.groups],
+                         [agreement_box_name(i) for i in (5, 6, 9)])
+        print("✅ The retried create got the next free ID instead of one still in flight")
+
+    def test_bulk_create_packs_agreements_into_calls(self):
+        """create_agreements calls create consecutive IDs, two agreements each unless signers run over the cap."""
+        print("\n----- Testing Bulk Agreement Creation -----")
+
+        algod_client = RegistryAlgodClient()
+        algod_client.global_state.append({
+            'key': base64.b64encode(b"agreement_counter").decode(), 'value': {'type': 2, 'uint': 1}
+        })
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator_key, _ = account.generate_account()
+        wallets = [account.generate_account()[1] for _ in range(12)]
+        agreements = [(hashlib.sha256(bytes([i])).digest(), "DocuSign", wallets) for i in range(2)]
+        agreements.append((hashlib.sha256(b"pair").digest(), "DocuSign", wallets[:2]))
+
+        agreement_ids = client.create_agreements(creator_key, agreements)
+
+        self.assertEqual(agreement_ids, [1, 2, 3])
+        [group] = algod_client.groups
+        self.assertEqual([stxn.transaction.app_args[0] for stxn in group], [CREATE_AGREEMENTS.get_selector()] * 2)
+        entries = [CREATE_AGREEMENTS.args[0].type.decode(stxn.transaction.app_args[1]) for stxn in group]
+        self.assertEqual([len(call) for call in entries], [1, 2])
+        self.assertEqual(bytes(entries[1][0][1]), b"DocuSign".ljust(16, b"\0"))
+        self.assertEqual(entries[1][0][2], sorted(wallets, key=decode_address))
+        boxes = [ref.name for ref in group[1].transaction.boxes if ref.name]
+        self.assertEqual(boxes, [agreement_box_name(2), signer_box_name(2), mask_box_name(2),
+                                 agreement_box_name(3), signer_box_name(3), mask_box_name(3)])
+        print(f"✅ {len(agreements)} agreements created in {len(group)} calls")
+
+    def test_agreement_records_decode_fixed_width_layout(self):
+        """Agreement boxes decode field by field; the executor is only reported once executed."""
+        print("\n----- Testing Agreement Record Decoding -----")
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        creator, executor = (account.generate_account()[1] for _ in range(2))
+        document_hash = hashlib.sha256(b"contract").digest()
+        algod_client.boxes[agreement_box_name(1)] = AGREEMENT_RECORD.pack(
+            document_hash, b"DocuSign", 100, 0, 0, 30, decode_address(creator), bytes(32), 0)
+        algod_client.boxes[agreement_box_name(2)] = AGREEMENT_RECORD.pack(
+            document_hash, b"AdobeSign", 100, 160, 1, 2, decode_address(creator), decode_address(executor), 0)
+
+        records = client.get_agreement_records([1, 2, 3])
+        self.assertEqual(AGREEMENT_RECORD.size, 152)
+        self.assertEqual(sorted(records), [1, 2])
+        self.assertEqual((records[1].provider, records[1].signer_count, records[1].executed_by), ("DocuSign", 30, None))
+        self.assertEqual((records[2].provider, records[2].creator, records[2].executed_by), ("AdobeSign", creator, executor))
+        self.assertEqual(client.get_document_hashes([2]), {2: document_hash})
+        with self.assertRaises(ValueError):
+            client.create_agreement(account.generate_account()[0], document_hash, "A" * 17, [creator])
+        print(f"✅ Decoded records of agreements {sorted(records)}")
+
+    def test_sweeper_archives_executed_agreements_with_their_metadata(self):
+        """Executed agreements are archived with every metadata box their record counts, in one group each."""
+        print("\n----- Testing Archival of Executed Agreements -----")
+
+        algod_client = FakeAlgodClient()
+        client = DocumentExecutionClient(algod_client, 1, 2)
+        admin_key, creator = account.generate_account()
+        notes = [f"note_{key}" for key in range(6)]
+        for agreement_id, flags, meta_count in ((1, 1, 1), (2, 0, 0), (3, 1, 6), (4, 1, 0), (5, 1, 2)):
+            algod_client.boxes[agreement_box_name(agreement_id)] = AGREEMENT_RECORD.pack(
+                bytes(32), b"DocuSign", 100, 160 * flags, flags, 1, decode_address(creator), bytes(32), meta_count)
+        for agreement_id, key in [(1, "action_type"), (5, "action_type"), (5, "description")] + [(3, key) for key in notes]:
+            algod_client.boxes[meta_box_name(agreement_id, key)] = b"x"
+
+        archived = client.archive_executed_agreements(admin_key, [1, 2, 3, 4, 5],
+                                                      {1: ["action_type"], 3: notes, 5: ["action_type"]})
+
+        self.assertEqual(archived, [1, 3, 4])
+        calls = [[(stxn.transaction.app_args[0], stxn.transaction.app_args[2]) for stxn in group]
+                 for group in algod_client.groups]
+        keys_type = ARCHIVE_AGREEMENT.args[1].type
+        archive, delete = ARCHIVE_AGREEMENT.get_selector(), DELETE_METADATA.get_selector()
+        self.assertEqual(calls, [
+            [(archive, keys_type.encode(["action_type"]))],
+            [(delete, keys_type.encode(notes[5:])), (archive, keys_type.encode(notes[:5]))],
+            [(archive, keys_type.encode([]))],
+        ])
+        self.assertEqual([ref.name for ref in algod_client.groups[0][0].transaction.boxes if ref.name],
+                         [agreement_box_name(1), signer_box_name(1), mask_box_name(1), meta_box_name(1, "action_type")])
+        self.assertEqual([ref.name for ref in algod_client.groups[1][0].transaction.boxes],
+                         [agreement_box_name(3), meta_box_name(3, "note_5")])
+        print(f"✅ Archived agreements {archived}, skipping the open one and one with unknown metadata")
+
+
+class TestVerificationEngine(unittest.TestCase):
+    """Test the provider-agnostic verification engine."""
+
+    def setUp(self):
+        """Set up an engine with an in-memory provider and a recording Algorand client."""
+        verifier_key, _ = account.generate_account()
+        os.environ["VERIFIER_PRIVATE_KEY"] = verifier_key
+        self.algod_client = FakeAlgodClient()
+        self.provider = FakeProvider({})
+        self.engine = VerificationEngine(self.algod_client, 1, 2, providers=[self.provider],
+                                         retry_queue=ChainRetryQueue(":memory:"))
+
+    def track(self, agreement_id, statuses):
+        """Track an agreement whose envelope reports the given recipient statuses."""
+        emails = list(statuses)
+        wallets = [account.generate_account()[1] for _ in emails]
+        self.provider.statuses[f"env-{agreement_id}"] = statuses
+        self.engine.track_agreement(agreement_id, "Fake", f"env-{agreement_id}", wallets, emails, b"\x00" * 32)
+        self.engine.scheduler.add(agreement_id, delay=0)
+        self.algod_client.boxes.setdefault(agreement_box_name(agreement_id), AGREEMENT_RECORD.pack(
+            b"\x00" * 32, b"Fake", 100, 0, 0, len(wallets), bytes(32), bytes(32), 0))
+
+    def test_tick_batches_provider_calls_and_executes_completed_agreements(self):
+        """Due envelopes are fetched in provider-sized batches and completed agreements execute."""
+        print("\n----- Testing Verification Engine Tick -----")
+
+        self.track(1, {"a@example.com": "signed", "b@example.com": "signed"})
+        self.track(2, {"c@example.com": "signed", "d@example.com": "sent"})
+        self.track(3, {"e@example.com": "sent"})
+
+        self.engine.run_monitor_tick()
+
+        self.assertEqual(sorted(len(batch) for batch in self.provider.requests), [1, 2])
+        self.assertNotIn(1, self.engine.tracked_agreements)
+        self.assertEqual(self.engine.tracked_agreements[2]['signed_by'], {"c@example.com"})
+        self.assertEqual(self.engine.tracked_agreements[3]['signed_by'], set())
+        actions = [stxn.transaction.app_args[0] for group in self.algod_client.groups for stxn in group]
+        self.assertEqual(sorted(actions), sorted([EXECUTE_AGREEMENT.get_selector()] + [MARK_SIGNED_BATCH.get_selector()] * 2))
+        print(f"✅ {len(self.provider.requests)} provider requests, agreement 1 executed")
+
+    def test_completed_documents_are_hashed_against_chain(self):
+        """Completed envelopes are streamed into SHA-256 once and compared to the on-chain hash."""
+        print("\n----- Testing Completed Document Verification -----")
+
+        document = b"%PDF-1.4 signed agreement"
+        for agreement_id in (1, 2):
+            self.track(agreement_id, {f"s{agreement_id}@example.com": "signed"})
+            self.algod_client.boxes[agreement_box_name(agreement_id)] = AGREEMENT_RECORD.pack(
+                hashlib.sha256(document).digest(), b"Fake", 1, 0, 0, 1, bytes(32), bytes(32)
+            , 0)
+        self.provider.documents = {"env-1": document, "env-2": document + b" tampered"}
+        self.track(3, {"s3@example.com": "signed"})  # Provider has no copy of this document
+
+        self.engine.run_monitor_tick()
+        self.provider.supports_document_download = False
+        self.track(4, {"s4@example.com": "signed"})
+        self.engine.run_monitor_tick()
+
+        results = self.engine.document_verifications
+        self.assertEqual({a: r['status'] for a, r in results.items()},
+                         {1: 'match', 2: 'mismatch', 3: 'error', 4: 'unsupported'})
+        self.assertEqual(results[1]['size'], len(document))
+        self.assertEqual(results[2]['expected'], hashlib.sha256(document).hexdigest())
+        self.assertEqual(self.engine.document_verifications_total.value(result="mismatch"), 1)
+        self.assertEqual(self.engine.document_verify_seconds.count(provider="Fake"), 2)
+        print(f"✅ Verification results: { {a: r['status'] for a, r in results.items()} }")
+
+    def test_tick_records_metrics(self):
+        """A tick records provider latency, chain latency, marks and queue gauges."""
+        print("\n----- Testing Verification Engine Metrics -----")
+
+        self.track(1, {"a@example.com": "signed"})
+        self.track(2, {"b@example.com": "sent"})
+        self.engine.run_monitor_tick()
+
+        self.assertEqual(self.engine.tick_seconds.count(), 1)
+        self.assertEqual(self.engine.provider_request_seconds.count(provider="Fake"), 1)
+        self.assertEqual(self.engine.chain_submit_seconds.count(), 1)
+        self.assertEqual(self.engine.signature_to_mark_seconds.count(), 1)
+        self.assertEqual(self.engine.signatures_marked.value(), 1)
+        self.assertEqual(self.engine.agreements_executed.value(), 1)
+        self.assertEqual(self.engine.tracked_gauge.value(), 1)
+        self.assertEqual(self.engine.due_envelopes_gauge.value(), 2)
+        print("✅ Tick metrics recorded")
+
+    def test_failed_chain_writes_back_off_without_repolling(self):
+        """Failed marks are retried from the queue with backoff, not by re-polling the provider."""
+        print("\n----- Testing Chain Retry Queue in the Engine -----")
+
+        clock = FakeClock()
+        self.algod_client = FailingAlgodClient()
+        self.engine = VerificationEngine(self.algod_client, 1, 2, providers=[self.provider],
+                                         retry_queue=ChainRetryQueue(":memory:", jitter=0, clock=clock))
+        self.track(1, {"a@example.com": "signed"})
+
+        self.engine.run_monitor_tick()
+        self.engine.run_monitor_tick()
+        self.assertEqual(len(self.provider.requests), 1)
+        self.assertNotIn(1, self.engine.scheduler)
+        self.assertEqual(self.engine.retry_queue.due(), [])
+
+        self.algod_client.failing = False
+        clock.advance(self.engine.retry_queue.base_delay)
+        self.engine.run_monitor_tick()
+
+        self.assertEqual(len(self.provider.requests), 1)
+        self.assertNotIn(1, self.engine.tracked_agreements)
+        self.assertEqual(len(self.engine.retry_queue), 0)
+        print("✅ Marks retried after backoff without extra provider calls")
+
+    def test_envelopes_stay_scheduled_when_resolving_a_batch_raises(self):
+        """A batch whose payload fails to apply is rescheduled, not lost from the schedule."""
+        print("\n----- Testing Failed Batch Resolution -----")
+
+        clock = FakeClock()
+        self.engine.scheduler.clock = clock
+        self.track(1, {"a@example.com": "sent"})
+        self.track(2, {"b@example.com": "signed"})
+        due = self.engine.scheduler.pop_due()
+        envelopes = {self.engine.tracked_agreements[a]['envelope_id']: a for a in due}
+        payload = self.provider.fetch_status_changes(list(envelopes))
+        self.provider.parse_events = lambda payload: 1 / 0
+
+        with self.assertRaises(ZeroDivisionError):
+            self.engine.resolve_batch(self.provider, envelopes, payload)
+        self.assertEqual(self.engine.tracked_agreements[2]['signed_by'], set())
+        self.assertEqual(self.engine.scheduler.seconds_until_next(), 2 * self.engine.scheduler.min_interval)
+
+        clock.advance(2 * self.engine.scheduler.min_interval)
+        self.assertCountEqual(self.engine.scheduler.pop_due(), [1, 2])
+        print("✅ Both agreements were rescheduled after the failed resolve")
+
+    def test_queued_execution_of_an_incomplete_agreement_keeps_tracking(self):
+        """An execution found not due any more is dropped from the queue, not settled as done."""
+        print("\n----- Testing Incomplete Queued Executions -----")
+
+        self.track(1, {"a@example.com": "signed"})
+        agreement = self.engine.tracked_agreements[1]
+        agreement['signed_by'].add("a@example.com")
+        self.assertEqual(len(self.engine.due_executions()), 1)
+
+        # A signer added after the execution was queued
+        agreement['wallet_signers'].append(account.generate_account()[1])
+        agreement['email_signers'].append("b@example.com")
+        self.assertEqual(self.engine.run_due_executions(), 0)
+        self.assertIn(1, self.engine.tracked_agreements)
+        self.assertEqual(len(self.engine.retry_queue), 0)
+        self.assertEqual(self.algod_client.groups, [])
+
+        agreement['signed_by'].add("b@example.com")
+        self.assertEqual(self.engine.run_due_executions(), 1)
+        self.assertNotIn(1, self.engine.tracked_agreements)
+        print("✅ Incomplete agreement stayed tracked until it could be executed")
+
+    def test_marks_already_on_chain_are_not_resubmitted(self):
+        """Reconciliation skips marks the registry already records as signed."""
+        print("\n----- Testing Chain-State Reconciliation -----")
+
+        self.track(1, {"a@example.com": "signed", "b@example.com": "signed"})
+        wallet_a, wallet_b = self.engine.tracked_agreements[1]['wallet_signers']
+        self.algod_client.boxes[signer_box_name(1)] = b"".join(
+            decode_address(wallet) + flag + bytes(8) for wallet, flag in ((wallet_a, b"1"), (wallet_b, b"0"))
+        )
+
+        self.engine.run_monitor_tick()
+
+        calls = [stxn.transaction.app_args for group in self.algod_client.groups for stxn in group]
+        self.assertEqual([call[0] for call in calls], [MARK_SIGNED_BATCH.get_selector(), EXECUTE_AGREEMENT.get_selector()])
+        self.assertEqual(MARK_SIGNED_BATCH.args[0].type.decode(calls[0][1]), [[1, wallet_b]])
+        self.assertEqual(calls[1][1], (1).to_bytes(8, "big"))
+        self.assertEqual(self.engine.reconciled_marks.value(), 1)
+        print("✅ Only the mark missing on-chain was submitted")
+
+    def test_pipeline_keeps_polling_while_chain_is_slow(self):
+        """Staged pipeline polls every envelope while confirmations lag, then executes."""
+        print("\n----- Testing Staged Verifier Pipeline -----")
+
+        self.algod_client = SlowAlgodClient(delay=0.3)
+        self.engine = VerificationEngine(self.algod_client, 1, 2, providers=[self.provider],
+                                         retry_queue=ChainRetryQueue(":memory:"))
+        for agreement_id in range(1, 7):
+            self.track(agreement_id, {f"s{agreement_id}@example.com": "signed"})
+
+        pipeline = VerifierPipeline(self.engine, submit_batch_size=1, submit_linger=0,
+                                    confirm_concurrency=1, queue_size=2, idle_interval=0.05)
+        occupancy = []
+
+        async def run():
+            task = asyncio.ensure_future(pipeline.run())
+            await asyncio.sleep(0.3)
+            occupancy.append(pipeline.occupancy())
+            polled_while_confirming = sum(len(batch) for batch in self.provider.requests)
+            await asyncio.sleep(3.0)
+            task.cancel()
+            return polled_while_confirming
+
+        polled_while_confirming = asyncio.run(run())
+
+        self.assertEqual(polled_while_confirming, 6)
+        self.assertGreater(occupancy[0]['confirm']['busy'] + occupancy[0]['confirm']['queued'], 0)
+        self.assertEqual(occupancy[0]['execute']['workers'], 2)
+        self.assertEqual(self.engine.tracked_agreements, {})
+        print(f"✅ All envelopes polled during slow confirmations; occupancy {occupancy[0]}")
+
+    def test_provider_adapters_parse_signature_events(self):
+        """DocuSign and Adobe Sign payloads are normalised to the same events."""
+        print("\n----- Testing Provider Event Parsing -----")
+
+        docusign_events = DocuSignProvider(None, None).parse_events({'envelopes': [
+            {'envelopeId': 'env-1', 'recipients': {'signers': [
+                {'email': 'a@example.com', 'status': 'completed'},
+                {'email': 'b@example.com', 'status': 'sent'}
+            ]}}
+        ]})
+        adobesign_events = AdobeSignProvider(None, None).parse_events({'agreements': [
+            {'agreementId': 'env-1', 'participantSets': [
+                {'status': 'COMPLETED', 'memberInfos': [{'email': 'a@example.com'}]},
+                {'status': 'WAITING_FOR_MY_SIGNATURE', 'memberInfos': [{'email': 'b@example.com'}]}
+            ]}
+        ]})
+
+        for events in (docusign_events, adobesign_events):
+            self.assertEqual([(e.envelope_id, e.email, e.signed) for e in events],
+                             [('env-1', 'a@example.com', True), ('env-1', 'b@example.com', False)])
+        print("✅ Both providers produce the same signature events")
+
+
+class TestDocumentStreaming(unittest.TestCase):
+    """Test streamed envelope request bodies."""
+
+    def test_json_body_streams_base64_document(self):
+        """The streamed body equals the fully built JSON and reports its length up front."""
+        print("\n----- Testing Streamed Envelope Body -----")
+
+        document = os.urandom(10 * 3 * 7 + 2)
+        definition = {'documents': [{'documentBase64': DOCUMENT_PLACEHOLDER, 'documentId': '1'}]}
+        body = StreamingBody.json(definition, io.BytesIO(document), chunk_size=21)
+
+        chunks = list(body)
+        streamed = b"".join(chunks)
+        self.assertEqual(len(body), len(streamed))
+        self.assertLessEqual(max(len(chunk) for chunk in chunks[1:-1]), 28)
+        self.assertEqual(json.loads(streamed)['documents'][0]['documentBase64'],
+                         base64.b64encode(document).decode('ascii'))
+        self.assertEqual(b"".join(StreamingBody.json(definition, document, chunk_size=21)), streamed)
+        print(f"✅ {len(streamed)} byte body streamed in {len(chunks)} chunks")
+
+
+class TestChainRetryQueue(unittest.TestCase):
+    """Test backoff and dead-lettering of chain operations."""
+
+    def test_backoff_then_dead_letter_and_requeue(self):
+        """Failures back off exponentially and dead-letter after the attempt cap."""
+        print("\n----- Testing Chain Retry Queue -----")
+
+        clock = FakeClock()
+        queue = ChainRetryQueue(":memory:", base_delay=5, max_delay=20, max_attempts=4, jitter=0, clock=clock)
+        key = ChainRetryQueue.op_key("mark_signed", 1, "WALLET")
+        self.assertTrue(queue.enqueue(key, "mark_signed", 1, {'wallet': 'WALLET'}))
+        self.assertFalse(queue.enqueue(key, "mark_signed", 1, {'wallet': 'WALLET'}))
+
+        delays = []
+        for _ in range(3):
+            self.assertEqual([op['op_key'] for op in queue.due()], [key])
+            self.assertFalse(queue.failed(key, "rejected"))
+            delays.append(queue.seconds_until_next())
+            clock.advance(delays[-1])
+        self.assertEqual(delays, [5, 10, 20])
+
+        self.assertTrue(queue.failed(key, "rejected"))
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(queue.blocked_agreements(), {1})
+        self.assertEqual(queue.dead_letters()[0]['attempts'], 4)
+        self.assertFalse(queue.enqueue(key, "mark_signed", 1, {'wallet': 'WALLET'}))
+
+        self.assertTrue(queue.requeue_dead_letter(key))
+        self.assertEqual(queue.due()[0]['attempts'], 0)
+        self.assertEqual(queue.dead_letters(), [])
+        print(f"✅ Retry delays {delays}, dead-lettered after 4 attempts and requeued")
+
+
+class TestVerifierMetrics(unittest.TestCase):
+    """Test the metrics registry and its HTTP exposition."""
+
+    def test_registry_renders_prometheus_text_over_http(self):
+        """Counters, gauges and histograms are served in the text exposition format."""
+        print("\n----- Testing Metrics Exposition -----")
+
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests", ["provider"]).inc(2, provider="DocuSign")
+        registry.gauge("queue_depth", "Queue depth").set(5)
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(3)
+
+        server = start_metrics_server(registry, 0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                text = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{provider="DocuSign"} 2', text)
+        self.assertIn("queue_depth 5", text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_seconds_count 3", text)
+        print("✅ Metrics served in the text exposition format")
+
+
+class TestDocuSignSimulator(unittest.TestCase):
+    """Test the DocuSign provider against the local simulator."""
+
+    def test_provider_round_trip_and_throttling(self):
+        """Envelopes created over HTTP report signatures, and throttling surfaces Retry-After."""
+        print("\n----- Testing DocuSign Simulator -----")
+
+        simulator = DocuSignSimulator(signing_model=instant_signing(), retry_after=7, seed=1)
+        provider = DocuSignProvider(simulator.start(), "simulated")
+        try:
+            envelope_id = provider.create_envelope(b"%PDF-1.4 agreement", ["a@example.com", "b@example.com"])
+            events = provider.parse_events(provider.fetch_status_changes([envelope_id]))
+            self.assertEqual([(e.email, e.signed) for e in events],
+                             [("a@example.com", True), ("b@example.com", True)])
+            self.assertEqual(provider.get_recipients(envelope_id)['signers'][0]['status'], 'completed')
+            self.assertEqual(b"".join(provider.download_document(envelope_id)), b"%PDF-1.4 agreement")
+            with self.assertRaises(Exception):
+                provider.download_document("missing-envelope")
+
+            simulator.throttle_rate = 1.0
+            with self.assertRaises(ProviderRateLimitError) as raised:
+                provider.fetch_status_changes([envelope_id])
+            self.assertEqual(raised.exception.retry_after, 7)
+        finally:
+            simulator.stop()
+        print(f"✅ Simulator served {sum(simulator.request_counts.values())} requests")
+
+
+class TestChainBootstrap(unittest.TestCase):
+    """Test rebuilding verifier tracking state from Agreement Registry logs."""
+
+    def create(self, indexer_client, confirmed_round, agreement_id, wallets, note=None):
+        """Record the logs of a create_agreement call."""
+        prefix = agreement_id.to_bytes(8, 'big')
+        logs = [b"SIGNER_ADDED:" + prefix + decode_address(wallet) for wallet in sorted(wallets, key=decode_address)]
+        logs += [b"AGREEMENT_CREATED:" + prefix, b"PROVIDER:Fake"]
+        indexer_client.add(confirmed_round, logs, [CREATE_AGREEMENT.get_selector(), b"\x01" * 32, b"Fake".ljust(16, b"\0")], note)
+
+    def test_parallel_scan_resumes_open_agreements_from_checkpoint(self):
+        """Open agreements and signer status are rebuilt, and restarts only scan new rounds."""
+        print("\n----- Testing Chain Log Bootstrap -----")
+
+        os.environ["VERIFIER_PRIVATE_KEY"] = account.generate_account()[0]
+        wallets = sorted((account.generate_account()[1] for _ in range(3)), key=decode_address)
+        indexer_client = FakeIndexerClient()
+        # The note pairs emails with wallets given in the opposite order to the sorted signer logs
+        note = TRACKING_NOTE_PREFIX + json.dumps(
+            {'envelope_id': "env-1", 'signers': {wallets[1]: "b@example.com", wallets[0]: "a@example.com"}}).encode()
+        self.create(indexer_client, 10, 1, [wallets[1], wallets[0]], note)
+        self.create(indexer_client, 20, 2, wallets[2:])
+        indexer_client.add(30, [b"SIGNATURE:" + (1).to_bytes(8, 'big') + b":" + decode_address(wallets[1])])
+        self.create(indexer_client, 40, 3, wallets[:1], note)
+        indexer_client.add(45, [b"EXECUTED:" + (3).to_bytes(8, 'big')])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "checkpoint.json")
+            scanner = AgreementLogScanner(indexer_client, 2, checkpoint_path=checkpoint,
+                                          start_round=1, workers=3, range_size=15)
+            engine = VerificationEngine(FakeAlgodClient(), 1, 2, providers=[FakeProvider({})],
+                                        retry_queue=ChainRetryQueue(":memory:"))
+
+            self.assertEqual(engine.bootstrap_from_chain(scanner), [2])
+            self.assertEqual(indexer_client.ranges, [(1, 15), (16, 30), (31, 45)])
+            self.assertEqual(list(engine.tracked_agreements), [1])
+            agreement = engine.tracked_agreements[1]
+            self.assertEqual(agreement['wallet_signers'], wallets[:2])
+            self.assertEqual(agreement['email_signers'], ["a@example.com", "b@example.com"])
+            self.assertEqual(agreement['signed_by'], {"b@example.com"})
+            self.assertEqual(agreement['envelope_id'], "env-1")
+
+            # A restarted scanner picks up from the checkpoint
+            indexer_client.add(55, [b"SIGNED:" + (2).to_bytes(8, 'big') + decode_address(wallets[2])])
+            bulk_args = [CREATE_AGREEMENTS.get_selector(), CREATE_AGREEMENTS.args[0].type.encode([
+                (b"\x02" * 32, b"Bulk".ljust(16, b"\0"), wallets[:2]),
+                (b"\x03" * 32, b"Bulk".ljust(16, b"\0"), wallets[2:])
+            ])]
+            bulk_log = b"AGREEMENTS_CREATED:" + (4).to_bytes(8, 'big') + (2).to_bytes(8, 'big')
+            indexer_client.add(58, [bulk_log], bulk_args)
+            indexer_client.add(60, [b"EXECUTED:" + (1).to_bytes(8, 'big')])
+            indexer_client.ranges = []
+            state = AgreementLogScanner(indexer_client, 2, checkpoint_path=checkpoint, range_size=15).scan()
+            self.assertEqual(indexer_client.ranges, [(46, 60)])
+            self.assertEqual(state['round'], 60)
+            self.assertEqual(list(state['agreements']), [2, 4, 5])
+            self.assertEqual(state['agreements'][2]['signers'], {wallets[2]: True})
+            self.assertEqual(state['agreements'][4]['signers'], {wallets[0]: False, wallets[1]: False})
+            self.assertEqual(state['agreements'][5]['provider'], "Bulk")
+        print(f"✅ Rebuilt open agreements from logs; restart scanned {indexer_client.ranges}")
+
+
+class TestProviderAuth(unittest.TestCase):
+    """Test cached, single-flight OAuth token refresh."""
+
+    def test_concurrent_callers_share_one_refresh_and_cache(self):
+        """Concurrent expiry and 401s cause one refresh, and restarts reuse the cached token."""
+        print("\n----- Testing OAuth Token Manager -----")
+
+        clock = FakeClock()
+        issued = []
+
+        def fetch_token():
+            time.sleep(0.1)  # Give every caller time to pile up behind the refresh
+            issued.append(f"token-{len(issued) + 1}")
+            return issued[-1], 3600
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = os.path.join(tmp, "token.json")
+            manager = OAuthTokenManager(fetch_token, refresh_margin=300, cache_path=cache, clock=clock)
+
+            def call_concurrently(action):
+                results = []
+                threads = [threading.Thread(target=lambda: results.append(action())) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                return results
+
+            self.assertEqual(call_concurrently(manager.token), ["token-1"] * 8)
+
+            # A herd of 401s for the same token re-authenticates once
+            call_concurrently(lambda: manager.invalidate("token-1"))
+            self.assertEqual(call_concurrently(manager.token), ["token-2"] * 8)
+
+            # Within the refresh margin the token is renewed ahead of expiry
+            clock.advance(3600 - 299)
+            self.assertEqual(manager.token(), "token-3")
+
+            # A restarted worker picks the token up from disk
+            restarted = OAuthTokenManager(fetch_token, cache_path=cache, clock=clock)
+            self.assertEqual(restarted.token(), "token-3")
+            self.assertEqual(restarted.refreshes, 0)
+        self.assertEqual(len(issued), 3)
+        print(f"✅ 24 token requests served by {len(issued)} refreshes")
+
+    def test_provider_reauthenticates_once_on_401(self):
+        """A rotated token makes the provider refresh and retry instead of failing."""
+        simulator = DocuSignSimulator(signing_model=instant_signing(), seed=1, auth_token="old")
+        manager = OAuthTokenManager(lambda: (simulator.auth_token, 3600))
+        provider = DocuSignProvider(simulator.start(), manager)
+        try:
+            envelope_id = provider.create_envelope(b"%PDF-1.4 agreement", ["a@example.com"])
+            simulator.auth_token = "new"
+            events = provider.parse_events(provider.fetch_status_changes([envelope_id]))
+        finally:
+            simulator.stop()
+        self.assertEqual([e.signed for e in events], [True])
+        self.assertEqual(simulator.request_counts['unauthorized'], 1)
+        self.assertEqual(manager.refreshes, 2)
+
+
+class TestBulkRegistration(unittest.TestCase):
+    """Test template-based bulk envelope and agreement creation."""
+
+    def test_bulk_send_uploads_document_once(self):
+        """N signer sets share one template upload and go on-chain in pipelined groups."""
+        print("\n----- Testing Bulk Agreement Registration -----")
+
+        os.environ["VERIFIER_PRIVATE_KEY"] = account.generate_account()[0]
+        simulator = DocuSignSimulator(signing_model=instant_signing(), seed=1)
+        provider = DocuSignProvider(simulator.start(), "simulated")
+        algod_client = RegistryAlgodClient()
+        engine = VerificationEngine(algod_client, 1, 2, providers=[provider], retry_queue=ChainRetryQueue(":memory:"))
+        document = b"%PDF-1.4 " + b"standard contract " * 4096
+        signer_sets = [
+            ([account.generate_account()[1]], [f"counterparty{i}@example.com"]) for i in range(20)
+        ]
+        try:
+            agreement_ids = engine.register_agreements_bulk(document, "DocuSign", signer_sets)
+        finally:
+            simulator.stop()
+
+        self.assertEqual(agreement_ids, list(range(1, 21)))
+        self.assertEqual(simulator.request_counts, {'create_template': 1, 'create_envelope': 20})
+        self.assertLess(simulator.bytes_received, 2 * len(base64.b64encode(document)))
+        self.assertEqual([len(group) for group in algod_client.groups], [1] * 20)
+        tracked = engine.tracked_agreements[20]
+        self.assertEqual(tracked['email_signers'], ["counterparty19@example.com"])
+        self.assertEqual(tracked['document_hash'], hashlib.sha256(document).digest())
+        recipients = simulator.recipients(tracked['envelope_id'])['signers']
+        self.assertEqual([r['email'] for r in recipients], ["counterparty19@example.com"])
+        print(f"✅ 20 agreements from one upload, {simulator.bytes_received} request bytes")
+
+
+class TestVerifierSharding(unittest.TestCase):
+    """Test agreement partitioning across verifier workers."""
+
+    def test_ring_moves_few_agreements_when_a_worker_joins(self):
+        """Adding a fifth worker only reassigns roughly a fifth of the agreements."""
+        print("\n----- Testing Consistent Hash Ring Rebalancing -----")
+
+        ring = ConsistentHashRing(["w1", "w2", "w3", "w4"])
+        before = {agreement_id: ring.owner(agreement_id) for agreement_id in range(5000)}
+        ring.add_node("w5")
+        after = {agreement_id: ring.owner(agreement_id) for agreement_id in range(5000)}
+
+        moved = [a for a in before if before[a] != after[a]]
+        self.assertTrue(all(after[a] == "w5" for a in moved))
+        self.assertLess(len(moved), 5000 * 0.35)
+        self.assertGreater(len(moved), 5000 * 0.05)
+        print(f"✅ {len(moved)} of 5000 agreements moved to the new worker")
+
+    def test_store_claims_are_exclusive_between_live_workers(self):
+        """A live owner keeps its agreement until it releases it."""
+        print("\n----- Testing Shard Store Ownership -----")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ShardStore(os.path.join(tmp, "shards.db"))
+            store.put_agreement(1, {'envelope_id': 'env-1', 'wallet_signers': [], 'email_signers': [],
+                                    'document_hash': b'\x01' * 32, 'signed_by': {'a@example.com'}})
+            store.heartbeat("w1")
+            store.heartbeat("w2")
+            live = store.live_workers(ttl=30)
+
+            self.assertTrue(store.claim(1, "w1", live))
+            self.assertFalse(store.claim(1, "w2", live))
+            store.release(1, "w1")
+            self.assertTrue(store.claim(1, "w2", live))
+
+            record = store.load_agreements([1])[1]
+            self.assertEqual(record['signed_by'], {'a@example.com'})
+            self.assertEqual(record['document_hash'], b'\x01' * 32)
+        print("✅ Ownership hand-off goes through release")
+
+    def test_worker_drops_agreements_taken_over_after_a_missed_heartbeat(self):
+        """A worker whose heartbeat lapsed stops handling agreements another worker claimed meanwhile."""
+        print("\n----- Testing Takeover After a Missed Heartbeat -----")
+
+        def worker(store, worker_id):
+            verifier = SimpleNamespace(tracked_agreements={}, identity_cache={}, pending_marks={})
+            return ShardedVerifierWorker(verifier, store, worker_id=worker_id)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ShardStore(os.path.join(tmp, "shards.db"))
+            for agreement_id in range(20):
+                store.put_agreement(agreement_id, {'envelope_id': f'env-{agreement_id}', 'wallet_signers': [],
+                                                   'email_signers': [], 'signed_by': set()})
+            w1, w2 = worker(store, "w1"), worker(store, "w2")
+            w1.rebalance()
+            self.assertEqual(len(w1.owned), 20)
+
+            # w1 stalls past the TTL; w2 sees it as gone and claims everything
+            store.heartbeat("w1", now=time.time() - 2 * w1.heartbeat_ttl)
+            w2.rebalance()
+            self.assertEqual(len(w2.owned), 20)
+
+            w2.verifier.tracked_agreements[3]['signed_by'] = {'a@example.com'}
+            w2._persist(3)
+            w1.verifier.tracked_agreements[3]['signed_by'] = set()
+            w1._persist(3)
+            w1.rebalance()
+
+            owners = store.owners()
+            self.assertTrue(all(owners[a] == "w1" for a in w1.owned))
+            self.assertEqual(set(w1.verifier.tracked_agreements), w1.owned)
+            self.assertNotIn(3, w1.owned)
+            self.assertEqual(store.load_agreements([3])[3]['signed_by'], {'a@example.com'})
+        print(f"✅ w1 kept {len(w1.owned)} agreements it still owns after w2's takeover")
+
+
+if __name__ == "__main__":
+    unittest.main()